@@ -0,0 +1,212 @@
+"""Analytics computed inside SQLite.
+
+Each function returns the same dataclasses as its pure-Python reference in
+``app.analytics`` but only ships the aggregated rows out of the database.
+"""
+
+from __future__ import annotations
+
+import sqlite3
+from collections.abc import Sequence
+
+from app.analytics import (
+    DailyCredits,
+    QueryCostItem,
+    QueryLatencyPoint,
+    QueryRegression,
+    WarehouseHotspot,
+    interpolate_percentile,
+    percentile_ranks,
+)
+from app.timestamps import DAY_MS, day_to_date
+
+
+def daily_credits(conn: sqlite3.Connection, since_day: int | None = None) -> list[DailyCredits]:
+    """Credits per day, optionally only from epoch day ``since_day`` on."""
+    where = ["day >= ?"] if since_day is not None else []
+    params = [since_day] if since_day is not None else []
+    cursor = conn.execute(
+        f"""
+        SELECT day, SUM(credits_used) AS credits_used
+        FROM warehouse_metering {_where(where)}
+        GROUP BY day
+        ORDER BY day
+        """,
+        params,
+    )
+    return [
+        DailyCredits(day=day_to_date(day), credits_used=float(credits)) for day, credits in cursor
+    ]
+
+
+def warehouse_hotspots(conn: sqlite3.Connection, top_n: int = 5) -> list[WarehouseHotspot]:
+    # MIN(id) keeps ties in first-seen order, like the stable sort in the reference.
+    cursor = conn.execute(
+        """
+        SELECT warehouse_name, SUM(credits_used) AS credits_used
+        FROM warehouse_metering
+        GROUP BY warehouse_name
+        ORDER BY credits_used DESC, MIN(id)
+        LIMIT ?
+        """,
+        (top_n,),
+    )
+    return [
+        WarehouseHotspot(warehouse_name=name, credits_used=float(credits))
+        for name, credits in cursor
+    ]
+
+
+def _where(clauses: Sequence[str]) -> str:
+    return f"WHERE {' AND '.join(clauses)}" if clauses else ""
+
+
+def _percentile_of(
+    conn: sqlite3.Connection,
+    clauses: Sequence[str],
+    params: Sequence,
+    count: int,
+    percentile: float,
+) -> float:
+    """Exact percentile of ``total_elapsed_ms`` over ``count`` matching rows.
+
+    Only the one or two ranks being interpolated are fetched. Walking down from the
+    largest value keeps SQLite's sorter (when no index applies) to the top few percent.
+    """
+    if not count:
+        return 0.0
+    k, f, c = percentile_ranks(count, percentile)
+    values = [
+        row[0]
+        for row in conn.execute(
+            f"""
+            SELECT total_elapsed_ms FROM query_history {_where(clauses)}
+            ORDER BY total_elapsed_ms DESC LIMIT 2 OFFSET ?
+            """,
+            (*params, count - 1 - c),
+        )
+    ]
+    upper = values[0]
+    lower = values[1] if f != c else upper
+    return interpolate_percentile(k, f, c, lower, upper)
+
+
+def latency_trend(
+    conn: sqlite3.Connection,
+    where: Sequence[str] = (),
+    params: Sequence = (),
+    percentile: float = 95,
+) -> list[QueryLatencyPoint]:
+    counts = conn.execute(
+        f"""
+        SELECT day, COUNT(*) FROM query_history {_where(where)}
+        GROUP BY day ORDER BY day
+        """,
+        tuple(params),
+    ).fetchall()
+    return [
+        QueryLatencyPoint(
+            day=day_to_date(day),
+            p95_ms=_percentile_of(conn, ["day = ?", *where], (day, *params), count, percentile),
+        )
+        for day, count in counts
+    ]
+
+
+def latest_latency(conn: sqlite3.Connection, percentile: float = 95) -> QueryLatencyPoint | None:
+    day = conn.execute("SELECT MAX(day) FROM query_history").fetchone()[0]
+    if day is None:
+        return None
+    clauses = ["day = ?"]
+    count = conn.execute(
+        f"SELECT COUNT(*) FROM query_history {_where(clauses)}", (day,)
+    ).fetchone()[0]
+    return QueryLatencyPoint(
+        day=day_to_date(day),
+        p95_ms=_percentile_of(conn, clauses, (day,), count, percentile),
+    )
+
+
+def query_regressions(
+    conn: sqlite3.Connection,
+    where: Sequence[str] = (),
+    params: Sequence = (),
+    threshold_ms: float = 250,
+) -> list[QueryRegression]:
+    latest = conn.execute(
+        f"SELECT MAX(start_ms) FROM query_history {_where(where)}", tuple(params)
+    ).fetchone()[0]
+    if latest is None:
+        return []
+    recent_window = latest - 14 * DAY_MS
+    previous_window = recent_window - 7 * DAY_MS
+    windows = {
+        "previous": ["start_ms >= ?", "start_ms < ?"],
+        "recent": ["start_ms >= ?"],
+    }
+    bounds = {
+        "previous": (previous_window, recent_window),
+        "recent": (recent_window,),
+    }
+    # MIN(id) orders warehouses by first appearance, like the reference dict buckets.
+    stats = conn.execute(
+        f"""
+        SELECT warehouse_name,
+               SUM(start_ms < ?) AS previous_count,
+               SUM(start_ms >= ?) AS recent_count
+        FROM query_history {_where(["start_ms >= ?", *where])}
+        GROUP BY warehouse_name
+        ORDER BY MIN(id)
+        """,
+        (*bounds["recent"], *bounds["recent"], previous_window, *params),
+    ).fetchall()
+    regressions: list[QueryRegression] = []
+    for warehouse, previous_count, recent_count in stats:
+        if not previous_count or not recent_count:
+            continue
+        p95 = {}
+        for name, count in (("previous", previous_count), ("recent", recent_count)):
+            clauses = ["warehouse_name = ?", *windows[name], *where]
+            p95[name] = _percentile_of(
+                conn, clauses, (warehouse, *bounds[name], *params), count, 95
+            )
+        delta = p95["recent"] - p95["previous"]
+        if delta > threshold_ms:
+            regressions.append(
+                QueryRegression(
+                    warehouse_name=warehouse,
+                    p95_prev_ms=p95["previous"],
+                    p95_recent_ms=p95["recent"],
+                    delta_ms=delta,
+                )
+            )
+    return regressions
+
+
+def top_expensive(
+    conn: sqlite3.Connection,
+    where: Sequence[str] = (),
+    params: Sequence = (),
+    limit: int = 10,
+) -> list[QueryCostItem]:
+    # id breaks ties in table order, matching the stable sort of the reference.
+    cursor = conn.execute(
+        f"""
+        SELECT query_id, warehouse_name, total_elapsed_ms, bytes_scanned, user_name, query_text
+        FROM query_history {_where(where)}
+        ORDER BY total_elapsed_ms DESC, id
+        LIMIT ?
+        """,
+        (*params, limit),
+    )
+    return [
+        QueryCostItem(
+            query_id=query_id,
+            warehouse_name=warehouse,
+            total_elapsed_ms=int(elapsed),
+            bytes_scanned=int(scanned),
+            user_name=user,
+            query_text=text,
+        )
+        for query_id, warehouse, elapsed, scanned, user, text in cursor
+    ]
@@ -1,9 +1,25 @@
 from __future__ import annotations
 
-from collections.abc import Iterable
+from array import array
+from bisect import bisect_left, insort
+from collections import deque
+from collections.abc import Callable, Iterable, Mapping, Sequence
 from dataclasses import dataclass
 from datetime import date, datetime, timedelta
-from statistics import median
+
+from app.sketches import DEFAULT_RELATIVE_ACCURACY, QuantileSketch
+from app.timestamps import DAY_MS, day_to_date, epoch_day, to_epoch_ms
+from app.topk import GroupedTopK, TopK
+
+REGRESSION_RECENT_DAYS = 14
+REGRESSION_PREVIOUS_DAYS = 7
+REGRESSION_SPAN_MS = (REGRESSION_RECENT_DAYS + REGRESSION_PREVIOUS_DAYS) * DAY_MS
+REGRESSION_THRESHOLD_MS = 250
+LATENCY_PERCENTILES = (50, 90, 95, 99)
+ANOMALY_WINDOW = 7
+ANOMALY_Z_SCORE = 3.5
+# Elapsed times buffered per day before a sketching aggregator folds them in.
+SKETCH_BUFFER = 4096
 
 
 @dataclass(frozen=True)
@@ -24,6 +40,15 @@ class QueryLatencyPoint:
     p95_ms: float
 
 
+@dataclass(frozen=True)
+class LatencyPercentiles:
+    day: date
+    p50_ms: float
+    p90_ms: float
+    p95_ms: float
+    p99_ms: float
+
+
 @dataclass(frozen=True)
 class QueryRegression:
     warehouse_name: str
@@ -42,6 +67,13 @@ class QueryCostItem:
     query_text: str
 
 
+@dataclass(frozen=True)
+class QueryInsights:
+    latency_trend: list[QueryLatencyPoint]
+    regressions: list[QueryRegression]
+    top_expensive: list[QueryCostItem]
+
+
 @dataclass(frozen=True)
 class Anomaly:
     day: date
@@ -60,7 +92,7 @@ class GovernanceFinding:
 def calculate_daily_credits(rows: Iterable[dict]) -> list[DailyCredits]:
     totals: dict[date, float] = {}
     for row in rows:
-        day = _parse_datetime(row["start_time"]).date()
+        day = _row_day(row)
         totals[day] = totals.get(day, 0.0) + float(row["credits_used"])
     return [DailyCredits(day=day, credits_used=credits) for day, credits in sorted(totals.items())]
 
@@ -77,10 +109,18 @@ def calculate_warehouse_hotspots(rows: Iterable[dict], top_n: int = 5) -> list[W
     ]
 
 
-def calculate_p95_latency_trend(rows: Iterable[dict]) -> list[QueryLatencyPoint]:
+def calculate_p95_latency_trend(
+    rows: Iterable[dict], relative_accuracy: float | None = None
+) -> list[QueryLatencyPoint]:
+    """Daily p95 of ``total_elapsed_ms``; exact, or from sketches if ``relative_accuracy``."""
+    if relative_accuracy is not None:
+        return [
+            QueryLatencyPoint(day=day, p95_ms=sketch_percentile(sketch, 95))
+            for day, sketch in sorted(daily_latency_sketches(rows, relative_accuracy).items())
+        ]
     day_buckets: dict[date, list[int]] = {}
     for row in rows:
-        day = _parse_datetime(row["start_time"]).date()
+        day = _row_day(row)
         day_buckets.setdefault(day, []).append(int(row["total_elapsed_ms"]))
     trend: list[QueryLatencyPoint] = []
     for day, values in sorted(day_buckets.items()):
@@ -88,19 +128,67 @@ def calculate_p95_latency_trend(rows: Iterable[dict]) -> list[QueryLatencyPoint]
     return trend
 
 
-def find_query_regressions(rows: Iterable[dict]) -> list[QueryRegression]:
-    cutoff = _recent_window(rows, days=14)
-    previous_window = cutoff - timedelta(days=7)
+def daily_latency_sketches(
+    rows: Iterable[dict], relative_accuracy: float = DEFAULT_RELATIVE_ACCURACY
+) -> dict[date, QuantileSketch]:
+    """A ``total_elapsed_ms`` sketch per day, to store and merge with later rows' sketches."""
+    sketches: dict[date, QuantileSketch] = {}
+    for row in rows:
+        day = _row_day(row)
+        sketch = sketches.get(day)
+        if sketch is None:
+            sketch = sketches[day] = QuantileSketch(relative_accuracy)
+        sketch.add(int(row["total_elapsed_ms"]))
+    return sketches
+
+
+def latency_percentiles(sketches: Mapping[date, QuantileSketch]) -> list[LatencyPercentiles]:
+    """p50/p90/p95/p99 per day from stored (or merged) daily sketches."""
+    return [
+        LatencyPercentiles(day, *(sketch_percentile(sketch, p) for p in LATENCY_PERCENTILES))
+        for day, sketch in sorted(sketches.items())
+    ]
+
+
+def find_query_regressions(
+    rows: Iterable[dict], relative_accuracy: float | None = None
+) -> list[QueryRegression]:
+    """Warehouses whose p95 rose over the last two weeks; sketched if ``relative_accuracy``."""
+    # Two passes: the window is only known once the latest start time is.
+    if not isinstance(rows, Sequence):
+        rows = list(rows)
+    cutoff = _recent_window(rows, days=REGRESSION_RECENT_DAYS)
+    previous_window = cutoff - REGRESSION_PREVIOUS_DAYS * DAY_MS
     recent_window = cutoff
-    buckets: dict[str, dict[str, list[int]]] = {}
+    buckets: dict[str, dict[str, list[int] | QuantileSketch]] = {}
     for row in rows:
         warehouse = row["warehouse_name"]
-        start_time = _parse_datetime(row["start_time"])
-        window_key = "recent" if start_time >= recent_window else "previous"
-        if start_time < previous_window:
+        start_ms = row_ms(row, "start")
+        window_key = "recent" if start_ms >= recent_window else "previous"
+        if start_ms < previous_window:
             continue
-        buckets.setdefault(warehouse, {"previous": [], "recent": []})
-        buckets[warehouse][window_key].append(int(row["total_elapsed_ms"]))
+        if warehouse not in buckets:
+            buckets[warehouse] = _window_buckets(relative_accuracy)
+        values = buckets[warehouse][window_key]
+        if isinstance(values, QuantileSketch):
+            values.add(int(row["total_elapsed_ms"]))
+        else:
+            values.append(int(row["total_elapsed_ms"]))
+    return _regressions(buckets)
+
+
+def _window_buckets(relative_accuracy: float | None) -> dict[str, list[int] | QuantileSketch]:
+    if relative_accuracy is None:
+        return {"previous": [], "recent": []}
+    return {
+        "previous": QuantileSketch(relative_accuracy),
+        "recent": QuantileSketch(relative_accuracy),
+    }
+
+
+def _regressions(
+    buckets: dict[str, dict[str, list[int] | QuantileSketch]],
+) -> list[QueryRegression]:
     regressions: list[QueryRegression] = []
     for warehouse, values in buckets.items():
         if not values["previous"] or not values["recent"]:
@@ -108,7 +196,7 @@ def find_query_regressions(rows: Iterable[dict]) -> list[QueryRegression]:
         prev_p95 = _percentile(values["previous"], 95)
         recent_p95 = _percentile(values["recent"], 95)
         delta = recent_p95 - prev_p95
-        if delta > 250:
+        if delta > REGRESSION_THRESHOLD_MS:
             regressions.append(
                 QueryRegression(
                     warehouse_name=warehouse,
@@ -120,41 +208,380 @@ def find_query_regressions(rows: Iterable[dict]) -> list[QueryRegression]:
     return regressions
 
 
-def top_expensive_queries(rows: Iterable[dict], limit: int = 10) -> list[QueryCostItem]:
-    sorted_rows = sorted(rows, key=lambda row: int(row["total_elapsed_ms"]), reverse=True)
-    top = sorted_rows[:limit]
-    return [
-        QueryCostItem(
-            query_id=row["query_id"],
-            warehouse_name=row["warehouse_name"],
-            total_elapsed_ms=int(row["total_elapsed_ms"]),
-            bytes_scanned=int(row["bytes_scanned"]),
-            user_name=row["user_name"],
-            query_text=row["query_text"],
+def _elapsed_ms(row: dict) -> int:
+    return int(row["total_elapsed_ms"])
+
+
+def _bytes_scanned(row: dict) -> int:
+    return int(row["bytes_scanned"])
+
+
+def _bytes_per_row(row: dict) -> float:
+    # Queries producing no rows (DDL, empty results) count as one row.
+    return int(row["bytes_scanned"]) / max(int(row.get("rows_produced") or 0), 1)
+
+
+RANKING_KEYS = {
+    "total_elapsed_ms": _elapsed_ms,
+    "bytes_scanned": _bytes_scanned,
+    "bytes_per_row": _bytes_per_row,
+}
+
+
+def ranking_key(rank_by: str) -> Callable[[dict], float]:
+    """The ``RANKING_KEYS`` score function named ``rank_by``; ValueError if unknown."""
+    try:
+        return RANKING_KEYS[rank_by]
+    except KeyError:
+        raise ValueError(
+            f"rank_by must be one of: {', '.join(RANKING_KEYS)}; got {rank_by!r}"
+        ) from None
+
+
+def top_expensive_queries(
+    rows: Iterable[dict], limit: int = 10, rank_by: str = "total_elapsed_ms"
+) -> list[QueryCostItem]:
+    """The ``limit`` highest-ranked queries; ties keep row order, like a stable sort."""
+    top = TopK(limit, ranking_key(rank_by))
+    top.update(rows)
+    return [cost_item(row) for row in top.items()]
+
+
+def top_expensive_queries_by(
+    rows: Iterable[dict],
+    group_by: str = "warehouse_name",
+    limit: int = 10,
+    rank_by: str = "total_elapsed_ms",
+) -> dict[str, list[QueryCostItem]]:
+    """``top_expensive_queries`` per ``group_by`` value (e.g. ``user_name``), in one pass."""
+    top = GroupedTopK(limit, ranking_key(rank_by), lambda row: row[group_by])
+    top.update(rows)
+    return {group: [cost_item(row) for row in items] for group, items in top.items().items()}
+
+
+def cost_item(row: dict) -> QueryCostItem:
+    """A ``query_history`` row as the item listed in top-query results."""
+    return QueryCostItem(
+        query_id=row["query_id"],
+        warehouse_name=row["warehouse_name"],
+        total_elapsed_ms=int(row["total_elapsed_ms"]),
+        bytes_scanned=int(row["bytes_scanned"]),
+        user_name=row["user_name"],
+        query_text=row["query_text"],
+    )
+
+
+class QueryInsightsAggregator:
+    """Latency trend, regressions and top queries from a single pass over query rows.
+
+    Feeding rows to ``add`` (or ``update``) in any order and calling ``result`` gives
+    the same output as ``calculate_p95_latency_trend``, ``find_query_regressions`` and
+    ``top_expensive_queries`` on those rows, so a generator or a cursor works. It keeps
+    every elapsed time per day for the exact p95, ``top_n`` rows, and per warehouse only
+    the days within the regression windows of the latest start time seen so far.
+
+    With ``relative_accuracy`` the per-day times go into ``QuantileSketch``es instead,
+    and the p95s match those functions called with the same accuracy.
+
+    This is for rows already in memory or streamed from elsewhere.
+    ``/api/v1/queries/insights`` does not read rows at all: ``app.aggregates`` computes
+    the same three insights inside SQLite from indexes.
+    """
+
+    def __init__(self, top_n: int = 10, relative_accuracy: float | None = None) -> None:
+        self.top_n = top_n
+        self.relative_accuracy = relative_accuracy
+        # Elapsed times per day; when sketching, a buffer flushed into _sketches.
+        self._days: dict[int, array] = {}
+        self._sketches: dict[int, QuantileSketch] = {}
+        # warehouse -> day -> (start_ms, elapsed, arrival) of rows that may fall in a window
+        self._windows: dict[str, dict[int, tuple[array, array, array]]] = {}
+        self._latest: int | None = None
+        self._top: TopK[dict] = TopK(top_n)
+        self._count = 0
+
+    def add(self, row: dict) -> None:
+        self.update((row,))
+
+    def update(self, rows: Iterable[dict]) -> None:
+        # The per-row work is inlined with local names: this loop runs once per query.
+        days, windows, top = self._days, self._windows, self._top
+        flush_at = SKETCH_BUFFER if self.relative_accuracy is not None else -1
+        latest = self._latest if self._latest is not None else -(2**63)
+        arrival = self._count
+        for row in rows:
+            start_ms = row.get("start_ms")
+            if start_ms is None:
+                start_ms = to_epoch_ms(row["start_time"])
+            elapsed = int(row["total_elapsed_ms"])
+            day = row.get("day")
+            if day is None:
+                day = start_ms // DAY_MS
+            values = days.get(day)
+            if values is None:
+                values = days[day] = array("q")
+            values.append(elapsed)
+            if len(values) == flush_at:
+                self._flush(day)
+
+            if start_ms > latest:
+                if start_ms // DAY_MS > latest // DAY_MS:
+                    self._prune(start_ms - REGRESSION_SPAN_MS)
+                latest = start_ms
+            if start_ms >= latest - REGRESSION_SPAN_MS:
+                by_day = windows.get(row["warehouse_name"])
+                if by_day is None:
+                    by_day = windows[row["warehouse_name"]] = {}
+                window = by_day.get(day)
+                if window is None:
+                    window = by_day[day] = (array("q"), array("q"), array("q"))
+                window[0].append(start_ms)
+                window[1].append(elapsed)
+                window[2].append(arrival)
+            if elapsed > top.floor or len(top) < top.k:
+                top.offer(elapsed, row)
+            arrival += 1
+        if arrival > self._count:
+            self._latest = latest
+            self._count = arrival
+
+    def _flush(self, day: int) -> None:
+        sketch = self._sketches.get(day)
+        if sketch is None:
+            sketch = self._sketches[day] = QuantileSketch(self.relative_accuracy)
+        sketch.update(self._days[day])
+        del self._days[day][:]
+
+    def latency_sketches(self) -> dict[date, QuantileSketch]:
+        """The per-day sketches (only when sketching), e.g. to store and merge later."""
+        if self.relative_accuracy is None:
+            return {}
+        for day in self._days:
+            self._flush(day)
+        return {day_to_date(day): sketch for day, sketch in sorted(self._sketches.items())}
+
+    def _prune(self, threshold: int) -> None:
+        """Drop the days that ended before ``threshold``, the start of the windows."""
+        for by_day in self._windows.values():
+            for day in [day for day in by_day if (day + 1) * DAY_MS <= threshold]:
+                del by_day[day]
+
+    def result(self) -> QueryInsights:
+        if self.relative_accuracy is None:
+            trend = [
+                QueryLatencyPoint(day=day_to_date(day), p95_ms=_percentile(values, 95))
+                for day, values in sorted(self._days.items())
+            ]
+        else:
+            trend = [
+                QueryLatencyPoint(day=day, p95_ms=sketch_percentile(sketch, 95))
+                for day, sketch in self.latency_sketches().items()
+            ]
+        return QueryInsights(
+            latency_trend=trend,
+            regressions=self._regression_result(),
+            top_expensive=[cost_item(row) for row in self._top.items()],
         )
-        for row in top
-    ]
 
-
-def detect_cost_anomalies(daily_credits: list[DailyCredits], window: int = 7) -> list[Anomaly]:
-    anomalies: list[Anomaly] = []
-    for idx in range(window, len(daily_credits)):
-        history = [point.credits_used for point in daily_credits[idx - window : idx]]
-        if not history:
-            continue
-        med = median(history)
-        mad = median([abs(value - med) for value in history]) or 1.0
-        current = daily_credits[idx]
-        z_score = 0.6745 * (current.credits_used - med) / mad
-        if z_score > 3.5:
-            anomalies.append(
+    def _regression_result(self) -> list[QueryRegression]:
+        if self._latest is None:
+            return []
+        cutoff = self._latest - REGRESSION_RECENT_DAYS * DAY_MS
+        previous_window = cutoff - REGRESSION_PREVIOUS_DAYS * DAY_MS
+        # find_query_regressions lists warehouses by their first row inside the windows.
+        firsts: list[tuple[int, str, dict[str, list[int] | QuantileSketch]]] = []
+        for warehouse, by_day in self._windows.items():
+            bucket: dict[str, list[int]] = {"previous": [], "recent": []}
+            first = None
+            for starts, elapsed, arrivals in by_day.values():
+                for start_ms, value, arrival in zip(starts, elapsed, arrivals, strict=True):
+                    if start_ms < previous_window:
+                        continue
+                    if first is None or arrival < first:
+                        first = arrival
+                    bucket["recent" if start_ms >= cutoff else "previous"].append(value)
+            if first is None:
+                continue
+            if self.relative_accuracy is not None:
+                sketched = _window_buckets(self.relative_accuracy)
+                for key, values in bucket.items():
+                    sketched[key].update(values)
+                bucket = sketched
+            firsts.append((first, warehouse, bucket))
+        return _regressions({warehouse: bucket for _, warehouse, bucket in sorted(firsts)})
+
+
+def query_insights(
+    rows: Iterable[dict], top_n: int = 10, relative_accuracy: float | None = None
+) -> QueryInsights:
+    """All three query insights from one pass over ``rows``; see QueryInsightsAggregator."""
+    aggregator = QueryInsightsAggregator(top_n, relative_accuracy)
+    aggregator.update(rows)
+    return aggregator.result()
+
+
+class RollingMedian:
+    """The last ``size`` values with their median and median absolute deviation.
+
+    Values are kept in arrival order and in a list kept sorted with ``bisect``, so a push
+    takes O(log w) comparisons (plus a memmove of at most ``size`` pointers). The MAD is
+    selected from the two sorted runs of deviations on either side of the median, also in
+    O(log w). Both give exactly what ``statistics.median`` does on the same values.
+    """
+
+    def __init__(self, size: int, values: Iterable[float] = ()) -> None:
+        self.size = size
+        self._values: deque[float] = deque()
+        self._sorted: list[float] = []
+        for value in values:
+            self.push(value)
+
+    def __len__(self) -> int:
+        return len(self._values)
+
+    def values(self) -> list[float]:
+        """The window, oldest first."""
+        return list(self._values)
+
+    def push(self, value: float) -> None:
+        if self.size <= 0:
+            return
+        if len(self._values) == self.size:
+            oldest = self._values.popleft()
+            del self._sorted[bisect_left(self._sorted, oldest)]
+        self._values.append(value)
+        insort(self._sorted, value)
+
+    def median(self) -> float:
+        ordered, n = self._sorted, len(self._sorted)
+        if n % 2:
+            return ordered[n // 2]
+        return (ordered[n // 2 - 1] + ordered[n // 2]) / 2
+
+    def mad(self, med: float) -> float:
+        """Median of ``abs(value - med)`` over the window."""
+        n = len(self._sorted)
+        if n % 2:
+            return self._deviation_at(med, n // 2)
+        return (self._deviation_at(med, n // 2 - 1) + self._deviation_at(med, n // 2)) / 2
+
+    def _deviation_at(self, med: float, rank: int) -> float:
+        """The ``rank``-th smallest deviation from ``med``, counting from 0.
+
+        Deviations of the values below ``med`` ascend leftwards from the split, those of
+        the rest rightwards; this binary-searches how many of the ``rank + 1`` smallest
+        come from the left run. ``med - value`` equals ``abs(value - med)`` exactly.
+        """
+        ordered = self._sorted
+        split = bisect_left(ordered, med)
+        left, right = split, len(ordered) - split
+
+        def below(index: int) -> float:
+            return med - ordered[split - 1 - index]
+
+        def above(index: int) -> float:
+            return ordered[split + index] - med
+
+        low, high = max(0, rank + 1 - right), min(rank + 1, left)
+        while True:
+            taken = (low + high) // 2
+            other = rank + 1 - taken
+            if taken < left and other > 0 and above(other - 1) > below(taken):
+                low = taken + 1
+            elif taken > 0 and other < right and below(taken - 1) > above(other):
+                high = taken - 1
+            else:
+                break
+        if not taken:
+            return above(other - 1)
+        if not other:
+            return below(taken - 1)
+        return max(below(taken - 1), above(other - 1))
+
+
+class CostAnomalyDetector:
+    """``detect_cost_anomalies`` as resumable state for one daily credit series.
+
+    ``advance`` scores only points after ``last_day`` against the rolling window of the
+    previous ``window`` days, so after an ingest the state moves forward by the new days
+    instead of rescanning the history. ``to_dict``/``from_dict`` persist it as JSON.
+    """
+
+    def __init__(
+        self,
+        window: int = ANOMALY_WINDOW,
+        values: Iterable[float] = (),
+        last_day: date | None = None,
+        anomalies: Iterable[Anomaly] = (),
+    ) -> None:
+        self.window = window
+        self.last_day = last_day
+        self.anomalies = list(anomalies)
+        self._history = RollingMedian(window, values)
+
+    def advance(self, daily_credits: Iterable[DailyCredits]) -> list[Anomaly]:
+        """Score the points after ``last_day`` (in day order); returns the new anomalies."""
+        found = len(self.anomalies)
+        for point in daily_credits:
+            if self.last_day is None or point.day > self.last_day:
+                self.push(point)
+        return self.anomalies[found:]
+
+    def push(self, point: DailyCredits) -> Anomaly | None:
+        history = self._history
+        anomaly = None
+        if self.window > 0 and len(history) == self.window:
+            med = history.median()
+            mad = history.mad(med) or 1.0
+            z_score = 0.6745 * (point.credits_used - med) / mad
+            if z_score > ANOMALY_Z_SCORE:
+                anomaly = Anomaly(day=point.day, credits_used=point.credits_used, z_score=z_score)
+                self.anomalies.append(anomaly)
+        history.push(point.credits_used)
+        self.last_day = point.day
+        return anomaly
+
+    def to_dict(self) -> dict:
+        return {
+            "window": self.window,
+            "values": self._history.values(),
+            "last_day": self.last_day.isoformat() if self.last_day else None,
+            "anomalies": [
+                {
+                    "day": anomaly.day.isoformat(),
+                    "credits_used": anomaly.credits_used,
+                    "z_score": anomaly.z_score,
+                }
+                for anomaly in self.anomalies
+            ],
+        }
+
+    @classmethod
+    def from_dict(cls, data: dict) -> CostAnomalyDetector:
+        last_day = data["last_day"]
+        return cls(
+            window=data["window"],
+            values=data["values"],
+            last_day=date.fromisoformat(last_day) if last_day else None,
+            anomalies=[
                 Anomaly(
-                    day=current.day,
-                    credits_used=current.credits_used,
-                    z_score=z_score,
+                    day=date.fromisoformat(anomaly["day"]),
+                    credits_used=anomaly["credits_used"],
+                    z_score=anomaly["z_score"],
                 )
-            )
-    return anomalies
+                for anomaly in data["anomalies"]
+            ],
+        )
+
+
+def detect_cost_anomalies(
+    daily_credits: list[DailyCredits], window: int = ANOMALY_WINDOW
+) -> list[Anomaly]:
+    """Days whose credits sit more than 3.5 robust z-scores above the previous ``window``."""
+    detector = CostAnomalyDetector(window)
+    for point in daily_credits:
+        detector.push(point)
+    return detector.anomalies
 
 
 def governance_lint(
@@ -179,9 +606,11 @@ def governance_lint(
                     ),
                 )
             )
-    cutoff = datetime.utcnow() - timedelta(days=30)
+    cutoff = to_epoch_ms(datetime.utcnow() - timedelta(days=30))
     for usage in role_usage:
-        last_used = _parse_datetime(usage["last_used_at"])
+        last_used = usage.get("last_used_ms")
+        if last_used is None:
+            last_used = to_epoch_ms(usage["last_used_at"])
         if last_used < cutoff:
             findings.append(
                 GovernanceFinding(
@@ -210,31 +639,56 @@ def governance_lint(
     return findings
 
 
-def _parse_datetime(value: str | datetime) -> datetime:
-    if isinstance(value, datetime):
-        return value
-    return datetime.fromisoformat(value)
+def row_ms(row: dict, prefix: str) -> int:
+    """``<prefix>_ms`` as stored at ingest, falling back to parsing ``<prefix>_time``."""
+    value = row.get(f"{prefix}_ms")
+    return value if value is not None else to_epoch_ms(row[f"{prefix}_time"])
 
 
-def _percentile(values: list[int], percentile: int) -> float:
-    if not values:
-        return 0.0
-    sorted_values = sorted(values)
-    k = (len(sorted_values) - 1) * percentile / 100
+def _row_day(row: dict) -> date:
+    day = row.get("day")
+    return day_to_date(day if day is not None else epoch_day(row_ms(row, "start")))
+
+
+def percentile_ranks(count: int, percentile: float) -> tuple[float, int, int]:
+    """Fractional rank ``k`` and the floor/ceiling ranks interpolated between."""
+    k = (count - 1) * percentile / 100
     f = int(k)
-    c = min(f + 1, len(sorted_values) - 1)
+    c = min(f + 1, count - 1)
+    return k, f, c
+
+
+def interpolate_percentile(k: float, f: int, c: int, lower: float, upper: float) -> float:
     if f == c:
-        return float(sorted_values[int(k)])
-    d0 = sorted_values[f] * (c - k)
-    d1 = sorted_values[c] * (k - f)
+        return float(lower)
+    d0 = lower * (c - k)
+    d1 = upper * (k - f)
     return float(d0 + d1)
 
 
-def _recent_window(rows: Iterable[dict], days: int) -> datetime:
-    timestamps = [
-        _parse_datetime(row["start_time"]) for row in rows if row.get("start_time")
-    ]
+def sketch_percentile(sketch: QuantileSketch, percentile: float) -> float:
+    """``_percentile`` read from a sketch: the same interpolation, between approximate
+    values, so the result is within the sketch's relative accuracy of the exact one.
+    """
+    if not sketch.count:
+        return 0.0
+    k, f, c = percentile_ranks(sketch.count, percentile)
+    return interpolate_percentile(k, f, c, sketch.value_at_rank(f), sketch.value_at_rank(c))
+
+
+def _percentile(values: list[int] | QuantileSketch, percentile: int) -> float:
+    if isinstance(values, QuantileSketch):
+        return sketch_percentile(values, percentile)
+    if not values:
+        return 0.0
+    sorted_values = sorted(values)
+    k, f, c = percentile_ranks(len(sorted_values), percentile)
+    return interpolate_percentile(k, f, c, sorted_values[f], sorted_values[c])
+
+
+def _recent_window(rows: Iterable[dict], days: int) -> int:
+    timestamps = [row_ms(row, "start") for row in rows if row.get("start_time")]
     if not timestamps:
-        return datetime.utcnow()
+        return to_epoch_ms(datetime.utcnow())
     latest = max(timestamps)
-    return latest - timedelta(days=days)
+    return latest - days * DAY_MS
@@ -0,0 +1,361 @@
+"""Vectorized NumPy versions of the row-by-row functions in ``app.analytics``.
+
+Each public function has the signature of its pure-Python namesake and returns exactly
+the same dataclasses, float for float: sums keep the row order (``bincount``), and
+percentiles, medians and MADs pick and interpolate the same sorted elements. Sketched
+percentiles (a ``relative_accuracy``) are left to ``app.analytics``. The
+``*_columns`` variants work on ``QueryColumns``/``MeteringColumns`` arrays, which can be
+loaded from SQLite without building a dict per row.
+
+NumPy is optional: ``AVAILABLE`` is false without it, and ``select_backend`` then falls
+back to ``app.analytics``.
+"""
+
+from __future__ import annotations
+
+import sys
+from collections.abc import Iterable, Sequence
+from dataclasses import dataclass
+from types import ModuleType
+from typing import Any
+
+from app import analytics
+from app.analytics import (
+    ANOMALY_WINDOW,
+    ANOMALY_Z_SCORE,
+    REGRESSION_PREVIOUS_DAYS,
+    REGRESSION_RECENT_DAYS,
+    REGRESSION_THRESHOLD_MS,
+    Anomaly,
+    DailyCredits,
+    QueryCostItem,
+    QueryLatencyPoint,
+    QueryRegression,
+    WarehouseHotspot,
+    cost_item,
+    ranking_key,
+    row_ms,
+)
+from app.timestamps import DAY_MS, day_to_date, epoch_day, to_epoch_ms
+
+try:
+    import numpy as np
+except ImportError:  # pragma: no cover - exercised only where NumPy is missing
+    np = None
+
+AVAILABLE = np is not None
+BACKENDS = ("auto", "python", "numpy")
+QUERY_FIELDS = ("start_ms", "day", "elapsed_ms", "warehouse")
+METERING_FIELDS = ("day", "warehouse")
+
+
+def select_backend(name: str = "auto") -> ModuleType:
+    """The analytics module for ``name``, one of ``BACKENDS``.
+
+    ``"numpy"`` and ``"auto"`` give this module when NumPy is installed and fall back to
+    ``app.analytics`` otherwise; ``"python"`` always gives ``app.analytics``.
+    """
+    if name not in BACKENDS:
+        raise ValueError(f"analytics backend must be one of: {', '.join(BACKENDS)}; got {name!r}")
+    if name == "python" or not AVAILABLE:
+        return analytics
+    return sys.modules[__name__]
+
+
+@dataclass(frozen=True)
+class QueryColumns:
+    """``query_history`` columns in row order; ``warehouse`` indexes ``warehouse_names``,
+    which lists names in order of first appearance.
+    """
+
+    start_ms: Any
+    day: Any
+    elapsed_ms: Any
+    warehouse: Any
+    warehouse_names: list[str]
+
+
+@dataclass(frozen=True)
+class MeteringColumns:
+    """``warehouse_metering`` columns in row order, coded like ``QueryColumns``; the
+    credits are always loaded.
+    """
+
+    day: Any
+    credits_used: Any
+    warehouse: Any
+    warehouse_names: list[str]
+
+
+def _codes(names: Iterable[str], count: int) -> tuple[Any, list[str]]:
+    seen: dict[str, int] = {}
+    codes = np.fromiter((seen.setdefault(name, len(seen)) for name in names), np.int32, count)
+    return codes, list(seen)
+
+
+def _start_ms_column(rows: Sequence[dict]) -> Any:
+    # Like analytics.row_ms, inlined: building columns is most of a row-based call.
+    return np.fromiter(
+        (
+            ms if (ms := row.get("start_ms")) is not None else to_epoch_ms(row["start_time"])
+            for row in rows
+        ),
+        np.int64,
+        len(rows),
+    )
+
+
+def _day_column(rows: Sequence[dict]) -> Any:
+    return np.fromiter(
+        (
+            day if (day := row.get("day")) is not None else epoch_day(row_ms(row, "start"))
+            for row in rows
+        ),
+        np.int64,
+        len(rows),
+    )
+
+
+def query_columns(rows: Sequence[dict], fields: Iterable[str] = QUERY_FIELDS) -> QueryColumns:
+    """Columns of ``rows``; fields not in ``fields`` are left as ``None``."""
+    fields = set(fields)
+    count = len(rows)
+    warehouse, names = None, []
+    if "warehouse" in fields:
+        warehouse, names = _codes((row["warehouse_name"] for row in rows), count)
+    return QueryColumns(
+        start_ms=_start_ms_column(rows) if "start_ms" in fields else None,
+        day=_day_column(rows) if "day" in fields else None,
+        elapsed_ms=(
+            np.fromiter((int(row["total_elapsed_ms"]) for row in rows), np.int64, count)
+            if "elapsed_ms" in fields
+            else None
+        ),
+        warehouse=warehouse,
+        warehouse_names=names,
+    )
+
+
+def metering_columns(
+    rows: Sequence[dict], fields: Iterable[str] = METERING_FIELDS
+) -> MeteringColumns:
+    """Columns of ``rows``; fields not in ``fields`` are left as ``None``."""
+    fields = set(fields)
+    count = len(rows)
+    warehouse, names = None, []
+    if "warehouse" in fields:
+        warehouse, names = _codes((row["warehouse_name"] for row in rows), count)
+    return MeteringColumns(
+        day=_day_column(rows) if "day" in fields else None,
+        credits_used=np.fromiter((float(row["credits_used"]) for row in rows), np.float64, count),
+        warehouse=warehouse,
+        warehouse_names=names,
+    )
+
+
+def query_columns_from_sqlite(conn) -> QueryColumns:
+    """Load ``query_history`` straight into arrays, in ``id`` order like ``SELECT *``."""
+    (count,) = conn.execute("SELECT COUNT(*) FROM query_history").fetchone()
+    numbers = np.fromiter(
+        conn.execute("SELECT start_ms, day, total_elapsed_ms FROM query_history ORDER BY id"),
+        np.dtype([("start_ms", np.int64), ("day", np.int64), ("elapsed_ms", np.int64)]),
+        count,
+    )
+    names = conn.execute("SELECT warehouse_name FROM query_history ORDER BY id")
+    warehouse, warehouse_names = _codes((name for (name,) in names), count)
+    return QueryColumns(
+        numbers["start_ms"], numbers["day"], numbers["elapsed_ms"], warehouse, warehouse_names
+    )
+
+
+def metering_columns_from_sqlite(conn) -> MeteringColumns:
+    (count,) = conn.execute("SELECT COUNT(*) FROM warehouse_metering").fetchone()
+    numbers = np.fromiter(
+        conn.execute("SELECT day, credits_used FROM warehouse_metering ORDER BY id"),
+        np.dtype([("day", np.int64), ("credits_used", np.float64)]),
+        count,
+    )
+    names = conn.execute("SELECT warehouse_name FROM warehouse_metering ORDER BY id")
+    warehouse, warehouse_names = _codes((name for (name,) in names), count)
+    return MeteringColumns(numbers["day"], numbers["credits_used"], warehouse, warehouse_names)
+
+
+def _rows(rows: Iterable[dict]) -> Sequence[dict]:
+    return rows if isinstance(rows, Sequence) else list(rows)
+
+
+def _sorted_groups(keys: Any, values: Any) -> tuple[Any, Any, Any]:
+    """``values`` sorted by ``(keys, values)``: distinct keys, group starts and sizes.
+
+    Small non-negative integers are packed into one int64 and sorted directly, which is
+    several times faster than the ``lexsort`` fallback.
+    """
+    low = int(keys.min())
+    span = int(keys.max()) - low
+    if values.min() >= 0 and values.max() < 2**32 and span < 2**30:
+        packed = np.sort(((keys - low).astype(np.int64) << 32) | values.astype(np.int64))
+        ordered_keys = (packed >> 32) + low
+        ordered = packed & 0xFFFFFFFF
+    else:
+        order = np.lexsort((values, keys))
+        ordered_keys, ordered = keys[order], values[order]
+    starts = np.flatnonzero(np.r_[True, ordered_keys[1:] != ordered_keys[:-1]])
+    sizes = np.diff(np.r_[starts, len(ordered)])
+    return ordered_keys[starts], ordered, (starts, sizes)
+
+
+def _group_percentiles(ordered: Any, groups: tuple[Any, Any], percentile: int) -> Any:
+    """``analytics._percentile`` of every group of the sorted ``ordered`` at once."""
+    starts, sizes = groups
+    k = (sizes - 1) * percentile / 100
+    f = k.astype(np.int64)
+    c = np.minimum(f + 1, sizes - 1)
+    lower = ordered[starts + f]
+    upper = ordered[starts + c]
+    return np.where(f == c, lower, lower * (c - k) + upper * (k - f))
+
+
+def calculate_daily_credits(rows: Iterable[dict]) -> list[DailyCredits]:
+    return daily_credits_columns(metering_columns(_rows(rows), ("day",)))
+
+
+def daily_credits_columns(columns: MeteringColumns) -> list[DailyCredits]:
+    if not len(columns.day):
+        return []
+    days, index = np.unique(columns.day, return_inverse=True)
+    # bincount adds weights in row order, so each total equals the running Python sum.
+    totals = np.bincount(index, weights=columns.credits_used)
+    return [
+        DailyCredits(day=day_to_date(int(day)), credits_used=float(total))
+        for day, total in zip(days, totals, strict=True)
+    ]
+
+
+def calculate_warehouse_hotspots(rows: Iterable[dict], top_n: int = 5) -> list[WarehouseHotspot]:
+    return warehouse_hotspots_columns(metering_columns(_rows(rows), ("warehouse",)), top_n)
+
+
+def warehouse_hotspots_columns(columns: MeteringColumns, top_n: int = 5) -> list[WarehouseHotspot]:
+    totals = np.bincount(
+        columns.warehouse, weights=columns.credits_used, minlength=len(columns.warehouse_names)
+    )
+    # Codes follow first appearance, so a stable sort breaks ties like the reference.
+    order = np.argsort(-totals, kind="stable")[:top_n]
+    names = columns.warehouse_names
+    return [
+        WarehouseHotspot(warehouse_name=names[code], credits_used=float(totals[code]))
+        for code in order.tolist()
+    ]
+
+
+def calculate_p95_latency_trend(
+    rows: Iterable[dict], relative_accuracy: float | None = None
+) -> list[QueryLatencyPoint]:
+    if relative_accuracy is not None:
+        return analytics.calculate_p95_latency_trend(rows, relative_accuracy)
+    return latency_trend_columns(query_columns(_rows(rows), ("day", "elapsed_ms")))
+
+
+def latency_trend_columns(columns: QueryColumns, percentile: int = 95) -> list[QueryLatencyPoint]:
+    if not len(columns.day):
+        return []
+    days, ordered, groups = _sorted_groups(columns.day, columns.elapsed_ms)
+    values = _group_percentiles(ordered, groups, percentile)
+    return [
+        QueryLatencyPoint(day=day_to_date(int(day)), p95_ms=float(value))
+        for day, value in zip(days, values, strict=True)
+    ]
+
+
+def find_query_regressions(
+    rows: Iterable[dict], relative_accuracy: float | None = None
+) -> list[QueryRegression]:
+    if relative_accuracy is not None:
+        return analytics.find_query_regressions(rows, relative_accuracy)
+    rows = _rows(rows)
+    return query_regressions_columns(query_columns(rows, ("start_ms", "elapsed_ms", "warehouse")))
+
+
+def query_regressions_columns(columns: QueryColumns) -> list[QueryRegression]:
+    if not len(columns.start_ms):
+        return []
+    cutoff = int(columns.start_ms.max()) - REGRESSION_RECENT_DAYS * DAY_MS
+    previous_window = cutoff - REGRESSION_PREVIOUS_DAYS * DAY_MS
+    inside = columns.start_ms >= previous_window
+    warehouse = columns.warehouse[inside]
+    recent = columns.start_ms[inside] >= cutoff
+    # One group per (warehouse, window): 2 * code for previous, 2 * code + 1 for recent.
+    keys, ordered, groups = _sorted_groups(
+        warehouse.astype(np.int64) * 2 + recent, columns.elapsed_ms[inside]
+    )
+    p95 = dict(zip(keys.tolist(), _group_percentiles(ordered, groups, 95).tolist(), strict=True))
+    # The reference lists warehouses by their first row inside the windows.
+    codes, firsts = np.unique(warehouse, return_index=True)
+    regressions: list[QueryRegression] = []
+    for code in codes[np.argsort(firsts)].tolist():
+        previous, latest = p95.get(2 * code), p95.get(2 * code + 1)
+        if previous is None or latest is None:
+            continue
+        delta = latest - previous
+        if delta > REGRESSION_THRESHOLD_MS:
+            regressions.append(
+                QueryRegression(
+                    warehouse_name=columns.warehouse_names[code],
+                    p95_prev_ms=previous,
+                    p95_recent_ms=latest,
+                    delta_ms=delta,
+                )
+            )
+    return regressions
+
+
+def top_expensive_queries(
+    rows: Iterable[dict], limit: int = 10, rank_by: str = "total_elapsed_ms"
+) -> list[QueryCostItem]:
+    rows = _rows(rows)
+    key = ranking_key(rank_by)
+    dtype = np.float64 if rank_by == "bytes_per_row" else np.int64
+    scores = np.fromiter((key(row) for row in rows), dtype, len(rows))
+    return [cost_item(rows[index]) for index in top_indices(scores, limit)]
+
+
+def top_indices(scores: Any, limit: int) -> list[int]:
+    """Indices of the ``limit`` highest scores, earlier rows first among equal scores."""
+    count = len(scores)
+    limit = min(limit, count)
+    if limit <= 0:
+        return []
+    threshold = np.partition(scores, count - limit)[count - limit]
+    above = np.flatnonzero(scores > threshold)
+    tied = np.flatnonzero(scores == threshold)[: limit - len(above)]
+    chosen = np.concatenate((above, tied))
+    return chosen[np.lexsort((chosen, -scores[chosen]))].tolist()
+
+
+def detect_cost_anomalies(
+    daily_credits: list[DailyCredits], window: int = ANOMALY_WINDOW
+) -> list[Anomaly]:
+    if window <= 0 or len(daily_credits) <= window:
+        return []
+    values = np.fromiter((point.credits_used for point in daily_credits), np.float64)
+    history = np.sort(np.lib.stride_tricks.sliding_window_view(values[:-1], window), axis=1)
+    med = _sorted_median(history)
+    mad = _sorted_median(np.sort(np.abs(history - med[:, None]), axis=1))
+    mad[mad == 0] = 1.0
+    z_scores = 0.6745 * (values[window:] - med) / mad
+    return [
+        Anomaly(
+            day=daily_credits[window + offset].day,
+            credits_used=daily_credits[window + offset].credits_used,
+            z_score=float(z_scores[offset]),
+        )
+        for offset in np.flatnonzero(z_scores > ANOMALY_Z_SCORE).tolist()
+    ]
+
+
+def _sorted_median(rows: Any) -> Any:
+    """``statistics.median`` of every row of an array sorted along its rows."""
+    middle = rows.shape[1] // 2
+    if rows.shape[1] % 2:
+        return rows[:, middle].copy()
+    return (rows[:, middle - 1] + rows[:, middle]) / 2
@@ -0,0 +1,118 @@
+"""Persisted cost anomaly detector state, advanced by each ingest.
+
+``advance_cost_anomalies`` runs in the ingest's final transaction. It moves the stored
+``CostAnomalyDetector`` forward over the days completed since the previous run, so the
+anomaly endpoints only have to score the newest day instead of the whole history. The
+daily totals the state was built from are stored with it and compared at each ingest,
+since an upsert can correct a row of a scored day in place without a new row id.
+"""
+
+from __future__ import annotations
+
+import json
+import sqlite3
+
+from app import aggregates
+from app.analytics import ANOMALY_WINDOW, Anomaly, CostAnomalyDetector, DailyCredits
+from app.timestamps import date_to_day
+
+# Account-wide daily credits, the series served by /api/v1/anomalies.
+TOTAL_SERIES = "total"
+
+ANOMALY_STATE_DDL = """
+CREATE TABLE IF NOT EXISTS anomaly_state (
+    series TEXT PRIMARY KEY,
+    max_id INTEGER,
+    state TEXT
+)
+"""
+
+
+def _stored_detector(
+    connection: sqlite3.Connection | sqlite3.Cursor,
+    series: str,
+    daily_credits: list[DailyCredits] | None = None,
+) -> CostAnomalyDetector:
+    """The stored detector if it still describes ``warehouse_metering``, else a new one.
+
+    Rows past the stored ``max_id`` on or before its ``last_day`` mean a late export
+    changed days already scored, so the state is discarded and rebuilt from scratch; so
+    is state stored with a different window. Given the current ``daily_credits``, the
+    state is also discarded unless the totals it scored are unchanged.
+    """
+    exists = connection.execute(
+        "SELECT 1 FROM sqlite_master WHERE type='table' AND name='anomaly_state'"
+    ).fetchone()
+    if not exists:
+        return CostAnomalyDetector()
+    stored = connection.execute(
+        "SELECT max_id, state FROM anomaly_state WHERE series = ?", (series,)
+    ).fetchone()
+    if stored is None:
+        return CostAnomalyDetector()
+    max_id, state = stored
+    data = json.loads(state)
+    detector = CostAnomalyDetector.from_dict(data)
+    if detector.window != ANOMALY_WINDOW:
+        return CostAnomalyDetector()
+    if daily_credits is not None and detector.last_day is not None:
+        if data.get("daily_totals") != _scored_totals(daily_credits, detector):
+            return CostAnomalyDetector()
+    (first_new_day,) = connection.execute(
+        "SELECT MIN(day) FROM warehouse_metering WHERE id > ?", (max_id,)
+    ).fetchone()
+    if detector.last_day is not None and first_new_day is not None:
+        if first_new_day <= date_to_day(detector.last_day):
+            return CostAnomalyDetector()
+    return detector
+
+
+def _scored_totals(daily_credits: list[DailyCredits], detector: CostAnomalyDetector) -> list[list]:
+    """``[epoch day, credits]`` of the days ``detector`` has scored, as stored in JSON."""
+    last_day = detector.last_day
+    return [
+        [date_to_day(point.day), point.credits_used]
+        for point in daily_credits
+        if last_day is not None and point.day <= last_day
+    ]
+
+
+def _unscored_days(
+    connection: sqlite3.Connection | sqlite3.Cursor, detector: CostAnomalyDetector
+) -> list[DailyCredits]:
+    if detector.last_day is None:
+        return aggregates.daily_credits(connection)
+    return aggregates.daily_credits(connection, date_to_day(detector.last_day) + 1)
+
+
+def cost_anomalies(connection: sqlite3.Connection) -> list[Anomaly]:
+    """All anomalies in the daily credit totals; equals ``detect_cost_anomalies``."""
+    detector = _stored_detector(connection, TOTAL_SERIES)
+    detector.advance(_unscored_days(connection, detector))
+    return detector.anomalies
+
+
+def advance_cost_anomalies(cursor: sqlite3.Cursor, rebuilt: bool) -> None:
+    """Store the detector advanced over every complete day of ``warehouse_metering``.
+
+    The latest day may still be partial and is left for readers to score. ``rebuilt``
+    discards the state, as a reloaded table may differ anywhere and reuses row ids. The
+    daily totals come from the covering ``(day, credits_used)`` index, so checking every
+    scored day costs an index scan rather than a rescore of the history.
+    """
+    cursor.execute(ANOMALY_STATE_DDL)
+    daily = aggregates.daily_credits(cursor)
+    if rebuilt:
+        detector = CostAnomalyDetector()
+    else:
+        detector = _stored_detector(cursor, TOTAL_SERIES, daily)
+    detector.advance(daily[:-1])
+    state = {**detector.to_dict(), "daily_totals": _scored_totals(daily, detector)}
+    (max_id,) = cursor.execute("SELECT COALESCE(MAX(id), 0) FROM warehouse_metering").fetchone()
+    cursor.execute(
+        """
+        INSERT INTO anomaly_state (series, max_id, state) VALUES (?, ?, ?)
+        ON CONFLICT (series) DO UPDATE SET max_id = excluded.max_id, state = excluded.state
+        """,
+        (TOTAL_SERIES, max_id, json.dumps(state)),
+    )
@@ -0,0 +1,150 @@
+from __future__ import annotations
+
+import os
+import sqlite3
+import threading
+from collections import OrderedDict
+from collections.abc import Callable, Hashable
+from typing import TypeVar
+
+T = TypeVar("T")
+
+DEFAULT_MAX_ENTRIES = 256
+DEFAULT_BODY_CACHE_BYTES = 32 * 1024 * 1024
+
+# The generation lives in the database rather than in this process, so an ingest run
+# from the CLI or another server process invalidates cached results and ETags too.
+DATA_GENERATION_DDL = """
+CREATE TABLE IF NOT EXISTS data_generation (
+    id INTEGER PRIMARY KEY CHECK (id = 1),
+    generation INTEGER NOT NULL
+)
+"""
+
+
+def data_generation(connection: sqlite3.Connection | sqlite3.Cursor) -> int:
+    """The generation of the data ``connection`` sees; 0 before the first ingest."""
+    try:
+        row = connection.execute("SELECT generation FROM data_generation").fetchone()
+    except sqlite3.OperationalError:
+        return 0
+    return row[0] if row else 0
+
+
+def bump_generation(cursor: sqlite3.Cursor) -> int:
+    """Invalidate every cached result computed from the previous data load.
+
+    Runs inside the load's final transaction, so readers see the new generation
+    exactly when they see the new data.
+    """
+    cursor.execute(DATA_GENERATION_DDL)
+    cursor.execute(
+        """
+        INSERT INTO data_generation (id, generation) VALUES (1, 1)
+        ON CONFLICT (id) DO UPDATE SET generation = generation + 1
+        """
+    )
+    return data_generation(cursor)
+
+
+class ResponseCache:
+    """Thread-safe LRU cache for computed endpoint results."""
+
+    def __init__(self, max_entries: int = DEFAULT_MAX_ENTRIES) -> None:
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._entries: OrderedDict[Hashable, object] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get_or_compute(self, key: Hashable, compute: Callable[[], T]) -> T:
+        with self._lock:
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return self._entries[key]  # type: ignore[return-value]
+            self.misses += 1
+        value = compute()
+        with self._lock:
+            self._entries[key] = value
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return value
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self.hits = 0
+            self.misses = 0
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "entries": len(self._entries),
+                "max_entries": self.max_entries,
+            }
+
+
+class BodyCache:
+    """Thread-safe LRU cache for encoded response bodies, bounded by their total bytes.
+
+    Kept apart from ``ResponseCache`` so large bodies neither count as single entries
+    there nor evict the computed results.
+    """
+
+    def __init__(self, max_bytes: int = DEFAULT_BODY_CACHE_BYTES) -> None:
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self._bytes = 0
+        self._entries: OrderedDict[Hashable, bytes] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get_or_compute(self, key: Hashable, compute: Callable[[], bytes]) -> bytes:
+        with self._lock:
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return self._entries[key]
+            self.misses += 1
+        value = compute()
+        if len(value) > self.max_bytes:
+            return value
+        with self._lock:
+            previous = self._entries.pop(key, None)
+            if previous is not None:
+                self._bytes -= len(previous)
+            self._entries[key] = value
+            self._bytes += len(value)
+            while self._bytes > self.max_bytes:
+                _, evicted = self._entries.popitem(last=False)
+                self._bytes -= len(evicted)
+        return value
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+            self.hits = 0
+            self.misses = 0
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "entries": len(self._entries),
+                "bytes": self._bytes,
+                "max_bytes": self.max_bytes,
+            }
+
+
+response_cache = ResponseCache(
+    max_entries=int(os.getenv("FROSTSIGHT_CACHE_ENTRIES", DEFAULT_MAX_ENTRIES))
+)
+body_cache = BodyCache(
+    max_bytes=int(os.getenv("FROSTSIGHT_BODY_CACHE_BYTES", DEFAULT_BODY_CACHE_BYTES))
+)
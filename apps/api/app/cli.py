@@ -1,8 +1,11 @@
 from __future__ import annotations
 
 import argparse
+import json
 
+from app.db import get_connection
 from app.ingest import ingest_demo_data
+from app.ingest_runs import recent_runs
 from app.snowflake import SnowflakeClient, SnowflakeNotConfiguredError, load_snowflake_config
 
 
@@ -10,14 +13,45 @@ def main() -> None:
     parser = argparse.ArgumentParser(description="FrostSight CLI")
     subparsers = parser.add_subparsers(dest="command", required=True)
 
-    subparsers.add_parser("ingest-demo", help="Load demo CSVs into SQLite")
+    ingest_parser = subparsers.add_parser("ingest-demo", help="Load demo CSVs into SQLite")
+    ingest_parser.add_argument(
+        "--bulk",
+        action="store_true",
+        help="Relax durability and commit per table while loading",
+    )
+    ingest_parser.add_argument(
+        "--incremental",
+        action="store_true",
+        help="Append only rows newer than the last ingest instead of rebuilding",
+    )
+    ingest_parser.add_argument(
+        "--workers",
+        type=int,
+        default=1,
+        help="Processes parsing CSVs in parallel; SQLite writes stay in one process",
+    )
+    ingest_parser.add_argument(
+        "--history",
+        type=int,
+        metavar="N",
+        help="Print the last N ingest runs instead of ingesting",
+    )
     subparsers.add_parser("sync-snowflake", help="Sync data from Snowflake (optional)")
 
     args = parser.parse_args()
 
-    if args.command == "ingest-demo":
-        ingest_demo_data()
+    if args.command == "ingest-demo" and args.history is not None:
+        connection = get_connection()
+        try:
+            print(json.dumps(recent_runs(connection, args.history), indent=2))
+        finally:
+            connection.close()
+    elif args.command == "ingest-demo":
+        run = ingest_demo_data(
+            bulk_load=args.bulk, incremental=args.incremental, workers=args.workers
+        )
         print("Demo data ingested.")
+        print(json.dumps(run.as_dict(), indent=2))
     elif args.command == "sync-snowflake":
         try:
             config = load_snowflake_config()
@@ -0,0 +1,48 @@
+"""Content negotiation and zlib-based encoders for HTTP response bodies."""
+
+from __future__ import annotations
+
+import zlib
+
+# Preference order when the client weights several encodings equally.
+SUPPORTED_ENCODINGS = ("gzip", "deflate")
+COMPRESSION_LEVEL = 6
+
+_WBITS = {"gzip": 16 + zlib.MAX_WBITS, "deflate": zlib.MAX_WBITS}
+
+
+def negotiate_encoding(accept_encoding: str | None) -> str | None:
+    """Pick the best supported encoding from an ``Accept-Encoding`` header, if any."""
+    if not accept_encoding:
+        return None
+    weights: dict[str, float] = {}
+    for item in accept_encoding.split(","):
+        name, _, params = item.strip().partition(";")
+        quality = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                quality = float(params[2:])
+            except ValueError:
+                quality = 0.0
+        weights[name.strip().lower()] = quality
+    best: str | None = None
+    best_quality = 0.0
+    for encoding in SUPPORTED_ENCODINGS:
+        quality = weights.get(encoding, weights.get("*", 0.0))
+        if quality > best_quality:
+            best, best_quality = encoding, quality
+    return best
+
+
+def compressor(encoding: str):
+    return zlib.compressobj(COMPRESSION_LEVEL, zlib.DEFLATED, _WBITS[encoding])
+
+
+def compress(data: bytes, encoding: str) -> bytes:
+    encoder = compressor(encoding)
+    return encoder.compress(data) + encoder.flush()
+
+
+def decompress(data: bytes, encoding: str) -> bytes:
+    return zlib.decompress(data, _WBITS[encoding])
@@ -1,19 +1,128 @@
 from __future__ import annotations
 
 import os
+import queue
 import sqlite3
+import threading
+from collections.abc import Iterator
+from contextlib import contextmanager
 from pathlib import Path
 
 DEFAULT_DB_PATH = Path("data/demo/frostsight_demo.db")
+DEFAULT_POOL_SIZE = 8
+
+# Applied once when a pooled connection is opened; values are per connection in SQLite.
+CONNECTION_PRAGMAS = {
+    "cache_size": -32768,  # KiB, i.e. 32 MiB of page cache
+    "mmap_size": 268435456,
+    "temp_store": "MEMORY",
+}
 
 
 def get_db_path() -> Path:
     return Path(os.getenv("FROSTSIGHT_DB_PATH", DEFAULT_DB_PATH))
 
 
-def get_connection() -> sqlite3.Connection:
-    path = get_db_path()
+def _open(path: Path, **kwargs) -> sqlite3.Connection:
     path.parent.mkdir(parents=True, exist_ok=True)
-    connection = sqlite3.connect(path)
+    connection = sqlite3.connect(path, timeout=30, **kwargs)
     connection.row_factory = sqlite3.Row
+    # WAL lets readers keep a consistent snapshot while ingest writes.
+    connection.execute("PRAGMA journal_mode=WAL")
     return connection
+
+
+def get_connection() -> sqlite3.Connection:
+    return _open(get_db_path())
+
+
+class ConnectionPool:
+    """Checkout/return pool of SQLite connections to one database file."""
+
+    def __init__(self, path: Path, size: int = DEFAULT_POOL_SIZE) -> None:
+        self.path = path
+        self.size = size
+        self._idle: queue.LifoQueue[sqlite3.Connection] = queue.LifoQueue()
+        self._lock = threading.Lock()
+        self._opened = 0
+        self._closed = False
+
+    def acquire(self, timeout: float | None = 30.0) -> sqlite3.Connection:
+        try:
+            return self._idle.get_nowait()
+        except queue.Empty:
+            pass
+        with self._lock:
+            if self._opened < self.size:
+                self._opened += 1
+                try:
+                    return self._connect()
+                except Exception:
+                    self._opened -= 1
+                    raise
+        try:
+            return self._idle.get(timeout=timeout)
+        except queue.Empty as exc:
+            raise TimeoutError(f"No free connection to {self.path} in pool") from exc
+
+    def release(self, connection: sqlite3.Connection) -> None:
+        if connection.in_transaction:
+            connection.rollback()
+        if self._closed:
+            connection.close()
+            return
+        self._idle.put(connection)
+
+    @contextmanager
+    def connection(self) -> Iterator[sqlite3.Connection]:
+        connection = self.acquire()
+        try:
+            yield connection
+        finally:
+            self.release(connection)
+
+    def close(self) -> None:
+        self._closed = True
+        while True:
+            try:
+                self._idle.get_nowait().close()
+            except queue.Empty:
+                return
+
+    def _connect(self) -> sqlite3.Connection:
+        connection = _open(self.path, check_same_thread=False, isolation_level=None)
+        for name, value in CONNECTION_PRAGMAS.items():
+            connection.execute(f"PRAGMA {name}={value}")
+        return connection
+
+
+_pools: dict[Path, ConnectionPool] = {}
+_pools_lock = threading.Lock()
+
+
+def get_pool() -> ConnectionPool:
+    path = get_db_path().resolve()
+    with _pools_lock:
+        pool = _pools.get(path)
+        if pool is None:
+            size = int(os.getenv("FROSTSIGHT_DB_POOL_SIZE", DEFAULT_POOL_SIZE))
+            pool = _pools[path] = ConnectionPool(path, size=size)
+        return pool
+
+
+def close_pools() -> None:
+    with _pools_lock:
+        for pool in _pools.values():
+            pool.close()
+        _pools.clear()
+
+
+@contextmanager
+def read_transaction() -> Iterator[sqlite3.Connection]:
+    """Run every read of a request against one snapshot of the database."""
+    with get_pool().connection() as connection:
+        connection.execute("BEGIN")
+        try:
+            yield connection
+        finally:
+            connection.rollback()
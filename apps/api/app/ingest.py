@@ -1,11 +1,33 @@
 from __future__ import annotations
 
+import bz2
 import csv
+import gzip
+import hashlib
+import io
+import lzma
+import sqlite3
+import threading
+import time
+from collections import deque
+from collections.abc import Callable, Iterable, Iterator
+from concurrent.futures import Executor, Future, ProcessPoolExecutor
+from contextlib import contextmanager, nullcontext
+from dataclasses import dataclass
 from datetime import datetime
+from itertools import islice
 from pathlib import Path
+from typing import BinaryIO
 
-from app.db import get_connection
+from app.anomaly_state import advance_cost_anomalies
+from app.bloom import BloomFilter
+from app.cache import bump_generation
+from app.db import get_connection, get_db_path
+from app.ingest_runs import IngestRun, TableRun, create_ingest_runs, record_run
+from app.timestamps import DAY_MS, epoch_ms_sql, to_epoch_ms
 
+# The *_ms and day columns are generated from the ISO text by SQLite on insert, so every
+# load path (CSV, incremental, benchmarks) stores them without parsing in Python.
 TABLES = {
     "warehouses": (
         """
@@ -22,22 +44,29 @@ TABLES = {
         """,
     ),
     "warehouse_metering": (
-        """
+        f"""
         CREATE TABLE IF NOT EXISTS warehouse_metering (
             id INTEGER PRIMARY KEY AUTOINCREMENT,
             warehouse_name TEXT,
             start_time TEXT,
             end_time TEXT,
-            credits_used REAL
+            credits_used REAL,
+            start_ms INTEGER GENERATED ALWAYS AS ({epoch_ms_sql("start_time")}) STORED,
+            end_ms INTEGER GENERATED ALWAYS AS ({epoch_ms_sql("end_time")}) STORED,
+            day INTEGER GENERATED ALWAYS AS (start_ms / {DAY_MS}) STORED,
+            UNIQUE (warehouse_name, start_time)
         )
         """,
         """
         INSERT INTO warehouse_metering (warehouse_name, start_time, end_time, credits_used)
         VALUES (:warehouse_name, :start_time, :end_time, :credits_used)
+        ON CONFLICT (warehouse_name, start_time) DO UPDATE SET
+            end_time = excluded.end_time,
+            credits_used = excluded.credits_used
         """,
     ),
     "query_history": (
-        """
+        f"""
         CREATE TABLE IF NOT EXISTS query_history (
             id INTEGER PRIMARY KEY AUTOINCREMENT,
             query_id TEXT,
@@ -49,7 +78,11 @@ TABLES = {
             total_elapsed_ms INTEGER,
             bytes_scanned INTEGER,
             rows_produced INTEGER,
-            query_text TEXT
+            query_text TEXT,
+            start_ms INTEGER GENERATED ALWAYS AS ({epoch_ms_sql("start_time")}) STORED,
+            end_ms INTEGER GENERATED ALWAYS AS ({epoch_ms_sql("end_time")}) STORED,
+            day INTEGER GENERATED ALWAYS AS (start_ms / {DAY_MS}) STORED,
+            UNIQUE (query_id)
         )
         """,
         """
@@ -63,6 +96,16 @@ TABLES = {
             :start_time, :end_time, :total_elapsed_ms, :bytes_scanned,
             :rows_produced, :query_text
         )
+        ON CONFLICT (query_id) DO UPDATE SET
+            warehouse_name = excluded.warehouse_name,
+            user_name = excluded.user_name,
+            role_name = excluded.role_name,
+            start_time = excluded.start_time,
+            end_time = excluded.end_time,
+            total_elapsed_ms = excluded.total_elapsed_ms,
+            bytes_scanned = excluded.bytes_scanned,
+            rows_produced = excluded.rows_produced,
+            query_text = excluded.query_text
         """,
     ),
     "role_grants": (
@@ -82,11 +125,12 @@ TABLES = {
         """,
     ),
     "role_usage": (
-        """
+        f"""
         CREATE TABLE IF NOT EXISTS role_usage (
             id INTEGER PRIMARY KEY AUTOINCREMENT,
             role_name TEXT,
-            last_used_at TEXT
+            last_used_at TEXT,
+            last_used_ms INTEGER GENERATED ALWAYS AS ({epoch_ms_sql("last_used_at")}) STORED
         )
         """,
         """
@@ -111,6 +155,88 @@ TABLES = {
     ),
 }
 
+BATCH_SIZE = 5000
+# Size of the file pieces handed to worker processes by a parallel ingest.
+CHUNK_BYTES = 4 * 1024 * 1024
+
+# Ingests share the shadow table names, so only one runs at a time per database: the
+# thread lock orders ingests within a process, and _ingest_lock holds a file lock
+# across processes (e.g. the CLI next to the server's ingest jobs).
+_thread_lock = threading.Lock()
+INGEST_LOCK_SUFFIX = ".ingest-lock"
+# Seconds an ingest waits for another process's ingest to finish.
+INGEST_LOCK_TIMEOUT = 600.0
+
+# Per-connection settings used while bulk loading; restored once the load finishes.
+BULK_LOAD_PRAGMAS = {
+    "synchronous": "OFF",
+    "cache_size": -262144,  # KiB, i.e. 256 MiB
+    "temp_store": "MEMORY",
+}
+
+# Secondary indexes per table, built once a table's rows are loaded. Time ranges use the
+# integer start_ms column rather than the ISO text.
+INDEXES: dict[str, list[tuple[str, str]]] = {
+    "warehouse_metering": [
+        ("idx_warehouse_metering_start_ms", "start_ms"),
+        # Covers the daily credit totals.
+        ("idx_warehouse_metering_day_credits", "day, credits_used"),
+    ],
+    "query_history": [
+        ("idx_query_history_start_ms", "start_ms"),
+        ("idx_query_history_warehouse_start", "warehouse_name, start_ms"),
+        ("idx_query_history_user_start", "user_name, start_ms"),
+        ("idx_query_history_role_start", "role_name, start_ms"),
+        # Per-day percentiles walk this index instead of sorting each day's rows.
+        ("idx_query_history_day_elapsed", "day, total_elapsed_ms"),
+        ("idx_query_history_elapsed", "total_elapsed_ms"),
+        # query_id is indexed by its UNIQUE constraint.
+    ],
+    "role_grants": [("idx_role_grants_role", "role_name")],
+    "role_usage": [("idx_role_usage_role", "role_name")],
+    "object_access": [("idx_object_access_role", "role_name")],
+}
+# Rows sampled per index by ANALYZE; enough for the planner, cheap on large tables.
+ANALYZE_LIMIT = 1000
+
+# Append-only tables that incremental ingest extends past a high-water mark. The other
+# tables are small snapshots and are always reloaded in full.
+WATERMARK_COLUMNS = {
+    "warehouse_metering": "start_time",
+    "query_history": "start_time",
+}
+# UNIQUE natural keys of the append-only tables; loads upsert on them.
+NATURAL_KEYS = {
+    "warehouse_metering": ("warehouse_name", "start_time"),
+    "query_history": ("query_id",),
+}
+# Overlapping rows checked per Bloom filter pass and batched key lookup.
+KEY_LOOKUP_BATCH = 500
+# Bound parameters per statement allowed by SQLite builds before 3.32 (999 by default).
+MAX_SQL_VARIABLES = 999
+SHADOW_SUFFIX = "__shadow"
+
+# Bytes just before the recorded offset that must be unchanged for a file to be resumed.
+FINGERPRINT_BYTES = 4096
+
+# File names tried for each dataset, in order. Compressed exports are recognised by their
+# leading bytes and decompressed while they are read, never to disk.
+EXPORT_SUFFIXES = (".csv", ".csv.gz", ".csv.bz2", ".csv.xz")
+COMPRESSED_OPENERS: dict[bytes, Callable[[Path], BinaryIO]] = {
+    b"\x1f\x8b": gzip.open,
+    b"BZh": bz2.open,
+    b"\xfd7zXZ\x00": lzma.open,
+}
+
+WATERMARKS_DDL = """
+CREATE TABLE IF NOT EXISTS ingest_watermarks (
+    table_name TEXT PRIMARY KEY,
+    high_water TEXT,
+    file_offset INTEGER,
+    fingerprint TEXT
+)
+"""
+
 TYPE_CASTS = {
     "warehouses": {"credit_per_hour": float},
     "warehouse_metering": {
@@ -137,26 +263,564 @@ def _apply_casts(dataset: str, row: dict[str, str]) -> dict:
     return converted
 
 
-def ingest_csvs(data_dir: Path) -> None:
-    connection = get_connection()
+def _cast_batches(
+    dataset: str, rows: Iterable[dict[str, str]], batch_size: int, stats: TableRun
+) -> Iterator[list[dict]]:
+    """Yield cast rows in lists of at most ``batch_size`` so memory stays flat."""
+    iterator = iter(rows)
+    while True:
+        with stats.timing("parse"):
+            raw = list(islice(iterator, batch_size))
+        if not raw:
+            return
+        with stats.timing("cast"):
+            batch = [_apply_casts(dataset, row) for row in raw]
+        yield batch
+
+
+@dataclass(frozen=True)
+class Watermark:
+    high_water: str | None
+    file_offset: int
+    fingerprint: str
+
+
+def _columns(cursor: sqlite3.Cursor, table_name: str) -> list[str]:
+    return [row[1] for row in cursor.execute(f"PRAGMA table_xinfo({table_name})")]
+
+
+def _current_schema(cursor: sqlite3.Cursor, table_name: str) -> bool:
+    expected = sqlite3.connect(":memory:")
+    try:
+        columns = _columns(expected.execute(TABLES[table_name][0]), table_name)
+    finally:
+        expected.close()
+    return _columns(cursor, table_name) == columns
+
+
+def _read_watermark(cursor: sqlite3.Cursor, table_name: str) -> Watermark | None:
+    # A table created by an older schema (or missing) has to be rebuilt, not appended to.
+    if not _current_schema(cursor, table_name):
+        return None
+    row = cursor.execute(
+        "SELECT high_water, file_offset, fingerprint FROM ingest_watermarks WHERE table_name=?",
+        (table_name,),
+    ).fetchone()
+    return Watermark(*row) if row else None
+
+
+def _write_watermark(
+    cursor: sqlite3.Cursor, table_name: str, column: str, file_offset: int, fingerprint: str
+) -> None:
+    cursor.execute(
+        f"""
+        INSERT OR REPLACE INTO ingest_watermarks
+            (table_name, high_water, file_offset, fingerprint)
+        VALUES (?, (SELECT MAX({column}) FROM {table_name}), ?, ?)
+        """,
+        (table_name, file_offset, fingerprint),
+    )
+
+
+def _dataset_path(data_dir: Path, table_name: str) -> Path:
+    for suffix in EXPORT_SUFFIXES:
+        path = data_dir / f"{table_name}{suffix}"
+        if path.exists():
+            return path
+    raise FileNotFoundError(f"Missing dataset: {data_dir / table_name}.csv")
+
+
+class _Export(io.BufferedIOBase):
+    """A dataset file opened for reading, decompressed on the fly if it is compressed.
+
+    Offsets are positions in the decompressed CSV. gzip, bz2 and xz streams can only
+    seek backwards by decompressing again from the start, so the last
+    ``FINGERPRINT_BYTES`` read are kept for ``fingerprint`` instead of seeking back.
+    """
+
+    def __init__(self, path: Path) -> None:
+        with path.open("rb") as probe:
+            magic = probe.read(6)
+        opener = next(
+            (opener for prefix, opener in COMPRESSED_OPENERS.items() if magic.startswith(prefix)),
+            None,
+        )
+        self._stream: BinaryIO = opener(path) if opener else path.open("rb")
+        self._tail = b""
+
+    def readable(self) -> bool:
+        return True
+
+    def seekable(self) -> bool:
+        return True
+
+    def _remember(self, data: bytes) -> bytes:
+        if len(data) >= FINGERPRINT_BYTES:
+            self._tail = data[-FINGERPRINT_BYTES:]
+        else:
+            self._tail = (self._tail + data)[-FINGERPRINT_BYTES:]
+        return data
+
+    def read(self, size: int | None = -1) -> bytes:
+        return self._remember(self._stream.read(size))
+
+    read1 = read
+
+    def readline(self, size: int | None = -1) -> bytes:
+        return self._remember(self._stream.readline(size))
+
+    def seek(self, offset: int, whence: int = io.SEEK_SET) -> int:
+        self._tail = b""
+        return self._stream.seek(offset, whence)
+
+    def tell(self) -> int:
+        return self._stream.tell()
+
+    def close(self) -> None:
+        self._stream.close()
+        super().close()
+
+    def fingerprint(self) -> str:
+        """Hash of the ``FINGERPRINT_BYTES`` before the current position."""
+        offset = self.tell()
+        length = min(offset, FINGERPRINT_BYTES)
+        if len(self._tail) < length:
+            self.seek(offset - length)
+            self.read(length)
+        return hashlib.sha1(self._tail[len(self._tail) - length :]).hexdigest()
+
+
+def _read_header(handle: BinaryIO) -> list[str]:
+    handle.seek(0)
+    return next(csv.reader([handle.readline().decode("utf-8")]))
+
+
+def _resume(handle: _Export, watermark: Watermark | None) -> bool:
+    """Move to the offset the previous load read up to, if the file still holds the bytes
+    seen there; otherwise leave the handle where it was.
+    """
+    if watermark is None or watermark.file_offset <= 0:
+        return False
+    position = handle.tell()
+    handle.seek(max(0, watermark.file_offset - FINGERPRINT_BYTES))
+    handle.read(watermark.file_offset - handle.tell())
+    if handle.tell() == watermark.file_offset and handle.fingerprint() == watermark.fingerprint:
+        return True
+    handle.seek(position)
+    return False
+
+
+def _csv_rows(handle: BinaryIO, header: list[str]) -> Iterator[dict[str, str]]:
+    """Yield the CSV's rows from the handle's current position."""
+    text = io.TextIOWrapper(handle, encoding="utf-8", newline="")
+    try:
+        yield from csv.DictReader(text, fieldnames=header)
+    finally:
+        # Leave the binary handle open so the caller can record where reading stopped.
+        text.detach()
+
+
+def _key(values: Iterable) -> str:
+    return "\x1f".join(map(str, values))
+
+
+def _stored_keys(connection: sqlite3.Connection, table_name: str, since: str) -> BloomFilter:
+    """Bloom filter of the natural keys stored from ``since`` (a start_time) onwards."""
+    # Keys are joined inside SQLite, the same way _key joins them, and read as plain
+    # tuples, since this touches every stored row in the window.
+    key_sql = " || char(31) || ".join(NATURAL_KEYS[table_name])
+    since_ms = to_epoch_ms(since)
+    count = connection.execute(
+        f"SELECT COUNT(*) FROM {table_name} WHERE start_ms >= ?", (since_ms,)
+    ).fetchone()[0]
     cursor = connection.cursor()
-    for table_name, (ddl, insert_sql) in TABLES.items():
+    cursor.row_factory = None
+    cursor.execute(f"SELECT {key_sql} FROM {table_name} WHERE start_ms >= ?", (since_ms,))
+    return BloomFilter.from_keys((key for (key,) in cursor), capacity=count)
+
+
+def _unknown_rows(
+    connection: sqlite3.Connection,
+    table_name: str,
+    bloom: BloomFilter,
+    rows: list[dict[str, str]],
+) -> list[dict[str, str]]:
+    """Rows whose key is not stored: Bloom misses, plus hits a batched lookup rejects."""
+    keys = NATURAL_KEYS[table_name]
+    hits = [row for row in rows if _key(row[key] for key in keys) in bloom]
+    if not hits:
+        return rows
+    stored: set[str] = set()
+    chunk = MAX_SQL_VARIABLES // len(keys)
+    for start in range(0, len(hits), chunk):
+        part = hits[start : start + chunk]
+        placeholders = ", ".join(f"({', '.join('?' for _ in keys)})" for _ in part)
+        stored.update(
+            _key(row)
+            for row in connection.execute(
+                f"""
+                SELECT {", ".join(keys)} FROM {table_name}
+                WHERE ({", ".join(keys)}) IN (VALUES {placeholders})
+                """,
+                [row[key] for row in part for key in keys],
+            )
+        )
+    return [row for row in rows if _key(row[key] for key in keys) not in stored]
+
+
+def _unseen_rows(
+    connection: sqlite3.Connection,
+    table_name: str,
+    rows: Iterable[dict[str, str]],
+    high_water: str | None,
+) -> Iterator[dict[str, str]]:
+    """Drop the rows of an overlapping export whose natural key is already stored.
+
+    Rows past the high-water mark are new by construction and pass straight through.
+    Older rows are checked ``KEY_LOOKUP_BATCH`` at a time against a Bloom filter of the
+    keys stored since the first batch's earliest start_time, and only filter hits are
+    confirmed with one query per batch. A stored key the filter misses is upserted,
+    which leaves the same result, so the window only has to be a good guess.
+    """
+    column = WATERMARK_COLUMNS[table_name]
+    bloom: BloomFilter | None = None
+    overlap: list[dict[str, str]] = []
+    for row in rows:
+        if high_water is None or row[column] > high_water:
+            yield row
+            continue
+        overlap.append(row)
+        if len(overlap) == KEY_LOOKUP_BATCH:
+            if bloom is None:
+                bloom = _stored_keys(connection, table_name, min(r[column] for r in overlap))
+            yield from _unknown_rows(connection, table_name, bloom, overlap)
+            overlap = []
+    if overlap:
+        if bloom is None:
+            bloom = _stored_keys(connection, table_name, min(r[column] for r in overlap))
+        yield from _unknown_rows(connection, table_name, bloom, overlap)
+
+
+@contextmanager
+def bulk_load_settings(connection: sqlite3.Connection) -> Iterator[None]:
+    """Relax durability and enlarge the page cache for the duration of a load."""
+    saved = {name: connection.execute(f"PRAGMA {name}").fetchone()[0] for name in BULK_LOAD_PRAGMAS}
+    for name, value in BULK_LOAD_PRAGMAS.items():
+        connection.execute(f"PRAGMA {name}={value}")
+    try:
+        yield
+    finally:
+        if connection.in_transaction:
+            connection.rollback()
+        for name, value in saved.items():
+            connection.execute(f"PRAGMA {name}={value}")
+        # Fold the load back into the main file so the WAL does not stay dataset-sized.
+        connection.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+
+
+def _shadow_sql(sql: str, table_name: str) -> str:
+    return sql.replace(f" {table_name} (", f" {table_name}{SHADOW_SUFFIX} (", 1)
+
+
+def _load_rows(
+    cursor: sqlite3.Cursor,
+    table_name: str,
+    insert_sql: str,
+    path: Path,
+    watermark: Watermark | None,
+    batch_size: int,
+    stats: TableRun,
+) -> tuple[int, str]:
+    """Upsert the new rows of ``path``; return the file offset and its fingerprint.
+
+    If the file extends the export seen at ``watermark``, reading resumes where the last
+    load stopped. Otherwise the whole file is read and rows already stored are skipped.
+    """
+    with _Export(path) as handle:
+        header = _read_header(handle)
+        resumed = watermark is not None and _resume(handle, watermark)
+        start = handle.tell()
+        rows = _csv_rows(handle, header)
+        if watermark is not None and not resumed:
+            rows = _unseen_rows(cursor.connection, table_name, rows, watermark.high_water)
+        for batch in _cast_batches(table_name, rows, batch_size, stats):
+            with stats.timing("insert"):
+                cursor.executemany(insert_sql, batch)
+            stats.rows += len(batch)
+        stats.bytes += handle.tell() - start
+        return handle.tell(), handle.fingerprint()
+
+
+def _csv_chunks(handle: BinaryIO, chunk_bytes: int) -> Iterator[bytes]:
+    """Split the rest of ``handle`` into pieces of about ``chunk_bytes`` ending on records.
+
+    A newline ends a record only outside quotes, i.e. after an even number of ``"``
+    since the previous boundary; escaped quotes come in pairs and keep the parity.
+    """
+    carry = b""
+    while block := handle.read(chunk_bytes):
+        data = carry + block
+        end = data.rfind(b"\n")
+        while end != -1 and data.count(b'"', 0, end) % 2:
+            end = data.rfind(b"\n", 0, end)
+        if end == -1:
+            carry = data
+            continue
+        yield data[: end + 1]
+        carry = data[end + 1 :]
+    if carry:
+        yield carry
+
+
+def _parse_chunk(
+    table_name: str, header: list[str], data: bytes
+) -> tuple[list[dict], dict[str, float]]:
+    """Parse and cast one chunk; also return the worker's parse and cast seconds."""
+    stats = TableRun(table_name)
+    with stats.timing("parse"):
+        text = io.StringIO(data.decode("utf-8"), newline="")
+        raw = list(csv.DictReader(text, fieldnames=header))
+    with stats.timing("cast"):
+        rows = [_apply_casts(table_name, row) for row in raw]
+    return rows, stats.phases
+
+
+LoadedItem = tuple[str, list[dict] | None, tuple[int, str] | None]
+
+
+def _serial_batches(
+    tables: list[tuple[str, Path]], batch_size: int, run: IngestRun
+) -> Iterator[LoadedItem]:
+    """Yield ``(table, rows, None)`` per batch, then ``(table, None, (offset, fingerprint))``."""
+    for table_name, path in tables:
+        with _Export(path) as handle:
+            rows = _csv_rows(handle, _read_header(handle))
+            for batch in _cast_batches(table_name, rows, batch_size, run.table(table_name)):
+                yield table_name, batch, None
+            yield table_name, None, (handle.tell(), handle.fingerprint())
+
+
+def _parallel_batches(
+    pool: Executor,
+    tables: list[tuple[str, Path]],
+    workers: int,
+    chunk_bytes: int,
+    run: IngestRun,
+) -> Iterator[LoadedItem]:
+    """Like ``_serial_batches``, but chunks are parsed and cast in ``pool``.
+
+    Results come back in file order, so row ids match a serial load. At most
+    ``2 * workers`` chunks are in flight; a slow writer stalls the readers instead of
+    letting parsed rows pile up in memory.
+    """
+    pending: deque[tuple[str, Future | tuple[int, str]]] = deque()
+
+    def drain(keep: int) -> Iterator[LoadedItem]:
+        while len(pending) > keep:
+            table_name, item = pending.popleft()
+            if isinstance(item, Future):
+                rows, phases = item.result()
+                for phase, seconds in phases.items():
+                    run.table(table_name).phases[phase] += seconds
+                yield table_name, rows, None
+            else:
+                yield table_name, None, item
+
+    for table_name, path in tables:
+        with _Export(path) as handle:
+            header = _read_header(handle)
+            for chunk in _csv_chunks(handle, chunk_bytes):
+                pending.append((table_name, pool.submit(_parse_chunk, table_name, header, chunk)))
+                yield from drain(2 * workers)
+            pending.append((table_name, (handle.tell(), handle.fingerprint())))
+    yield from drain(0)
+
+
+def ingest_csvs(
+    data_dir: Path,
+    batch_size: int = BATCH_SIZE,
+    bulk_load: bool = False,
+    incremental: bool = False,
+    workers: int = 1,
+    chunk_bytes: int = CHUNK_BYTES,
+) -> IngestRun:
+    """Load every dataset in ``data_dir`` into SQLite and return the run's telemetry.
+
+    Each dataset is read from the first of ``<table>.csv``, ``.csv.gz``, ``.csv.bz2`` and
+    ``.csv.xz`` that exists; compressed exports are decompressed as they stream in.
+
+    Rebuilt tables are loaded into ``<table>__shadow`` copies while the live tables keep
+    serving reads. A single final transaction drops each live table, builds the
+    ``INDEXES`` on its shadow and renames it into place, so readers see either the
+    previous or the new dataset. It then runs ``ANALYZE`` on every loaded table.
+
+    By default every table is rebuilt. With ``incremental`` the tables in
+    ``WATERMARK_COLUMNS`` keep their rows and, in that final transaction, only append
+    rows past the watermark recorded by the previous run, so a daily refresh costs time
+    proportional to the new rows; tables without a watermark yet are rebuilt.
+
+    With ``workers`` above one, rebuilt tables are split into ``chunk_bytes`` pieces that
+    a process pool parses and casts while this process does all SQLite writes; the
+    result is identical to a serial load.
+
+    With ``bulk_load`` the load runs with ``synchronous=OFF`` and a large page cache,
+    commits once per shadow table, and restores the previous settings afterwards.
+
+    The returned ``IngestRun`` holds rows, bytes and per-phase seconds for each table; it
+    is also stored in ``ingest_runs`` by the final transaction, which also advances the
+    stored cost anomaly state (see ``app.anomaly_state``) and bumps the data generation.
+    """
+    paths = {table_name: _dataset_path(data_dir, table_name) for table_name in TABLES}
+    with _ingest_lock():
+        started = time.perf_counter()
+        run = IngestRun(started_at=touch_ingest_time(), incremental=incremental, workers=workers)
+        for table_name in TABLES:
+            run.table(table_name)
+        with (
+            _load_connection(run, started) as connection,
+            bulk_load_settings(connection) if bulk_load else nullcontext(),
+            ProcessPoolExecutor(workers) if workers > 1 else nullcontext() as pool,
+        ):
+            cursor = connection.cursor()
+            cursor.execute(WATERMARKS_DDL)
+            create_ingest_runs(cursor)
+            watermarks = {
+                table_name: _read_watermark(cursor, table_name)
+                for table_name in WATERMARK_COLUMNS
+                if incremental
+            }
+            rebuilt = [name for name in TABLES if watermarks.get(name) is None]
+            offsets: dict[str, tuple[int, str]] = {}
+            for table_name in rebuilt:
+                cursor.execute(f"DROP TABLE IF EXISTS {table_name}{SHADOW_SUFFIX}")
+                cursor.execute(_shadow_sql(TABLES[table_name][0], table_name))
+            tables = [(table_name, paths[table_name]) for table_name in rebuilt]
+            if pool is None:
+                loaded = _serial_batches(tables, batch_size, run)
+            else:
+                loaded = _parallel_batches(pool, tables, workers, chunk_bytes, run)
+            for table_name, batch, mark in loaded:
+                stats = run.table(table_name)
+                if batch is not None:
+                    with stats.timing("insert"):
+                        cursor.executemany(_shadow_sql(TABLES[table_name][1], table_name), batch)
+                    stats.rows += len(batch)
+                    continue
+                offsets[table_name] = mark
+                stats.bytes = mark[0]
+                if bulk_load:
+                    connection.commit()
+            # sqlite3 does not open transactions for DDL, so start the swap explicitly.
+            if not connection.in_transaction:
+                cursor.execute("BEGIN IMMEDIATE")
+            for table_name, watermark in watermarks.items():
+                if watermark is not None:
+                    offsets[table_name] = _load_rows(
+                        cursor,
+                        table_name,
+                        TABLES[table_name][1],
+                        paths[table_name],
+                        watermark,
+                        batch_size,
+                        run.table(table_name),
+                    )
+            _swap_in_shadows(cursor, rebuilt, run)
+            _analyze(cursor, list(offsets), run)
+            advance_cost_anomalies(cursor, rebuilt="warehouse_metering" in rebuilt)
+            for table_name, (file_offset, fingerprint) in offsets.items():
+                column = WATERMARK_COLUMNS.get(table_name)
+                if column:
+                    _write_watermark(cursor, table_name, column, file_offset, fingerprint)
+            run.finished_at = touch_ingest_time()
+            run.seconds = time.perf_counter() - started
+            record_run(cursor, run)
+            bump_generation(cursor)
+            connection.commit()
+    return run
+
+
+@contextmanager
+def _ingest_lock(timeout: float = INGEST_LOCK_TIMEOUT) -> Iterator[None]:
+    """Hold the database's ingest lock, waiting up to ``timeout`` seconds for it.
+
+    The lock is an exclusive transaction on an empty SQLite file next to the database.
+    SQLite's file locks work across processes and are released if the holder dies, so
+    a crashed ingest never leaves the lock behind.
+    """
+    with _thread_lock:
+        lock_path = Path(f"{get_db_path()}{INGEST_LOCK_SUFFIX}")
+        lock_path.parent.mkdir(parents=True, exist_ok=True)
+        connection = sqlite3.connect(lock_path, timeout=timeout, isolation_level=None)
+        try:
+            try:
+                connection.execute("BEGIN EXCLUSIVE")
+            except sqlite3.OperationalError as exc:
+                raise TimeoutError(f"Another ingest still holds {lock_path}") from exc
+            yield
+        finally:
+            connection.close()
+
+
+@contextmanager
+def _load_connection(run: IngestRun, started: float) -> Iterator[sqlite3.Connection]:
+    """A connection for one load, rolled back on failure and always closed.
+
+    A failed parse or insert must not leave a transaction open: it would hold the
+    database's write lock for as long as the exception (and its frames) live. After the
+    rollback the failed ``run`` is recorded with its error.
+    """
+    connection = get_connection()
+    try:
+        yield connection
+    except BaseException as exc:
+        connection.rollback()
+        if isinstance(exc, Exception):
+            run.finished_at = touch_ingest_time()
+            run.seconds = time.perf_counter() - started
+            run.error = f"{type(exc).__name__}: {exc}"
+            _record_failed_run(connection, run)
+        raise
+    finally:
+        connection.close()
+
+
+def _record_failed_run(connection: sqlite3.Connection, run: IngestRun) -> None:
+    # Best effort: a database error here must not hide the one that failed the load.
+    try:
+        cursor = connection.cursor()
+        create_ingest_runs(cursor)
+        record_run(cursor, run)
+        connection.commit()
+    except sqlite3.Error:
+        connection.rollback()
+
+
+def _swap_in_shadows(cursor: sqlite3.Cursor, table_names: list[str], run: IngestRun) -> None:
+    for table_name in table_names:
+        shadow = f"{table_name}{SHADOW_SUFFIX}"
         cursor.execute(f"DROP TABLE IF EXISTS {table_name}")
-        cursor.execute(ddl)
-        csv_path = data_dir / f"{table_name}.csv"
-        if not csv_path.exists():
-            raise FileNotFoundError(f"Missing dataset: {csv_path}")
-        with csv_path.open(newline="", encoding="utf-8") as handle:
-            reader = csv.DictReader(handle)
-            rows = [_apply_casts(table_name, row) for row in reader]
-            if rows:
-                cursor.executemany(insert_sql, rows)
-    connection.commit()
-    connection.close()
-
-
-def ingest_demo_data() -> None:
-    ingest_csvs(Path("data/demo"))
+        # Index names are schema-wide, so the live names only become free once the old
+        # table is gone; building them here keeps the shadow load itself cheap.
+        with run.table(table_name).timing("index"):
+            for index_name, columns in INDEXES.get(table_name, []):
+                cursor.execute(f"CREATE INDEX {index_name} ON {shadow} ({columns})")
+        cursor.execute(f"ALTER TABLE {shadow} RENAME TO {table_name}")
+
+
+def _analyze(cursor: sqlite3.Cursor, table_names: list[str], run: IngestRun) -> None:
+    """Refresh planner statistics for the loaded tables."""
+    cursor.execute(f"PRAGMA analysis_limit={ANALYZE_LIMIT}")
+    for table_name in table_names:
+        with run.table(table_name).timing("analyze"):
+            cursor.execute(f"ANALYZE {table_name}")
+
+
+def ingest_demo_data(
+    bulk_load: bool = False, incremental: bool = False, workers: int = 1
+) -> IngestRun:
+    return ingest_csvs(
+        Path("data/demo"), bulk_load=bulk_load, incremental=incremental, workers=workers
+    )
 
 
 def touch_ingest_time() -> str:
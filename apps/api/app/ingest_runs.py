@@ -0,0 +1,156 @@
+"""Per-run ingest telemetry: rows, bytes and phase timings for every loaded table.
+
+Each successful ingest returns an ``IngestRun`` and stores it in ``ingest_runs`` in the
+same transaction that publishes the data, so the API and CLI can show recent runs. A
+failed ingest is rolled back and then stored with its ``error``.
+"""
+
+from __future__ import annotations
+
+import json
+import sqlite3
+import time
+from collections.abc import Iterator
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+
+# "parse" covers reading and splitting CSV rows (and, for incremental loads, skipping
+# rows already stored); in parallel loads parse and cast are summed over the workers.
+PHASES = ("parse", "cast", "insert", "index", "analyze")
+DEFAULT_RUN_LIMIT = 20
+
+INGEST_RUNS_DDL = """
+CREATE TABLE IF NOT EXISTS ingest_runs (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    started_at TEXT,
+    finished_at TEXT,
+    incremental INTEGER,
+    workers INTEGER,
+    rows INTEGER,
+    bytes INTEGER,
+    seconds REAL,
+    tables TEXT,
+    error TEXT
+)
+"""
+
+
+def _rate(rows: int, seconds: float) -> float:
+    return round(rows / seconds, 1) if seconds > 0 else 0.0
+
+
+@dataclass
+class TableRun:
+    table: str
+    rows: int = 0
+    bytes: int = 0
+    phases: dict[str, float] = field(default_factory=lambda: dict.fromkeys(PHASES, 0.0))
+
+    @contextmanager
+    def timing(self, phase: str) -> Iterator[None]:
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.phases[phase] += time.perf_counter() - started
+
+    def as_dict(self) -> dict:
+        seconds = round(sum(self.phases.values()), 4)
+        return {
+            "table": self.table,
+            "rows": self.rows,
+            "bytes": self.bytes,
+            "seconds": seconds,
+            "rows_per_second": _rate(self.rows, seconds),
+            "phases": {phase: round(value, 4) for phase, value in self.phases.items()},
+        }
+
+
+@dataclass
+class IngestRun:
+    started_at: str
+    incremental: bool
+    workers: int
+    id: int | None = None
+    finished_at: str | None = None
+    seconds: float = 0.0
+    tables: dict[str, TableRun] = field(default_factory=dict)
+    error: str | None = None
+
+    def table(self, name: str) -> TableRun:
+        return self.tables.setdefault(name, TableRun(name))
+
+    def as_dict(self) -> dict:
+        rows = sum(table.rows for table in self.tables.values())
+        seconds = round(self.seconds, 4)
+        return {
+            "id": self.id,
+            "started_at": self.started_at,
+            "finished_at": self.finished_at,
+            "incremental": self.incremental,
+            "workers": self.workers,
+            "rows": rows,
+            "bytes": sum(table.bytes for table in self.tables.values()),
+            "seconds": seconds,
+            "rows_per_second": _rate(rows, seconds),
+            "tables": [table.as_dict() for table in self.tables.values()],
+            "error": self.error,
+        }
+
+
+def create_ingest_runs(cursor: sqlite3.Cursor) -> None:
+    cursor.execute(INGEST_RUNS_DDL)
+    columns = {row[1] for row in cursor.execute("PRAGMA table_info(ingest_runs)")}
+    # Tables created before failed runs were recorded lack the error column.
+    if "error" not in columns:
+        cursor.execute("ALTER TABLE ingest_runs ADD COLUMN error TEXT")
+
+
+def record_run(cursor: sqlite3.Cursor, run: IngestRun) -> None:
+    report = run.as_dict()
+    cursor.execute(
+        """
+        INSERT INTO ingest_runs
+            (started_at, finished_at, incremental, workers, rows, bytes, seconds, tables, error)
+        VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+        """,
+        (
+            run.started_at,
+            run.finished_at,
+            int(run.incremental),
+            run.workers,
+            report["rows"],
+            report["bytes"],
+            report["seconds"],
+            json.dumps(report["tables"]),
+            run.error,
+        ),
+    )
+    run.id = cursor.lastrowid
+
+
+def recent_runs(connection: sqlite3.Connection, limit: int = DEFAULT_RUN_LIMIT) -> list[dict]:
+    """The ``limit`` most recent runs, newest first; empty before the first ingest."""
+    exists = connection.execute(
+        "SELECT 1 FROM sqlite_master WHERE type='table' AND name='ingest_runs'"
+    ).fetchone()
+    if not exists:
+        return []
+    cursor = connection.execute(
+        """
+        SELECT id, started_at, finished_at, incremental, workers, rows, bytes, seconds, tables,
+            error
+        FROM ingest_runs ORDER BY id DESC LIMIT ?
+        """,
+        (limit,),
+    )
+    columns = [column[0] for column in cursor.description]
+    runs = []
+    for values in cursor:
+        run = dict(zip(columns, values, strict=True))
+        tables = run.pop("tables")
+        run["incremental"] = bool(run["incremental"])
+        run["rows_per_second"] = _rate(run["rows"], run["seconds"])
+        run["tables"] = json.loads(tables)
+        runs.append(run)
+    return runs
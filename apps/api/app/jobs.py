@@ -0,0 +1,91 @@
+"""Background ingest jobs, run one at a time off the request threads."""
+
+from __future__ import annotations
+
+import threading
+import uuid
+from collections import OrderedDict
+from collections.abc import Callable
+from dataclasses import asdict, dataclass
+from datetime import datetime
+
+MAX_TRACKED_JOBS = 100
+
+
+@dataclass
+class Job:
+    id: str
+    status: str
+    created_at: str
+    started_at: str | None = None
+    finished_at: str | None = None
+    error: str | None = None
+    result: dict | None = None
+
+
+class JobRunner:
+    """Runs submitted callables in submission order on a single daemon thread.
+
+    Status moves from ``queued`` to ``running`` to ``succeeded`` or ``failed``; a
+    succeeded job keeps what its callable returned as ``result``. Only the most recent
+    ``max_jobs`` jobs are remembered.
+    """
+
+    def __init__(self, max_jobs: int = MAX_TRACKED_JOBS) -> None:
+        self.max_jobs = max_jobs
+        self._jobs: OrderedDict[str, Job] = OrderedDict()
+        self._pending: list[tuple[str, Callable[[], dict | None]]] = []
+        self._lock = threading.Condition()
+        self._thread: threading.Thread | None = None
+
+    def submit(self, target: Callable[[], dict | None]) -> dict:
+        job = Job(id=uuid.uuid4().hex, status="queued", created_at=_now())
+        with self._lock:
+            self._jobs[job.id] = job
+            while len(self._jobs) > self.max_jobs:
+                oldest = next(iter(self._jobs))
+                if self._jobs[oldest].status in ("queued", "running"):
+                    break
+                del self._jobs[oldest]
+            self._pending.append((job.id, target))
+            if self._thread is None:
+                self._thread = threading.Thread(
+                    target=self._run, name="frostsight-jobs", daemon=True
+                )
+                self._thread.start()
+            self._lock.notify()
+            return asdict(job)
+
+    def get(self, job_id: str) -> dict | None:
+        with self._lock:
+            job = self._jobs.get(job_id)
+            return asdict(job) if job else None
+
+    def _run(self) -> None:
+        while True:
+            with self._lock:
+                while not self._pending:
+                    self._lock.wait()
+                job_id, target = self._pending.pop(0)
+                self._update(job_id, status="running", started_at=_now())
+            try:
+                result = target()
+            except Exception as exc:
+                with self._lock:
+                    self._update(job_id, status="failed", finished_at=_now(), error=str(exc))
+            else:
+                with self._lock:
+                    self._update(job_id, status="succeeded", finished_at=_now(), result=result)
+
+    def _update(self, job_id: str, **changes) -> None:
+        job = self._jobs.get(job_id)
+        if job is not None:
+            for name, value in changes.items():
+                setattr(job, name, value)
+
+
+def _now() -> str:
+    return datetime.utcnow().isoformat()
+
+
+ingest_jobs = JobRunner()
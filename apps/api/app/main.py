@@ -1,25 +1,53 @@
 from __future__ import annotations
 
+import hashlib
 import json
 import os
+import queue
+import selectors
+import socket
+import sqlite3
+import threading
+import time
+from collections.abc import Callable, Iterable, Iterator
 from datetime import date, datetime
 from http import HTTPStatus
 from http.server import BaseHTTPRequestHandler, HTTPServer
+from typing import TypeVar
 from urllib.parse import parse_qs, urlparse
 
+from app import aggregates
 from app.analytics import (
-    calculate_daily_credits,
-    calculate_p95_latency_trend,
-    detect_cost_anomalies,
-    find_query_regressions,
+    Anomaly,
+    DailyCredits,
+    GovernanceFinding,
     governance_lint,
-    top_expensive_queries,
 )
-from app.db import get_connection, get_db_path
+from app.anomaly_state import cost_anomalies
+from app.cache import body_cache, data_generation, response_cache
+from app.compression import (
+    SUPPORTED_ENCODINGS,
+    compress,
+    compressor,
+    negotiate_encoding,
+)
+from app.db import get_db_path, read_transaction
 from app.ingest import ingest_demo_data
+from app.ingest_runs import DEFAULT_RUN_LIMIT, recent_runs
+from app.jobs import ingest_jobs
+from app.pagination import KEYSET_COLUMNS, InvalidCursorError, KeysetPage, iter_page
+from app.query_filters import InvalidFilterError, query_history_filters
+from app.settings import get_settings
 from app.snowflake import snowflake_status
 
 DEFAULT_TOKEN = "local-dev-token"
+INGEST_JOBS_PATH = "/api/v1/ingest/jobs"
+INGEST_RUNS_PATH = "/api/v1/ingest/runs"
+STREAM_CHUNK_SIZE = 64 * 1024
+# Compressed bodies up to this size are kept in the body cache, keyed by ETag.
+MAX_CACHED_BODY = 1024 * 1024
+
+T = TypeVar("T")
 
 
 def _require_auth(headers) -> bool:
@@ -42,15 +70,120 @@ def _serialize_list(items: list[dict]) -> list[dict]:
     return [_serialize_dict(item) for item in items]
 
 
+def _encoded_etag(etag: str, encoding: str) -> str:
+    return f'{etag[:-1]}-{encoding}"'
+
+
 def _json_response(handler: BaseHTTPRequestHandler, payload: object, status: int = 200) -> None:
     data = json.dumps(payload).encode("utf-8")
+    encoding = negotiate_encoding(handler.headers.get("Accept-Encoding"))
+    if encoding and len(data) >= get_settings().compress_min_bytes:
+        etag = getattr(handler, "etag", None)
+        if etag is not None and status == HTTPStatus.OK and len(data) <= MAX_CACHED_BODY:
+            # Identical ETag means identical bytes, so reuse the previous compression.
+            handler.etag = _encoded_etag(etag, encoding)
+            body = data
+            data = body_cache.get_or_compute(handler.etag, lambda: compress(body, encoding))
+        else:
+            data = compress(data, encoding)
+    else:
+        encoding = None
     handler.send_response(status)
     handler.send_header("Content-Type", "application/json")
+    if encoding:
+        handler.send_header("Content-Encoding", encoding)
     handler.send_header("Content-Length", str(len(data)))
     handler.end_headers()
     handler.wfile.write(data)
 
 
+class _ChunkedWriter:
+    """Buffers writes into HTTP/1.1 chunks of ~``chunk_size`` bytes, optionally compressed."""
+
+    def __init__(
+        self,
+        wfile,
+        chunked: bool,
+        encoding: str | None = None,
+        chunk_size: int = STREAM_CHUNK_SIZE,
+    ) -> None:
+        self._wfile = wfile
+        self._chunked = chunked
+        self._encoder = compressor(encoding) if encoding else None
+        self._chunk_size = chunk_size
+        self._buffer: list[bytes] = []
+        self._buffered = 0
+
+    def write(self, data: bytes) -> None:
+        self._buffer.append(data)
+        self._buffered += len(data)
+        if self._buffered >= self._chunk_size:
+            self.flush()
+
+    def flush(self) -> None:
+        if not self._buffered:
+            return
+        data = b"".join(self._buffer)
+        self._buffer.clear()
+        self._buffered = 0
+        if self._encoder is not None:
+            data = self._encoder.compress(data)
+        self._write(data)
+
+    def close(self) -> None:
+        self.flush()
+        if self._encoder is not None:
+            self._write(self._encoder.flush())
+        if self._chunked:
+            self._wfile.write(b"0\r\n\r\n")
+
+    def _write(self, data: bytes) -> None:
+        if not data:
+            return
+        if self._chunked:
+            self._wfile.write(f"{len(data):X}\r\n".encode("ascii") + data + b"\r\n")
+        else:
+            self._wfile.write(data)
+
+
+def _json_array_parts(rows: Iterable[dict]) -> Iterator[bytes]:
+    # Same separators as json.dumps on a list, so streamed bodies match buffered ones.
+    yield b"["
+    for idx, row in enumerate(rows):
+        if idx:
+            yield b", "
+        yield json.dumps(_serialize_dict(row)).encode("utf-8")
+    yield b"]"
+
+
+def _json_page_parts(page: KeysetPage) -> Iterator[bytes]:
+    yield b'{"items": '
+    yield from _json_array_parts(page)
+    yield b', "next_cursor": ' + json.dumps(page.next_cursor).encode("utf-8") + b"}"
+
+
+def _stream_response(handler: BaseHTTPRequestHandler, parts: Iterable[bytes]) -> None:
+    chunked = handler.request_version == "HTTP/1.1"
+    encoding = negotiate_encoding(handler.headers.get("Accept-Encoding"))
+    if encoding and getattr(handler, "etag", None) is not None:
+        handler.etag = _encoded_etag(handler.etag, encoding)
+    handler.send_response(HTTPStatus.OK)
+    handler.send_header("Content-Type", "application/json")
+    if encoding:
+        handler.send_header("Content-Encoding", encoding)
+    if chunked:
+        handler.send_header("Transfer-Encoding", "chunked")
+    else:
+        # HTTP/1.0 has no chunked framing; the end of the body is the connection close.
+        handler.send_header("Connection", "close")
+        handler.close_connection = True
+    handler.end_headers()
+    writer = _ChunkedWriter(handler.wfile, chunked=chunked, encoding=encoding)
+    for part in parts:
+        writer.write(part)
+    writer.close()
+
+
 def _query_param(query: dict[str, list[str]], key: str, default: int) -> int:
     try:
         return int(query.get(key, [str(default)])[0])
@@ -58,16 +191,114 @@ def _query_param(query: dict[str, list[str]], key: str, default: int) -> int:
         return default
 
 
-def _fetch_all(query: str, params: tuple = ()) -> list[dict]:
-    conn = get_connection()
+def _fetch_all(conn: sqlite3.Connection, query: str, params: tuple = ()) -> list[dict]:
     cursor = conn.execute(query, params)
-    rows = [dict(row) for row in cursor.fetchall()]
-    conn.close()
-    return rows
+    return [dict(row) for row in cursor.fetchall()]
+
+
+def _daily_credits(conn: sqlite3.Connection) -> list[DailyCredits]:
+    return aggregates.daily_credits(conn)
+
+
+def _cost_anomalies(conn: sqlite3.Connection) -> list[Anomaly]:
+    return cost_anomalies(conn)
+
+
+def _governance_findings(conn: sqlite3.Connection) -> list[GovernanceFinding]:
+    return governance_lint(
+        _fetch_all(conn, "SELECT * FROM role_grants"),
+        _fetch_all(conn, "SELECT * FROM role_usage"),
+        _fetch_all(conn, "SELECT * FROM object_access"),
+    )
+
+
+def _overview(conn: sqlite3.Connection) -> dict:
+    daily = _daily_credits(conn)
+    latency = aggregates.latest_latency(conn)
+    anomalies = cost_anomalies(conn)
+    governance = _governance_findings(conn)
+    return {
+        "credits_today": daily[-1].credits_used if daily else 0.0,
+        "p95_latency_today_ms": latency.p95_ms if latency else 0.0,
+        "anomaly_count": len(anomalies),
+        "governance_issue_count": len(governance),
+    }
+
+
+def _query_insights(conn: sqlite3.Connection, where: list[str], params: list) -> dict:
+    insights = {
+        "latency_trend": aggregates.latency_trend(conn, where, params),
+        "regressions": aggregates.query_regressions(conn, where, params),
+        "top_expensive": aggregates.top_expensive(conn, where, params),
+    }
+    return {
+        key: _serialize_list([item.__dict__ for item in items]) for key, items in insights.items()
+    }
+
+
+def _etag(generation: int, path: str, query: dict[str, list[str]]) -> str:
+    params = json.dumps(sorted(query.items()))
+    # The UTC date is part of the tag because governance lint compares against "now".
+    seed = f"{get_db_path()}|{datetime.utcnow().date()}|{path}|{params}"
+    digest = hashlib.sha1(seed.encode("utf-8")).hexdigest()[:20]
+    return f'"g{generation}-{digest}"'
+
+
+def _etag_matches(header: str | None, etag: str) -> bool:
+    if not header:
+        return False
+    candidates = [item.strip().removeprefix("W/") for item in header.split(",")]
+    # If-None-Match uses weak comparison, and any content-coding of the same
+    # generation and parameters is still the same resource state.
+    variants = {etag} | {_encoded_etag(etag, encoding) for encoding in SUPPORTED_ENCODINGS}
+    return "*" in candidates or not variants.isdisjoint(candidates)
 
 
 class FrostSightHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    # Seconds a client may stall mid-request before its worker gives up on it. Idle
+    # keep-alive connections do not hold a worker; FrostSightServer watches them.
+    timeout = 10
+    # Endpoints whose payload depends on more than the ingested data. Failed ingest runs
+    # are recorded without bumping the generation.
+    UNCACHEABLE_PATHS = frozenset(
+        {"/api/v1/snowflake/status", "/api/v1/cache/stats", INGEST_RUNS_PATH}
+    )
+    etag: str | None = None
+    status_code: int = 0
+
+    def handle(self) -> None:
+        # One request per dispatch, plus any pipelined requests already read into rfile
+        # (they would be lost with it); the server waits for the next one.
+        self.close_connection = True
+        self.handle_one_request()
+        while not self.close_connection and self._request_buffered():
+            self.handle_one_request()
+
+    def _request_buffered(self) -> bool:
+        self.connection.setblocking(False)
+        try:
+            return bool(self.rfile.peek(1))
+        except OSError:
+            return False
+        finally:
+            self.connection.settimeout(self.timeout)
+
+    def send_response(self, code: int, message: str | None = None) -> None:
+        self.status_code = code
+        super().send_response(code, message)
+
+    def end_headers(self) -> None:
+        if self.etag is not None and self.status_code in (HTTPStatus.OK, HTTPStatus.NOT_MODIFIED):
+            self.send_header("ETag", self.etag)
+            self.send_header("Cache-Control", "private, no-cache")
+        else:
+            self.send_header("Cache-Control", "no-store")
+        self.send_header("Vary", "Accept-Encoding")
+        super().end_headers()
+
     def do_GET(self) -> None:
+        self.etag = None
         parsed = urlparse(self.path)
         if parsed.path == "/api/v1/health":
             _json_response(self, {"status": "ok"})
@@ -75,106 +306,330 @@ class FrostSightHandler(BaseHTTPRequestHandler):
         if not _require_auth(self.headers):
             _json_response(self, {"detail": "unauthorized"}, status=HTTPStatus.UNAUTHORIZED)
             return
-        query = parse_qs(parsed.query)
-        if parsed.path == "/api/v1/overview":
-            metering = _fetch_all("SELECT * FROM warehouse_metering")
-            daily = calculate_daily_credits(metering)
-            queries = _fetch_all("SELECT * FROM query_history LIMIT 500")
-            latency = calculate_p95_latency_trend(queries)
-            anomalies = detect_cost_anomalies(daily)
-            governance = governance_lint(
-                _fetch_all("SELECT * FROM role_grants"),
-                _fetch_all("SELECT * FROM role_usage"),
-                _fetch_all("SELECT * FROM object_access"),
-            )
-            payload = {
-                "credits_today": daily[-1].credits_used if daily else 0.0,
-                "p95_latency_today_ms": latency[-1].p95_ms if latency else 0.0,
-                "anomaly_count": len(anomalies),
-                "governance_issue_count": len(governance),
-            }
-            _json_response(self, payload)
+        if parsed.path.startswith(f"{INGEST_JOBS_PATH}/"):
+            job = ingest_jobs.get(parsed.path.removeprefix(f"{INGEST_JOBS_PATH}/"))
+            if job is None:
+                _json_response(self, {"detail": "not found"}, status=HTTPStatus.NOT_FOUND)
+                return
+            _json_response(self, job)
             return
-        if parsed.path == "/api/v1/warehouses":
-            limit = _query_param(query, "limit", 50)
-            offset = _query_param(query, "offset", 0)
-            rows = _fetch_all(
-                "SELECT * FROM warehouses LIMIT ? OFFSET ?",
-                (limit, offset),
-            )
-            _json_response(self, _serialize_list(rows))
+        query = parse_qs(parsed.query, keep_blank_values=True)
+        with read_transaction() as conn:
+            # Ingest bumps the generation in the transaction that loads the data, so
+            # reading it from the request's snapshot ties cached results to their data.
+            self.generation = data_generation(conn)
+            if parsed.path not in self.UNCACHEABLE_PATHS:
+                self.etag = _etag(self.generation, parsed.path, query)
+                if _etag_matches(self.headers.get("If-None-Match"), self.etag):
+                    self.send_response(HTTPStatus.NOT_MODIFIED)
+                    self.end_headers()
+                    return
+            self._route_get(conn, parsed.path, query)
+
+    def _cached(
+        self,
+        conn: sqlite3.Connection,
+        key: tuple,
+        compute: Callable[[sqlite3.Connection], T],
+    ) -> T:
+        cache_key = (str(get_db_path()), self.generation, *key)
+        return response_cache.get_or_compute(cache_key, lambda: compute(conn))
+
+    def _route_get(self, conn: sqlite3.Connection, path: str, query: dict[str, list[str]]) -> None:
+        # Governance lint compares against "now", so its results also expire daily.
+        today = datetime.utcnow().date()
+        if path == "/api/v1/overview":
+            _json_response(self, self._cached(conn, ("overview", today), _overview))
             return
-        if parsed.path == "/api/v1/warehouse-metering":
-            limit = _query_param(query, "limit", 200)
-            offset = _query_param(query, "offset", 0)
-            rows = _fetch_all(
-                "SELECT * FROM warehouse_metering LIMIT ? OFFSET ?",
-                (limit, offset),
-            )
-            _json_response(self, _serialize_list(rows))
+        if path == "/api/v1/warehouses":
+            self._list_rows(conn, "warehouses", query, default_limit=50)
             return
-        if parsed.path == "/api/v1/queries":
-            limit = _query_param(query, "limit", 100)
-            offset = _query_param(query, "offset", 0)
-            rows = _fetch_all(
-                "SELECT * FROM query_history LIMIT ? OFFSET ?",
-                (limit, offset),
+        if path == "/api/v1/warehouse-metering":
+            self._list_rows(conn, "warehouse_metering", query, default_limit=200)
+            return
+        if path == "/api/v1/queries":
+            try:
+                where, params = query_history_filters(query)
+            except InvalidFilterError as exc:
+                _json_response(self, {"detail": str(exc)}, status=HTTPStatus.BAD_REQUEST)
+                return
+            self._list_rows(conn, "query_history", query, 100, where, params)
+            return
+        if path == "/api/v1/queries/insights":
+            window = {key: query[key] for key in ("start", "end") if key in query}
+            try:
+                where, params = query_history_filters(window)
+            except InvalidFilterError as exc:
+                _json_response(self, {"detail": str(exc)}, status=HTTPStatus.BAD_REQUEST)
+                return
+            payload = self._cached(
+                conn,
+                ("insights", tuple(params)),
+                lambda conn: _query_insights(conn, where, params),
             )
-            _json_response(self, _serialize_list(rows))
-            return
-        if parsed.path == "/api/v1/queries/insights":
-            query_rows = _fetch_all("SELECT * FROM query_history LIMIT 500")
-            payload = {
-                "latency_trend": [item.__dict__ for item in calculate_p95_latency_trend(query_rows)],
-                "regressions": [item.__dict__ for item in find_query_regressions(query_rows)],
-                "top_expensive": [item.__dict__ for item in top_expensive_queries(query_rows)],
-            }
-            _json_response(self, _serialize_dict(payload))
-            return
-        if parsed.path == "/api/v1/anomalies":
+            _json_response(self, payload)
+            return
+        if path == "/api/v1/anomalies":
             limit = _query_param(query, "limit", 50)
             offset = _query_param(query, "offset", 0)
-            metering = _fetch_all("SELECT * FROM warehouse_metering")
-            daily = calculate_daily_credits(metering)
-            anomalies = detect_cost_anomalies(daily)
-            payload = [_serialize_dict(item.__dict__) for item in anomalies[offset : offset + limit]]
+            anomalies = self._cached(conn, ("anomalies",), _cost_anomalies)
+            page = anomalies[offset : offset + limit]
+            payload = [_serialize_dict(item.__dict__) for item in page]
             _json_response(self, payload)
             return
-        if parsed.path == "/api/v1/governance/findings":
+        if path == "/api/v1/governance/findings":
             limit = _query_param(query, "limit", 100)
             offset = _query_param(query, "offset", 0)
-            findings = governance_lint(
-                _fetch_all("SELECT * FROM role_grants"),
-                _fetch_all("SELECT * FROM role_usage"),
-                _fetch_all("SELECT * FROM object_access"),
-            )
+            findings = self._cached(conn, ("governance", today), _governance_findings)
             payload = [_serialize_dict(item.__dict__) for item in findings[offset : offset + limit]]
             _json_response(self, payload)
             return
-        if parsed.path == "/api/v1/snowflake/status":
+        if path == INGEST_RUNS_PATH:
+            limit = _query_param(query, "limit", DEFAULT_RUN_LIMIT)
+            _json_response(self, recent_runs(conn, limit))
+            return
+        if path == "/api/v1/cache/stats":
+            stats = {**response_cache.stats(), "bodies": body_cache.stats()}
+            _json_response(self, {**stats, "generation": self.generation})
+            return
+        if path == "/api/v1/snowflake/status":
             _json_response(self, snowflake_status())
             return
         _json_response(self, {"detail": "not found"}, status=HTTPStatus.NOT_FOUND)
 
+    def _list_rows(
+        self,
+        conn: sqlite3.Connection,
+        table: str,
+        query: dict[str, list[str]],
+        default_limit: int,
+        where: list[str] | None = None,
+        params: list | None = None,
+    ) -> None:
+        where = where or []
+        params = params or []
+        limit = _query_param(query, "limit", default_limit)
+        stream = query.get("stream", [""])[0] in ("1", "true")
+        stream = stream or limit > get_settings().stream_threshold
+        if "cursor" in query:
+            try:
+                page = iter_page(conn, table, limit, query["cursor"][0] or None, where, params)
+            except InvalidCursorError:
+                _json_response(self, {"detail": "invalid cursor"}, status=HTTPStatus.BAD_REQUEST)
+                return
+            if stream:
+                _stream_response(self, _json_page_parts(page))
+                return
+            rows = _serialize_list(list(page))
+            _json_response(self, {"items": rows, "next_cursor": page.next_cursor})
+            return
+        offset = _query_param(query, "offset", 0)
+        condition = f"WHERE {' AND '.join(where)}" if where else ""
+        # The keyset order, so offset pages are stable and agree with cursor pages.
+        order = ", ".join(KEYSET_COLUMNS[table])
+        cursor = conn.execute(
+            f"SELECT * FROM {table} {condition} ORDER BY {order} LIMIT ? OFFSET ?",
+            (*params, limit, offset),
+        )
+        if stream:
+            _stream_response(self, _json_array_parts(dict(row) for row in cursor))
+            return
+        _json_response(self, _serialize_list([dict(row) for row in cursor]))
+
     def do_POST(self) -> None:
+        self.etag = None
         parsed = urlparse(self.path)
+        # Discard any request body so it is not parsed as the next keep-alive request.
+        length = int(self.headers.get("Content-Length") or 0)
+        if length:
+            self.rfile.read(length)
         if not _require_auth(self.headers):
             _json_response(self, {"detail": "unauthorized"}, status=HTTPStatus.UNAUTHORIZED)
             return
         if parsed.path == "/api/v1/ingest/demo":
-            ingest_demo_data()
-            _json_response(self, {"status": "demo_ingested", "db": str(get_db_path())})
+            run = ingest_demo_data()
+            _json_response(
+                self, {"status": "demo_ingested", "db": str(get_db_path()), "run": run.as_dict()}
+            )
+            return
+        if parsed.path == INGEST_JOBS_PATH:
+            job = ingest_jobs.submit(lambda: ingest_demo_data().as_dict())
+            _json_response(self, job, status=HTTPStatus.ACCEPTED)
             return
         _json_response(self, {"detail": "not found"}, status=HTTPStatus.NOT_FOUND)
 
 
-def run_server(host: str = "0.0.0.0", port: int = 8000) -> HTTPServer:
-    server = HTTPServer((host, port), FrostSightHandler)
+class FrostSightServer(HTTPServer):
+    """HTTPServer that hands accepted connections to a fixed pool of worker threads.
+
+    Connections wait in a bounded queue; once it is full new connections are answered
+    with ``503 Service Unavailable`` instead of piling up behind slow requests.
+
+    A worker serves one request per dispatch. Keep-alive connections are then parked
+    with a watcher thread, which queues them again once the next request arrives and
+    closes them after ``keepalive_timeout`` idle seconds, so idle clients never hold
+    workers.
+    """
+
+    # Parked connections beyond this many are closed instead.
+    max_idle = 1024
+
+    def __init__(
+        self,
+        server_address: tuple[str, int],
+        handler_class: type[BaseHTTPRequestHandler],
+        workers: int,
+        queue_size: int,
+        keepalive_timeout: float = 10.0,
+    ) -> None:
+        super().__init__(server_address, handler_class)
+        self.workers = workers
+        self.queue_size = queue_size
+        self.keepalive_timeout = keepalive_timeout
+        self._pending: queue.Queue = queue.Queue(maxsize=queue_size)
+        self._parked: queue.SimpleQueue = queue.SimpleQueue()
+        self._wake_reader, self._wake_writer = socket.socketpair()
+        self._wake_reader.setblocking(False)
+        self._worker_threads = [
+            threading.Thread(
+                target=self._serve_worker, name=f"frostsight-worker-{idx}", daemon=True
+            )
+            for idx in range(workers)
+        ]
+        self._watcher_thread = threading.Thread(
+            target=self._watch_idle, name="frostsight-keepalive", daemon=True
+        )
+        for thread in [*self._worker_threads, self._watcher_thread]:
+            thread.start()
+
+    def process_request(self, request: socket.socket, client_address: tuple) -> None:
+        try:
+            self._pending.put_nowait((request, client_address))
+        except queue.Full:
+            self._reject(request)
+
+    def finish_request(
+        self, request: socket.socket, client_address: tuple
+    ) -> BaseHTTPRequestHandler:
+        return self.RequestHandlerClass(request, client_address, self)
+
+    def server_close(self) -> None:
+        super().server_close()
+        for _thread in self._worker_threads:
+            self._pending.put(None)
+        for thread in self._worker_threads:
+            thread.join(timeout=5)
+        self._park(None)
+        self._watcher_thread.join(timeout=5)
+        self._wake_reader.close()
+        self._wake_writer.close()
+
+    def _serve_worker(self) -> None:
+        while True:
+            item = self._pending.get()
+            if item is None:
+                return
+            request, client_address = item
+            keep_alive = False
+            try:
+                handler = self.finish_request(request, client_address)
+                keep_alive = not handler.close_connection
+            except Exception:
+                self.handle_error(request, client_address)
+            if keep_alive:
+                self._park(item)
+            else:
+                self.shutdown_request(request)
+
+    def _park(self, item: tuple[socket.socket, tuple] | None) -> None:
+        self._parked.put(item)
+        try:
+            self._wake_writer.send(b"\0")
+        except OSError:
+            pass
+
+    def _watch_idle(self) -> None:
+        selector = selectors.DefaultSelector()
+        selector.register(self._wake_reader, selectors.EVENT_READ)
+        deadlines: dict[socket.socket, float] = {}
+        while True:
+            timeout = None
+            if deadlines:
+                timeout = max(0.0, min(deadlines.values()) - time.monotonic())
+            for key, _ in selector.select(timeout):
+                if key.fileobj is self._wake_reader:
+                    continue
+                # The next request has started to arrive: back to the worker queue.
+                selector.unregister(key.fileobj)
+                del deadlines[key.fileobj]
+                self.process_request(key.fileobj, key.data)
+            now = time.monotonic()
+            for request in [request for request, due in deadlines.items() if due <= now]:
+                selector.unregister(request)
+                del deadlines[request]
+                self.shutdown_request(request)
+            try:
+                self._wake_reader.recv(4096)
+            except BlockingIOError:
+                pass
+            while True:
+                try:
+                    item = self._parked.get_nowait()
+                except queue.Empty:
+                    break
+                if item is None:
+                    for request in deadlines:
+                        self.shutdown_request(request)
+                    selector.close()
+                    return
+                request, client_address = item
+                if len(deadlines) >= self.max_idle:
+                    self.shutdown_request(request)
+                    continue
+                selector.register(request, selectors.EVENT_READ, client_address)
+                deadlines[request] = now + self.keepalive_timeout
+
+    def _reject(self, request: socket.socket) -> None:
+        body = json.dumps({"detail": "server busy"}).encode("utf-8")
+        head = (
+            "HTTP/1.0 503 Service Unavailable\r\n"
+            "Content-Type: application/json\r\n"
+            f"Content-Length: {len(body)}\r\n"
+            "Retry-After: 1\r\n"
+            "\r\n"
+        )
+        # This runs on the accept thread, so nothing here may block: the response fits in
+        # the socket's send buffer, and only the part of the request that has already
+        # arrived is drained so closing the socket does not reset the connection before
+        # the client has read the response.
+        try:
+            request.setblocking(False)
+            request.sendall(head.encode("latin-1") + body)
+            request.recv(65536)
+        except OSError:
+            pass
+        finally:
+            self.shutdown_request(request)
+
+
+def run_server(
+    host: str = "0.0.0.0",
+    port: int = 8000,
+    workers: int | None = None,
+    queue_size: int | None = None,
+) -> FrostSightServer:
+    settings = get_settings()
+    server = FrostSightServer(
+        (host, port),
+        FrostSightHandler,
+        workers=workers or settings.server_workers,
+        queue_size=queue_size or settings.server_queue_size,
+    )
     return server
 
 
 if __name__ == "__main__":
     ingest_demo_data()
     httpd = run_server()
-    print("FrostSight API running on http://0.0.0.0:8000")
+    print(f"FrostSight API running on http://0.0.0.0:8000 ({httpd.workers} workers)")
     httpd.serve_forever()
@@ -0,0 +1,126 @@
+"""Keyset (cursor) pagination over SQLite tables.
+
+A cursor is an opaque URL-safe token holding the sort key of the last row of a page;
+the next page starts strictly after it, so every page costs one index seek.
+"""
+
+from __future__ import annotations
+
+import base64
+import binascii
+import json
+import sqlite3
+from collections.abc import Iterator, Sequence
+
+# Sort key per table; each must be unique and backed by an index (rowid for ``id``).
+KEYSET_COLUMNS: dict[str, tuple[str, ...]] = {
+    "warehouses": ("id",),
+    "warehouse_metering": ("start_ms", "id"),
+    "query_history": ("start_ms", "id"),
+}
+# Python type of each sort key column; decoded cursor values must match it exactly.
+# start_ms is NULL for an unparseable start_time; such rows sort first, as in SQLite.
+KEY_TYPES: dict[str, type | tuple[type, ...]] = {"id": int, "start_ms": (int, type(None))}
+
+
+class InvalidCursorError(ValueError):
+    pass
+
+
+def encode_cursor(values: Sequence) -> str:
+    raw = json.dumps(list(values), separators=(",", ":")).encode("utf-8")
+    return base64.urlsafe_b64encode(raw).decode("ascii").rstrip("=")
+
+
+def decode_cursor(token: str, types: Sequence[type | tuple[type, ...]]) -> tuple:
+    """The key values in ``token``, which must be one value of each of ``types``.
+
+    Anything else, including a bool or float where an int is expected, is an
+    ``InvalidCursorError``; unchecked values would reach SQLite as mistyped parameters.
+    """
+    try:
+        raw = base64.urlsafe_b64decode(token + "=" * (-len(token) % 4))
+        values = json.loads(raw.decode("utf-8"))
+    except (binascii.Error, UnicodeDecodeError, ValueError) as exc:
+        raise InvalidCursorError(f"Malformed cursor: {token!r}") from exc
+    if not isinstance(values, list) or len(values) != len(types):
+        raise InvalidCursorError(f"Malformed cursor: {token!r}")
+    for value, expected in zip(values, types, strict=True):
+        if type(value) not in (expected if isinstance(expected, tuple) else (expected,)):
+            raise InvalidCursorError(f"Malformed cursor: {token!r}")
+    return tuple(values)
+
+
+class KeysetPage:
+    """Lazily yields up to ``limit`` rows; ``next_cursor`` is known once exhausted."""
+
+    def __init__(self, rows: Iterator[sqlite3.Row], keys: tuple[str, ...], limit: int) -> None:
+        self._rows = rows
+        self._keys = keys
+        self._limit = limit
+        self.next_cursor: str | None = None
+
+    def __iter__(self) -> Iterator[dict]:
+        last: dict | None = None
+        for count, row in enumerate(self._rows):
+            if count == self._limit:
+                if last is not None:
+                    self.next_cursor = encode_cursor([last[key] for key in self._keys])
+                return
+            last = dict(row)
+            yield last
+
+
+def page_query(
+    table: str,
+    limit: int,
+    cursor: str | None,
+    where: Sequence[str] = (),
+    params: Sequence = (),
+) -> tuple[str, tuple]:
+    keys = KEYSET_COLUMNS[table]
+    columns = ", ".join(keys)
+    clauses = list(where)
+    values = list(params)
+    if cursor:
+        after = decode_cursor(cursor, [KEY_TYPES.get(key, str) for key in keys])
+        if after[0] is None:
+            # Within the leading NULL keys: the rest of them, then every non-NULL key.
+            rest = ", ".join(keys[1:])
+            placeholders = ", ".join("?" for _ in keys[1:])
+            clauses.append(
+                f"(({keys[0]} IS NULL AND ({rest}) > ({placeholders})) OR {keys[0]} IS NOT NULL)"
+            )
+            values.extend(after[1:])
+        else:
+            clauses.append(f"({columns}) > ({', '.join('?' for _ in keys)})")
+            values.extend(after)
+    condition = f"WHERE {' AND '.join(clauses)}" if clauses else ""
+    # One extra row tells whether another page follows.
+    sql = f"SELECT * FROM {table} {condition} ORDER BY {columns} LIMIT ?"
+    return sql, (*values, limit + 1)
+
+
+def iter_page(
+    conn: sqlite3.Connection,
+    table: str,
+    limit: int,
+    cursor: str | None,
+    where: Sequence[str] = (),
+    params: Sequence = (),
+) -> KeysetPage:
+    sql, values = page_query(table, limit, cursor, where, params)
+    return KeysetPage(conn.execute(sql, values), KEYSET_COLUMNS[table], limit)
+
+
+def fetch_page(
+    conn: sqlite3.Connection,
+    table: str,
+    limit: int,
+    cursor: str | None,
+    where: Sequence[str] = (),
+    params: Sequence = (),
+) -> tuple[list[dict], str | None]:
+    page = iter_page(conn, table, limit, cursor, where, params)
+    rows = list(page)
+    return rows, page.next_cursor
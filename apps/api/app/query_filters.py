@@ -0,0 +1,55 @@
+"""Translate /api/v1/queries request parameters into parameterized SQL predicates."""
+
+from __future__ import annotations
+
+from datetime import datetime, timedelta
+
+from app.timestamps import to_epoch_ms
+
+# Each equality filter is backed by a (column, start_ms) index created at ingest.
+EQUALITY_FILTERS = ("warehouse_name", "user_name", "role_name")
+
+
+class InvalidFilterError(ValueError):
+    pass
+
+
+def _timestamp(name: str, value: str) -> datetime:
+    try:
+        return datetime.fromisoformat(value)
+    except ValueError as exc:
+        raise InvalidFilterError(f"{name} must be an ISO date or datetime") from exc
+
+
+def query_history_filters(query: dict[str, list[str]]) -> tuple[list[str], list]:
+    """Return WHERE clauses and their parameters for the query_history filters.
+
+    ``start`` is inclusive and ``end`` exclusive; a bare date for ``end`` covers
+    that whole day. Both compare against the integer ``start_ms`` column.
+    """
+    clauses: list[str] = []
+    params: list = []
+    for column in EQUALITY_FILTERS:
+        value = query.get(column, [""])[0]
+        if value:
+            clauses.append(f"{column} = ?")
+            params.append(value)
+    start = query.get("start", [""])[0]
+    if start:
+        clauses.append("start_ms >= ?")
+        params.append(to_epoch_ms(_timestamp("start", start)))
+    end = query.get("end", [""])[0]
+    if end:
+        end_time = _timestamp("end", end)
+        if len(end) == 10:
+            end_time += timedelta(days=1)
+        clauses.append("start_ms < ?")
+        params.append(to_epoch_ms(end_time))
+    min_elapsed = query.get("min_elapsed_ms", [""])[0]
+    if min_elapsed:
+        try:
+            params.append(int(min_elapsed))
+        except ValueError as exc:
+            raise InvalidFilterError("min_elapsed_ms must be an integer") from exc
+        clauses.append("total_elapsed_ms >= ?")
+    return clauses, params
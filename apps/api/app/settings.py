@@ -8,11 +8,25 @@ from dataclasses import dataclass
 class Settings:
     mode: str
     local_dev_token: str
+    server_workers: int
+    server_queue_size: int
+    stream_threshold: int
+    compress_min_bytes: int
 
 
+def _int_env(name: str, default: int) -> int:
+    try:
+        return int(os.getenv(name, str(default)))
+    except ValueError:
+        return default
+
 
 def get_settings() -> Settings:
     return Settings(
         mode=os.getenv("FROSTSIGHT_MODE", "demo"),
         local_dev_token=os.getenv("LOCAL_DEV_TOKEN", "local-dev-token"),
+        server_workers=max(1, _int_env("FROSTSIGHT_WORKERS", 8)),
+        server_queue_size=max(1, _int_env("FROSTSIGHT_QUEUE_SIZE", 64)),
+        stream_threshold=_int_env("FROSTSIGHT_STREAM_THRESHOLD", 1000),
+        compress_min_bytes=_int_env("FROSTSIGHT_COMPRESS_MIN_BYTES", 1024),
     )
@@ -0,0 +1,103 @@
+"""Mergeable quantile sketches for latency percentiles.
+
+``QuantileSketch`` follows DDSketch: positive values are counted in logarithmic bins, so
+any value read back is within ``relative_accuracy`` of the exact one, memory depends on
+the value range rather than the row count, and merging two sketches just adds counts.
+"""
+
+from __future__ import annotations
+
+import math
+from collections.abc import Iterable
+
+DEFAULT_RELATIVE_ACCURACY = 0.01
+
+
+class QuantileSketch:
+    """Counts of values in bins ``(gamma**(i - 1), gamma**i]``; values <= 0 count as 0.
+
+    ``value_at_rank`` returns the bin's midpoint in relative terms, clamped to the exact
+    minimum and maximum, so it is within ``relative_accuracy`` of the value at that rank;
+    the last rank returns the exact maximum.
+    """
+
+    def __init__(self, relative_accuracy: float = DEFAULT_RELATIVE_ACCURACY) -> None:
+        if not 0 < relative_accuracy < 1:
+            raise ValueError("relative_accuracy must be between 0 and 1")
+        self.relative_accuracy = relative_accuracy
+        self._gamma = (1 + relative_accuracy) / (1 - relative_accuracy)
+        self._log_gamma = math.log(self._gamma)
+        self.bins: dict[int, int] = {}
+        self.zero_count = 0
+        self.count = 0
+        self.min = math.inf
+        self.max = -math.inf
+
+    def __len__(self) -> int:
+        return self.count
+
+    def add(self, value: float) -> None:
+        self.update((value,))
+
+    def update(self, values: Iterable[float]) -> None:
+        bins, log, log_gamma = self.bins, math.log, self._log_gamma
+        low, high, count, zeros = self.min, self.max, self.count, self.zero_count
+        for value in values:
+            count += 1
+            if value < low:
+                low = value
+            if value > high:
+                high = value
+            if value > 0:
+                index = math.ceil(log(value) / log_gamma)
+                bins[index] = bins.get(index, 0) + 1
+            else:
+                zeros += 1
+        self.min, self.max, self.count, self.zero_count = low, high, count, zeros
+
+    def merge(self, other: QuantileSketch) -> None:
+        if other.relative_accuracy != self.relative_accuracy:
+            raise ValueError("cannot merge sketches with different relative accuracy")
+        for index, count in other.bins.items():
+            self.bins[index] = self.bins.get(index, 0) + count
+        self.zero_count += other.zero_count
+        self.count += other.count
+        self.min = min(self.min, other.min)
+        self.max = max(self.max, other.max)
+
+    def value_at_rank(self, rank: int) -> float:
+        """Approximate value of the ``rank``-th smallest value, counting from 0."""
+        if not 0 <= rank < self.count:
+            raise IndexError("rank out of range")
+        if rank == self.count - 1:
+            return float(self.max)
+        if rank < self.zero_count:
+            value = 0.0
+        else:
+            seen = self.zero_count
+            for index in sorted(self.bins):
+                seen += self.bins[index]
+                if rank < seen:
+                    break
+            value = 2 * self._gamma**index / (self._gamma + 1)
+        return float(min(max(value, self.min), self.max))
+
+    def to_dict(self) -> dict:
+        return {
+            "relative_accuracy": self.relative_accuracy,
+            "count": self.count,
+            "zero_count": self.zero_count,
+            "min": self.min if self.count else None,
+            "max": self.max if self.count else None,
+            "bins": {str(index): count for index, count in sorted(self.bins.items())},
+        }
+
+    @classmethod
+    def from_dict(cls, data: dict) -> QuantileSketch:
+        sketch = cls(data["relative_accuracy"])
+        sketch.bins = {int(index): count for index, count in data["bins"].items()}
+        sketch.zero_count = data["zero_count"]
+        sketch.count = data["count"]
+        if sketch.count:
+            sketch.min, sketch.max = data["min"], data["max"]
+        return sketch
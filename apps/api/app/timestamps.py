@@ -0,0 +1,60 @@
+"""Integer epoch-millisecond timestamps stored next to the ISO text columns.
+
+Ingested tables derive ``*_ms`` and ``day`` columns from their ISO timestamps once, at
+insert time, so analytics and filters compare integers instead of parsing strings.
+Naive timestamps are taken to be UTC, like Snowflake's ACCOUNT_USAGE views.
+"""
+
+from __future__ import annotations
+
+from datetime import UTC, date, datetime, timedelta
+
+DAY_MS = 86_400_000
+_EPOCH = datetime(1970, 1, 1)
+_EPOCH_DATE = _EPOCH.date()
+
+
+def epoch_ms_sql(column: str) -> str:
+    """SQL expression for ``column``'s epoch milliseconds; usable in generated columns.
+
+    Sub-millisecond digits are truncated, as in ``to_epoch_ms``. SQLite's date functions
+    round them instead (``:59.9999`` becomes the next second), so the fraction is cut out
+    of the text before the whole seconds are parsed. SQLite also only understands
+    ``±HH:MM`` offsets, so the ``±HHMM`` and ``±HH`` forms ``fromisoformat`` accepts are
+    rewritten to it.
+    """
+    fraction = f"substr({column}, 21)"
+    # Whatever follows the fraction's digits: a time zone suffix or nothing.
+    suffix = f"ltrim({fraction}, '0123456789')"
+    digits = f"substr({fraction}, 1, length({fraction}) - length({suffix}))"
+    has_fraction = f"substr({column}, 20, 1) = '.'"
+    zone = f"CASE WHEN {has_fraction} THEN {suffix} ELSE substr({column}, 20) END"
+    offset = f"substr({zone}, 1, 1) IN ('+', '-')"
+    zone = (
+        f"CASE WHEN {offset} AND length({zone}) = 5"
+        f" THEN substr({zone}, 1, 3) || ':' || substr({zone}, 4)"
+        f" WHEN {offset} AND length({zone}) = 3 THEN {zone} || ':00'"
+        f" ELSE {zone} END"
+    )
+    seconds = f"substr({column}, 1, 19) || {zone}"
+    millis = f"CASE WHEN {has_fraction} THEN CAST(substr({digits} || '00', 1, 3) AS INTEGER) END"
+    return f"CAST(strftime('%s', {seconds}) AS INTEGER) * 1000 + COALESCE({millis}, 0)"
+
+
+def to_epoch_ms(value: str | datetime) -> int:
+    moment = datetime.fromisoformat(value) if isinstance(value, str) else value
+    if moment.tzinfo is not None:
+        moment = moment.astimezone(UTC).replace(tzinfo=None)
+    return (moment - _EPOCH) // timedelta(milliseconds=1)
+
+
+def epoch_day(epoch_ms: int) -> int:
+    return epoch_ms // DAY_MS
+
+
+def day_to_date(day: int) -> date:
+    return _EPOCH_DATE + timedelta(days=day)
+
+
+def date_to_day(value: date) -> int:
+    return (value - _EPOCH_DATE).days
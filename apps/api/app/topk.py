@@ -0,0 +1,89 @@
+"""Bounded-heap top-K selection over streams of rows."""
+
+from __future__ import annotations
+
+import heapq
+import math
+from collections.abc import Callable, Hashable, Iterable
+from typing import Generic, TypeVar
+
+T = TypeVar("T")
+
+
+class TopK(Generic[T]):
+    """The ``k`` highest-scoring items seen, in O(k) memory and O(log k) per kept item.
+
+    Ties go to the item offered first, so ``items()`` equals the first ``k`` of a stable
+    descending sort on the score. Heap entries are ``(score, -arrival, item)``; arrivals
+    are unique, so items themselves are never compared.
+
+    ``floor`` is the score an item must exceed to be kept (``-inf`` until ``k`` items are
+    held), so hot loops can skip ``offer`` calls for most rows.
+    """
+
+    def __init__(self, k: int, key: Callable[[T], float] | None = None) -> None:
+        self.k = k
+        self.key = key
+        self._heap: list[tuple[float, int, T]] = []
+        self._count = 0
+        self.floor = -math.inf if k > 0 else math.inf
+
+    def __len__(self) -> int:
+        return len(self._heap)
+
+    def offer(self, score: float, item: T) -> None:
+        """Consider ``item`` with an already computed ``score``."""
+        heap = self._heap
+        if len(heap) < self.k:
+            heapq.heappush(heap, (score, -self._count, item))
+            if len(heap) == self.k:
+                self.floor = heap[0][0]
+        # A full heap only takes strictly larger scores: earlier items win ties.
+        elif score > self.floor:
+            heapq.heapreplace(heap, (score, -self._count, item))
+            self.floor = heap[0][0]
+        self._count += 1
+
+    def update(self, items: Iterable[T]) -> None:
+        # offer() inlined, scoring with ``key``: this loop runs once per row.
+        heap, k, key, count, floor = self._heap, self.k, self.key, self._count, self.floor
+        push, replace = heapq.heappush, heapq.heapreplace
+        for item in items:
+            score = key(item)
+            if score > floor or len(heap) < k:
+                if len(heap) < k:
+                    push(heap, (score, -count, item))
+                    if len(heap) == k:
+                        floor = heap[0][0]
+                else:
+                    replace(heap, (score, -count, item))
+                    floor = heap[0][0]
+            count += 1
+        self._count, self.floor = count, floor
+
+    def items(self) -> list[T]:
+        """Kept items, highest score first."""
+        return [item for *_, item in sorted(self._heap, reverse=True)]
+
+
+class GroupedTopK(Generic[T]):
+    """A ``TopK`` per group (e.g. per warehouse or user), filled in one pass."""
+
+    def __init__(self, k: int, key: Callable[[T], float], group: Callable[[T], Hashable]) -> None:
+        self.k = k
+        self.key = key
+        self.group = group
+        self._groups: dict[Hashable, TopK[T]] = {}
+
+    def update(self, items: Iterable[T]) -> None:
+        groups, key, group = self._groups, self.key, self.group
+        for item in items:
+            name = group(item)
+            top = groups.get(name)
+            if top is None:
+                top = groups[name] = TopK(self.k)
+            top.offer(key(item), item)
+
+    def items(self) -> dict[Hashable, list[T]]:
+        """Kept items per group, groups in first-seen order."""
+        return {name: top.items() for name, top in self._groups.items()}
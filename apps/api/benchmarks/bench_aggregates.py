@@ -0,0 +1,49 @@
+"""Compare Python and SQLite-pushed-down credit aggregation.
+
+PYTHONPATH=apps/api python apps/api/benchmarks/bench_aggregates.py --rows 10000000
+"""
+
+from __future__ import annotations
+
+import argparse
+import sqlite3
+import time
+from pathlib import Path
+from tempfile import TemporaryDirectory
+
+from synthetic import load_table, metering_rows
+
+from app.aggregates import daily_credits, warehouse_hotspots
+from app.analytics import calculate_daily_credits, calculate_warehouse_hotspots
+
+
+def _timed(label: str, func) -> None:
+    started = time.perf_counter()
+    func()
+    print(f"{label:<28} {time.perf_counter() - started:>8.2f}s")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, default=10_000_000)
+    args = parser.parse_args()
+
+    with TemporaryDirectory() as temp_dir:
+        conn = sqlite3.connect(Path(temp_dir) / "bench.db")
+        conn.row_factory = sqlite3.Row
+        started = time.perf_counter()
+        load_table(conn, "warehouse_metering", metering_rows(args.rows))
+        print(f"loaded {args.rows:,} metering rows in {time.perf_counter() - started:.1f}s")
+
+        def python_rows():
+            return (dict(row) for row in conn.execute("SELECT * FROM warehouse_metering"))
+
+        _timed("python daily credits", lambda: calculate_daily_credits(python_rows()))
+        _timed("sqlite daily credits", lambda: daily_credits(conn))
+        _timed("python warehouse hotspots", lambda: calculate_warehouse_hotspots(python_rows()))
+        _timed("sqlite warehouse hotspots", lambda: warehouse_hotspots(conn))
+        conn.close()
+
+
+if __name__ == "__main__":
+    main()
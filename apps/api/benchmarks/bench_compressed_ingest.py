@@ -0,0 +1,80 @@
+"""Compare ingest of plain CSV exports against gzip, bz2 and xz compressed ones.
+
+    PYTHONPATH=apps/api python apps/api/benchmarks/bench_compressed_ingest.py --rows 1000000
+
+Reads come from /proc/self/io (Linux): ``rchar`` counts every byte this process read,
+including SQLite's own page reads, and ``read_bytes`` only what missed the page cache.
+"""
+
+from __future__ import annotations
+
+import argparse
+import bz2
+import gzip
+import lzma
+import os
+import shutil
+import time
+from pathlib import Path
+from tempfile import TemporaryDirectory
+
+from synthetic import query_rows, write_csv
+
+from app.ingest import ingest_csvs
+
+DEMO_DIR = Path(__file__).resolve().parents[3] / "data" / "demo"
+OPENERS = {
+    "plain": None,
+    "gzip": lambda path: gzip.open(f"{path}.gz", "wb", compresslevel=6),
+    "bz2": lambda path: bz2.open(f"{path}.bz2", "wb"),
+    "xz": lambda path: lzma.open(f"{path}.xz", "wb", preset=1),
+}
+
+
+def _io_counters() -> dict[str, int]:
+    try:
+        with open("/proc/self/io") as handle:
+            return {name: int(value) for name, value in (line.split(": ") for line in handle)}
+    except OSError:
+        return {}
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    args = parser.parse_args()
+
+    with TemporaryDirectory() as temp_dir:
+        source = Path(temp_dir) / "source"
+        shutil.copytree(DEMO_DIR, source, ignore=shutil.ignore_patterns("*.db*"))
+        write_csv(source / "query_history.csv", query_rows(args.rows))
+
+        print(f"{'format':<8} {'size':>10} {'ingest':>9} {'rchar':>10} {'read_bytes':>11}")
+        for label, opener in OPENERS.items():
+            data_dir = Path(temp_dir) / label
+            shutil.copytree(source, data_dir)
+            if opener is not None:
+                for path in data_dir.glob("*.csv"):
+                    with path.open("rb") as plain, opener(path) as packed:
+                        shutil.copyfileobj(plain, packed, 1024 * 1024)
+                    path.unlink()
+            size = sum(path.stat().st_size for path in data_dir.iterdir())
+            os.environ["FROSTSIGHT_DB_PATH"] = str(Path(temp_dir) / f"{label}.db")
+            before = _io_counters()
+            started = time.perf_counter()
+            ingest_csvs(data_dir)
+            elapsed = time.perf_counter() - started
+            after = _io_counters()
+            rchar, read_bytes = (
+                (after.get(name, 0) - before.get(name, 0)) / 2**20
+                for name in ("rchar", "read_bytes")
+            )
+            print(
+                f"{label:<8} {size / 2**20:>8.1f}MB {elapsed:>8.2f}s"
+                f" {rchar:>8.1f}MB {read_bytes:>9.1f}MB"
+            )
+            shutil.rmtree(data_dir)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,71 @@
+"""Compare default and bulk-load CSV ingest throughput, then incremental reloads.
+
+PYTHONPATH=apps/api python apps/api/benchmarks/bench_ingest.py --rows 10000000
+"""
+
+from __future__ import annotations
+
+import argparse
+import os
+import shutil
+import time
+from collections.abc import Iterator
+from datetime import timedelta
+from itertools import chain
+from pathlib import Path
+from tempfile import TemporaryDirectory
+
+from synthetic import BASE_TIME, query_rows, write_csv
+
+from app.ingest import ingest_csvs
+
+DEMO_DIR = Path(__file__).resolve().parents[3] / "data" / "demo"
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, default=10_000_000)
+    parser.add_argument("--delta", type=int, default=100_000)
+    args = parser.parse_args()
+
+    with TemporaryDirectory() as temp_dir:
+        data_dir = Path(temp_dir) / "data"
+        shutil.copytree(DEMO_DIR, data_dir, ignore=shutil.ignore_patterns("*.db*"))
+        started = time.perf_counter()
+        write_csv(data_dir / "query_history.csv", query_rows(args.rows))
+        print(f"wrote {args.rows:,} query rows in {time.perf_counter() - started:.1f}s")
+
+        for label, bulk_load in (("default", False), ("bulk load", True)):
+            os.environ["FROSTSIGHT_DB_PATH"] = str(Path(temp_dir) / f"{label}.db")
+            started = time.perf_counter()
+            ingest_csvs(data_dir, bulk_load=bulk_load)
+            elapsed = time.perf_counter() - started
+            print(f"{label:<12} {elapsed:>8.2f}s {args.rows / elapsed:>12,.0f} rows/s")
+
+        def delta(day: int) -> Iterator[dict]:
+            return query_rows(
+                args.delta,
+                days=1,
+                seed=day,
+                base_time=BASE_TIME + timedelta(days=day),
+                first_id=args.rows + (day - 364) * args.delta,
+            )
+
+        def incremental(label: str) -> None:
+            started = time.perf_counter()
+            ingest_csvs(data_dir, incremental=True)
+            elapsed = time.perf_counter() - started
+            print(f"{label:<12} {elapsed:>8.2f}s {args.delta / elapsed:>12,.0f} rows/s")
+
+        # Loaded into the last database: a day appended to the same export, the same
+        # file again, then a rewritten export overlapping the stored day by one day.
+        path = data_dir / "query_history.csv"
+        write_csv(path, delta(365), append=True)
+        incremental("incremental")
+        incremental("unchanged")
+        write_csv(path, chain(delta(365), delta(366)))
+        incremental("overlapping")
+
+
+if __name__ == "__main__":
+    main()
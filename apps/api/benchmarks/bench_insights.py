@@ -0,0 +1,59 @@
+"""Time full-history query insights pushed down into SQLite.
+
+PYTHONPATH=apps/api python apps/api/benchmarks/bench_insights.py --rows 5000000
+"""
+
+from __future__ import annotations
+
+import argparse
+import sqlite3
+import time
+from pathlib import Path
+from tempfile import TemporaryDirectory
+
+from synthetic import load_table, query_rows
+
+from app import aggregates
+from app.ingest import INDEXES
+from app.query_filters import query_history_filters
+
+
+def _timed(label: str, func) -> None:
+    started = time.perf_counter()
+    func()
+    print(f"{label:<34} {time.perf_counter() - started:>8.2f}s")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, default=5_000_000)
+    parser.add_argument("--days", type=int, default=365)
+    args = parser.parse_args()
+
+    with TemporaryDirectory() as temp_dir:
+        conn = sqlite3.connect(Path(temp_dir) / "bench.db")
+        started = time.perf_counter()
+        load_table(conn, "query_history", query_rows(args.rows, days=args.days))
+        for index_name, columns in INDEXES["query_history"]:
+            conn.execute(f"CREATE INDEX {index_name} ON query_history ({columns})")
+        conn.execute("ANALYZE")
+        print(f"loaded {args.rows:,} query rows in {time.perf_counter() - started:.1f}s")
+
+        _timed("latency trend (full history)", lambda: aggregates.latency_trend(conn))
+        _timed("regressions (full history)", lambda: aggregates.query_regressions(conn))
+        _timed("top expensive (full history)", lambda: aggregates.top_expensive(conn))
+        _timed("latest-day p95 (overview)", lambda: aggregates.latest_latency(conn))
+        where, params = query_history_filters({"start": ["2024-03-01"], "end": ["2024-03-31"]})
+        _timed(
+            "all insights (30-day window)",
+            lambda: (
+                aggregates.latency_trend(conn, where, params),
+                aggregates.query_regressions(conn, where, params),
+                aggregates.top_expensive(conn, where, params),
+            ),
+        )
+        conn.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,168 @@
+"""Compare the NumPy analytics backend with the pure-Python reference.
+
+    PYTHONPATH=apps/api python apps/api/benchmarks/bench_numpy_analytics.py \
+        --rows 1000000 10000000 50000000
+
+Columns are generated directly as arrays (lists of dicts would not fit in memory at
+50M rows), so the NumPy timings are compute only. Up to ``--python-max`` rows the same
+data is also turned into row dicts and run through ``app.analytics`` and the row-based
+NumPy wrappers, which include building the columns, and the results are compared;
+anomalies are compared on a series of up to ``--python-max`` days.
+"""
+
+from __future__ import annotations
+
+import argparse
+import gc
+import time
+from functools import partial
+
+import numpy as np
+from synthetic import BASE_TIME, WAREHOUSES
+
+from app import analytics, analytics_numpy
+from app.analytics import DailyCredits
+from app.analytics_numpy import MeteringColumns, QueryColumns
+from app.timestamps import DAY_MS, day_to_date, to_epoch_ms
+
+DAYS = 365
+
+
+def _timed(label: str, func) -> object:
+    started = time.perf_counter()
+    result = func()
+    print(f"  {label:<50} {time.perf_counter() - started:>8.2f}s")
+    return result
+
+
+def _start_ms(rng, count: int):
+    # Evenly spaced slots with jitter, in time order like an ingested export.
+    step = DAYS * DAY_MS // count
+    return (
+        to_epoch_ms(BASE_TIME)
+        + np.arange(count, dtype=np.int64) * step
+        + rng.integers(0, max(step, 1), count)
+    )
+
+
+def _query_columns(count: int) -> QueryColumns:
+    rng = np.random.default_rng(42)
+    start_ms = _start_ms(rng, count)
+    return QueryColumns(
+        start_ms=start_ms,
+        day=start_ms // DAY_MS,
+        elapsed_ms=rng.integers(50, 4501, count),
+        warehouse=rng.integers(0, len(WAREHOUSES), count, dtype=np.int32),
+        warehouse_names=list(WAREHOUSES),
+    )
+
+
+def _metering_columns(count: int) -> MeteringColumns:
+    rng = np.random.default_rng(43)
+    return MeteringColumns(
+        day=_start_ms(rng, count) // DAY_MS,
+        credits_used=np.round(rng.uniform(0.1, 16.0, count), 2),
+        warehouse=rng.integers(0, len(WAREHOUSES), count, dtype=np.int32),
+        warehouse_names=list(WAREHOUSES),
+    )
+
+
+def _compare(label: str, python, vectorized) -> None:
+    expected = _timed(f"python  {label}", python)
+    actual = _timed(f"numpy   {label}", vectorized)
+    print(f"  {'results match' if actual == expected else 'RESULTS DIFFER'}")
+
+
+def _bench_queries(count: int, python_max: int) -> None:
+    columns = _query_columns(count)
+    _timed("numpy   p95 latency trend", partial(analytics_numpy.latency_trend_columns, columns))
+    _timed("numpy   regressions", partial(analytics_numpy.query_regressions_columns, columns))
+    _timed(
+        "numpy   top 10 by elapsed", partial(analytics_numpy.top_indices, columns.elapsed_ms, 10)
+    )
+    if count <= python_max:
+        rows = [
+            {
+                "query_id": f"Q{index}",
+                "warehouse_name": WAREHOUSES[warehouse],
+                "user_name": "ava",
+                "start_ms": start_ms,
+                "day": day,
+                "total_elapsed_ms": elapsed,
+                "bytes_scanned": 0,
+                "query_text": "select 1",
+            }
+            for index, (start_ms, day, elapsed, warehouse) in enumerate(
+                zip(
+                    columns.start_ms.tolist(),
+                    columns.day.tolist(),
+                    columns.elapsed_ms.tolist(),
+                    columns.warehouse.tolist(),
+                    strict=True,
+                )
+            )
+        ]
+        names = ("calculate_p95_latency_trend", "find_query_regressions", "top_expensive_queries")
+        for name in names:
+            _compare(
+                name,
+                partial(getattr(analytics, name), rows),
+                partial(getattr(analytics_numpy, name), rows),
+            )
+        del rows
+    del columns
+    gc.collect()
+
+
+def _bench_metering(count: int, python_max: int) -> None:
+    columns = _metering_columns(count)
+    _timed("numpy   daily credits", partial(analytics_numpy.daily_credits_columns, columns))
+    _timed("numpy   hotspots", partial(analytics_numpy.warehouse_hotspots_columns, columns))
+    # A year of days is too short to time, so the anomaly detectors get a long series.
+    length = min(count, python_max)
+    first_day = int(columns.day[0])
+    series = [
+        DailyCredits(day_to_date(first_day + offset), credits)
+        for offset, credits in enumerate(columns.credits_used[:length].tolist())
+    ]
+    _compare(
+        f"detect_cost_anomalies ({length:,} days)",
+        partial(analytics.detect_cost_anomalies, series),
+        partial(analytics_numpy.detect_cost_anomalies, series),
+    )
+    del series
+    if count <= python_max:
+        rows = [
+            {"warehouse_name": WAREHOUSES[warehouse], "day": day, "credits_used": credits}
+            for day, credits, warehouse in zip(
+                columns.day.tolist(),
+                columns.credits_used.tolist(),
+                columns.warehouse.tolist(),
+                strict=True,
+            )
+        ]
+        for name in ("calculate_daily_credits", "calculate_warehouse_hotspots"):
+            _compare(
+                name,
+                partial(getattr(analytics, name), rows),
+                partial(getattr(analytics_numpy, name), rows),
+            )
+        del rows
+    del columns
+    gc.collect()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, nargs="+", default=[1_000_000])
+    parser.add_argument("--python-max", type=int, default=1_000_000)
+    args = parser.parse_args()
+    for count in args.rows:
+        print(f"{count:,} query rows")
+        _bench_queries(count, args.python_max)
+        print(f"{count:,} metering rows")
+        _bench_metering(count, args.python_max)
+
+
+if __name__ == "__main__":
+    main()
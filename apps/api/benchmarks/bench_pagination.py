@@ -0,0 +1,67 @@
+"""Page latency at increasing depth: LIMIT/OFFSET vs keyset cursors on query_history.
+
+PYTHONPATH=apps/api python apps/api/benchmarks/bench_pagination.py --rows 5000000
+"""
+
+from __future__ import annotations
+
+import argparse
+import sqlite3
+import time
+from pathlib import Path
+from tempfile import TemporaryDirectory
+
+from synthetic import load_table, query_rows
+
+from app.ingest import INDEXES
+from app.pagination import encode_cursor, fetch_page
+
+
+def _best_of(func, repeat: int = 3) -> float:
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - started)
+    return min(timings) * 1000
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, default=5_000_000)
+    parser.add_argument("--limit", type=int, default=100)
+    args = parser.parse_args()
+
+    with TemporaryDirectory() as temp_dir:
+        conn = sqlite3.connect(Path(temp_dir) / "bench.db")
+        conn.row_factory = sqlite3.Row
+        load_table(conn, "query_history", query_rows(args.rows))
+        for index_name, columns in INDEXES["query_history"]:
+            conn.execute(f"CREATE INDEX {index_name} ON query_history ({columns})")
+
+        print(f"{'depth':>12} {'offset ms':>10} {'cursor ms':>10}")
+        depth = 0
+        while depth < args.rows:
+            if depth:
+                start_ms, row_id = conn.execute(
+                    "SELECT start_ms, id FROM query_history ORDER BY start_ms, id LIMIT 1 OFFSET ?",
+                    (depth - 1,),
+                ).fetchone()
+                cursor = encode_cursor([start_ms, row_id])
+            else:
+                cursor = None
+            offset_ms = _best_of(
+                lambda depth=depth: conn.execute(
+                    "SELECT * FROM query_history LIMIT ? OFFSET ?", (args.limit, depth)
+                ).fetchall()
+            )
+            cursor_ms = _best_of(
+                lambda cursor=cursor: fetch_page(conn, "query_history", args.limit, cursor)
+            )
+            print(f"{depth:>12,} {offset_ms:>10.2f} {cursor_ms:>10.2f}")
+            depth = depth * 10 if depth else 1000
+        conn.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,49 @@
+"""Measure parallel CSV ingest speedup against the number of worker processes.
+
+PYTHONPATH=apps/api python apps/api/benchmarks/bench_parallel_ingest.py --rows 2000000
+"""
+
+from __future__ import annotations
+
+import argparse
+import os
+import shutil
+import time
+from pathlib import Path
+from tempfile import TemporaryDirectory
+
+from synthetic import query_rows, write_csv
+
+from app.ingest import ingest_csvs
+
+DEMO_DIR = Path(__file__).resolve().parents[3] / "data" / "demo"
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, default=2_000_000)
+    parser.add_argument("--workers", default="1,2,4,8", help="comma-separated worker counts")
+    args = parser.parse_args()
+    counts = [int(value) for value in args.workers.split(",")]
+    print(f"{os.cpu_count()} CPUs available")
+
+    with TemporaryDirectory() as temp_dir:
+        data_dir = Path(temp_dir) / "data"
+        shutil.copytree(DEMO_DIR, data_dir, ignore=shutil.ignore_patterns("*.db*"))
+        write_csv(data_dir / "query_history.csv", query_rows(args.rows))
+
+        baseline = None
+        for workers in counts:
+            os.environ["FROSTSIGHT_DB_PATH"] = str(Path(temp_dir) / f"workers-{workers}.db")
+            started = time.perf_counter()
+            ingest_csvs(data_dir, workers=workers)
+            elapsed = time.perf_counter() - started
+            baseline = baseline or elapsed
+            print(
+                f"workers={workers:<3} {elapsed:>8.2f}s {args.rows / elapsed:>12,.0f} rows/s"
+                f" {baseline / elapsed:>6.2f}x"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,104 @@
+"""Compare the separate query insight functions with the single-pass aggregator.
+
+    PYTHONPATH=apps/api python apps/api/benchmarks/bench_query_insights.py --rows 1000000
+
+The separate functions need the rows materialized as a list (four passes over it); the
+aggregator consumes the SQLite cursor directly. ``--memory`` also reports peak traced
+allocations, which slows both runs down. The sketching aggregator (1% relative accuracy)
+is timed too, with its largest p95 deviation from the exact trend.
+"""
+
+from __future__ import annotations
+
+import argparse
+import sqlite3
+import time
+import tracemalloc
+from pathlib import Path
+from tempfile import TemporaryDirectory
+
+from synthetic import load_table, query_rows
+
+from app.analytics import (
+    calculate_p95_latency_trend,
+    find_query_regressions,
+    query_insights,
+    top_expensive_queries,
+)
+from app.sketches import DEFAULT_RELATIVE_ACCURACY
+
+
+def _timed(label: str, func, memory: bool) -> object:
+    if memory:
+        tracemalloc.start()
+    started = time.perf_counter()
+    result = func()
+    elapsed = time.perf_counter() - started
+    peak = ""
+    if memory:
+        peak = f" {tracemalloc.get_traced_memory()[1] / 2**20:>8.1f}MB peak"
+        tracemalloc.stop()
+    print(f"{label:<28} {elapsed:>8.2f}s{peak}")
+    return result
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    parser.add_argument("--memory", action="store_true")
+    args = parser.parse_args()
+
+    with TemporaryDirectory() as temp_dir:
+        conn = sqlite3.connect(Path(temp_dir) / "bench.db")
+        conn.row_factory = sqlite3.Row
+        started = time.perf_counter()
+        load_table(conn, "query_history", query_rows(args.rows))
+        print(f"loaded {args.rows:,} query rows in {time.perf_counter() - started:.1f}s")
+
+        def python_rows():
+            return (dict(row) for row in conn.execute("SELECT * FROM query_history"))
+
+        def separate(rows: list[dict]) -> tuple:
+            return (
+                calculate_p95_latency_trend(rows),
+                find_query_regressions(rows),
+                top_expensive_queries(rows),
+            )
+
+        def single_pass(rows, relative_accuracy: float | None = None) -> tuple:
+            insights = query_insights(rows, relative_accuracy=relative_accuracy)
+            return insights.latency_trend, insights.regressions, insights.top_expensive
+
+        expected = _timed(
+            "separate functions (list)", lambda: separate(list(python_rows())), args.memory
+        )
+        actual = _timed("single pass (cursor)", lambda: single_pass(python_rows()), args.memory)
+        print("results match" if actual == expected else "RESULTS DIFFER")
+        sketched = _timed(
+            "single pass, sketched",
+            lambda: single_pass(python_rows(), DEFAULT_RELATIVE_ACCURACY),
+            args.memory,
+        )
+        deviation = max(
+            (
+                abs(point.p95_ms - exact.p95_ms) / exact.p95_ms
+                for point, exact in zip(sketched[0], expected[0], strict=True)
+                if exact.p95_ms
+            ),
+            default=0.0,
+        )
+        print(f"sketched p95 max relative deviation {deviation:.4%}")
+        # The same work without fetching rows from SQLite.
+        rows = list(python_rows())
+        _timed("separate functions, compute", lambda: separate(rows), False)
+        _timed("single pass, compute", lambda: single_pass(rows), False)
+        _timed(
+            "sketched, compute",
+            lambda: single_pass(rows, DEFAULT_RELATIVE_ACCURACY),
+            False,
+        )
+        conn.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,72 @@
+"""Load test for the FrostSight API server.
+
+Fires concurrent requests at one endpoint for several worker counts and reports
+requests/second. ``{offset}`` in ``--path`` is replaced by a different page offset for
+each request; the default pages through ``/api/v1/queries``, which is not kept in the
+response cache, so every request runs its query. For example::
+
+    PYTHONPATH=apps/api python apps/api/benchmarks/bench_server.py --workers 1 2 4 8
+"""
+
+from __future__ import annotations
+
+import argparse
+import os
+import threading
+import time
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from tempfile import TemporaryDirectory
+
+from app.ingest import ingest_demo_data
+from app.main import run_server
+
+PAGE_SIZE = 50
+# Offsets cycle below the demo data's 1,800 query_history rows.
+MAX_OFFSET = 1800
+
+
+def _fetch(url: str) -> None:
+    request = urllib.request.Request(url)
+    request.add_header("Authorization", "Bearer local-dev-token")
+    with urllib.request.urlopen(request, timeout=30) as response:
+        response.read()
+
+
+def measure(workers: int, path: str, requests: int, clients: int) -> float:
+    server = run_server("127.0.0.1", 0, workers=workers, queue_size=max(clients, 1) * 2)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    base = f"http://127.0.0.1:{server.server_port}"
+    urls = [base + path.format(offset=index * PAGE_SIZE % MAX_OFFSET) for index in range(requests)]
+    try:
+        started = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=clients) as pool:
+            list(pool.map(_fetch, urls))
+        return requests / (time.perf_counter() - started)
+    finally:
+        server.shutdown()
+        server.server_close()
+        thread.join()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4, 8])
+    parser.add_argument("--path", default=f"/api/v1/queries?limit={PAGE_SIZE}&offset={{offset}}")
+    parser.add_argument("--requests", type=int, default=200)
+    parser.add_argument("--clients", type=int, default=16)
+    args = parser.parse_args()
+
+    with TemporaryDirectory() as temp_dir:
+        os.environ["FROSTSIGHT_DB_PATH"] = str(Path(temp_dir) / "bench.db")
+        ingest_demo_data()
+        print(f"{'workers':>8} {'req/s':>10}")
+        for workers in args.workers:
+            rate = measure(workers, args.path, args.requests, args.clients)
+            print(f"{workers:>8} {rate:>10.1f}")
+
+
+if __name__ == "__main__":
+    main()
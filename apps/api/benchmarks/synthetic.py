@@ -0,0 +1,80 @@
+"""Deterministic synthetic ACCOUNT_USAGE-like rows for the benchmarks."""
+
+from __future__ import annotations
+
+import csv
+import random
+import sqlite3
+from collections.abc import Iterator
+from datetime import datetime, timedelta
+from pathlib import Path
+
+from app.ingest import TABLES
+
+BASE_TIME = datetime(2024, 1, 1)
+WAREHOUSES = ["WH_CORE", "WH_ANALYTICS", "WH_INGEST", "WH_SCIENCE", "WH_FINOPS"]
+USERS = ["ava", "ben", "chloe", "diego", "ellen", "frank"]
+ROLES = ["SYSADMIN", "ANALYST", "DATA_ENGINEER", "SECURITY", "FINOPS"]
+
+
+def metering_rows(count: int, days: int = 365, seed: int = 42) -> Iterator[dict]:
+    rng = random.Random(seed)
+    # Evenly spaced slots keep (warehouse_name, start_time), the natural key, unique.
+    step = days * 24 * 3600 * 1000 // max(count, 1)
+    for idx in range(count):
+        start = BASE_TIME + timedelta(milliseconds=idx * step + rng.randrange(step or 1))
+        yield {
+            "warehouse_name": rng.choice(WAREHOUSES),
+            "start_time": start.isoformat(),
+            "end_time": (start + timedelta(hours=1)).isoformat(),
+            "credits_used": round(rng.uniform(0.1, 16.0), 2),
+        }
+
+
+def query_rows(
+    count: int,
+    days: int = 365,
+    seed: int = 42,
+    base_time: datetime = BASE_TIME,
+    first_id: int = 0,
+) -> Iterator[dict]:
+    rng = random.Random(seed)
+    step = days * 24 * 3600 * 1000 // max(count, 1)
+    for idx in range(count):
+        start = base_time + timedelta(milliseconds=idx * step + rng.randrange(step or 1))
+        elapsed = rng.randint(50, 4500)
+        user = rng.choice(USERS)
+        yield {
+            "query_id": f"Q{first_id + idx:09d}",
+            "warehouse_name": rng.choice(WAREHOUSES),
+            "user_name": user,
+            "role_name": rng.choice(ROLES),
+            "start_time": start.isoformat(),
+            "end_time": (start + timedelta(milliseconds=elapsed)).isoformat(),
+            "total_elapsed_ms": elapsed,
+            "bytes_scanned": rng.randint(10_000, 9_000_000),
+            "rows_produced": rng.randint(10, 5000),
+            "query_text": f"select * from sessions where user_id = '{user}' limit 100",
+        }
+
+
+def load_table(conn: sqlite3.Connection, table: str, rows: Iterator[dict]) -> None:
+    ddl, insert_sql = TABLES[table]
+    conn.execute(f"DROP TABLE IF EXISTS {table}")
+    conn.execute(ddl)
+    conn.executemany(insert_sql, rows)
+    conn.commit()
+
+
+def write_csv(path: Path, rows: Iterator[dict], append: bool = False) -> int:
+    count = 0
+    with path.open("a" if append else "w", newline="", encoding="utf-8") as handle:
+        writer = None
+        for row in rows:
+            if writer is None:
+                writer = csv.DictWriter(handle, fieldnames=list(row))
+                if not append:
+                    writer.writeheader()
+            writer.writerow(row)
+            count += 1
+    return count
@@ -0,0 +1,165 @@
+import random
+import sqlite3
+import unittest
+from datetime import datetime, timedelta
+
+from app.aggregates import (
+    daily_credits,
+    latency_trend,
+    latest_latency,
+    query_regressions,
+    top_expensive,
+    warehouse_hotspots,
+)
+from app.analytics import (
+    calculate_daily_credits,
+    calculate_p95_latency_trend,
+    calculate_warehouse_hotspots,
+    find_query_regressions,
+    top_expensive_queries,
+)
+from app.ingest import INDEXES, TABLES
+from app.query_filters import query_history_filters
+
+WAREHOUSES = ["WH_CORE", "WH_ANALYTICS", "WH_INGEST", "WH_SCIENCE", "WH_FINOPS", "WH_ADHOC"]
+
+
+class AggregatesTestCase(unittest.TestCase):
+    def setUp(self) -> None:
+        rng = random.Random(7)
+        base = datetime(2024, 1, 1)
+        rows = {}
+        for _ in range(2000):
+            start = base + timedelta(minutes=rng.randint(0, 60 * 24 * 45))
+            row = {
+                "warehouse_name": rng.choice(WAREHOUSES),
+                "start_time": start.isoformat(),
+                "end_time": (start + timedelta(hours=1)).isoformat(),
+                "credits_used": round(rng.uniform(0.1, 16.0), 2),
+            }
+            # (warehouse_name, start_time) is the table's natural key.
+            rows.setdefault((row["warehouse_name"], row["start_time"]), row)
+        self.rows = list(rows.values())
+        self.conn = sqlite3.connect(":memory:")
+        ddl, insert_sql = TABLES["warehouse_metering"]
+        self.conn.execute(ddl)
+        self.conn.executemany(insert_sql, self.rows)
+
+    def tearDown(self) -> None:
+        self.conn.close()
+
+    def test_daily_credits_matches_reference(self) -> None:
+        expected = calculate_daily_credits(self.rows)
+        actual = daily_credits(self.conn)
+        self.assertEqual([item.day for item in actual], [item.day for item in expected])
+        for got, want in zip(actual, expected, strict=True):
+            self.assertAlmostEqual(got.credits_used, want.credits_used, places=6)
+
+    def test_hotspots_match_reference(self) -> None:
+        for top_n in (1, 3, 10):
+            expected = calculate_warehouse_hotspots(self.rows, top_n=top_n)
+            actual = warehouse_hotspots(self.conn, top_n=top_n)
+            self.assertEqual(
+                [item.warehouse_name for item in actual],
+                [item.warehouse_name for item in expected],
+            )
+            for got, want in zip(actual, expected, strict=True):
+                self.assertAlmostEqual(got.credits_used, want.credits_used, places=6)
+
+    def test_hotspot_ties_keep_first_seen_order(self) -> None:
+        self.conn.execute("DELETE FROM warehouse_metering")
+        rows = [
+            {
+                "warehouse_name": name,
+                "start_time": "2024-01-01T00:00:00",
+                "end_time": "2024-01-01T01:00:00",
+                "credits_used": 5.0,
+            }
+            for name in ("WH_B", "WH_A", "WH_C")
+        ]
+        self.conn.executemany(TABLES["warehouse_metering"][1], rows)
+        self.assertEqual(
+            [item.warehouse_name for item in warehouse_hotspots(self.conn)],
+            [item.warehouse_name for item in calculate_warehouse_hotspots(rows)],
+        )
+
+    def test_empty_table(self) -> None:
+        self.conn.execute("DELETE FROM warehouse_metering")
+        self.assertEqual(daily_credits(self.conn), [])
+        self.assertEqual(warehouse_hotspots(self.conn), [])
+
+
+class QueryInsightAggregatesTestCase(unittest.TestCase):
+    def setUp(self) -> None:
+        rng = random.Random(11)
+        base = datetime(2024, 1, 1)
+        self.rows = []
+        for idx in range(3000):
+            warehouse = rng.choice(WAREHOUSES)
+            start = base + timedelta(seconds=rng.randint(0, 3600 * 24 * 40))
+            elapsed = rng.randint(50, 3000)
+            if warehouse == "WH_SCIENCE":
+                elapsed += (start - base).days * 120
+            self.rows.append(
+                {
+                    "query_id": f"Q{idx:05d}",
+                    "warehouse_name": warehouse,
+                    "user_name": rng.choice(["ava", "ben"]),
+                    "role_name": "ANALYST",
+                    "start_time": start.isoformat(),
+                    "end_time": (start + timedelta(milliseconds=elapsed)).isoformat(),
+                    # Few distinct values so ties in the top-N are exercised.
+                    "total_elapsed_ms": elapsed - elapsed % 50,
+                    "bytes_scanned": rng.randint(1, 10**6),
+                    "rows_produced": rng.randint(1, 100),
+                    "query_text": "select 1",
+                }
+            )
+        self.conn = sqlite3.connect(":memory:")
+        ddl, insert_sql = TABLES["query_history"]
+        self.conn.execute(ddl)
+        self.conn.executemany(insert_sql, self.rows)
+        for index_name, columns in INDEXES["query_history"]:
+            self.conn.execute(f"CREATE INDEX {index_name} ON query_history ({columns})")
+
+    def tearDown(self) -> None:
+        self.conn.close()
+
+    def test_latency_trend_matches_reference(self) -> None:
+        self.assertEqual(latency_trend(self.conn), calculate_p95_latency_trend(self.rows))
+
+    def test_latest_latency(self) -> None:
+        self.assertEqual(latest_latency(self.conn), calculate_p95_latency_trend(self.rows)[-1])
+
+    def test_regressions_match_reference(self) -> None:
+        expected = find_query_regressions(self.rows)
+        self.assertTrue(expected)
+        self.assertEqual(query_regressions(self.conn), expected)
+
+    def test_top_expensive_matches_reference(self) -> None:
+        for limit in (1, 10, 50):
+            self.assertEqual(
+                top_expensive(self.conn, limit=limit), top_expensive_queries(self.rows, limit)
+            )
+
+    def test_time_window(self) -> None:
+        where, params = query_history_filters({"start": ["2024-01-10"], "end": ["2024-01-30"]})
+        window = [
+            row
+            for row in self.rows
+            if "2024-01-10T00:00:00" <= row["start_time"] < "2024-01-31T00:00:00"
+        ]
+        self.assertEqual(
+            latency_trend(self.conn, where, params), calculate_p95_latency_trend(window)
+        )
+        self.assertEqual(
+            query_regressions(self.conn, where, params), find_query_regressions(window)
+        )
+        self.assertEqual(top_expensive(self.conn, where, params), top_expensive_queries(window))
+
+    def test_empty_table(self) -> None:
+        self.conn.execute("DELETE FROM query_history")
+        self.assertEqual(latency_trend(self.conn), [])
+        self.assertIsNone(latest_latency(self.conn))
+        self.assertEqual(query_regressions(self.conn), [])
+        self.assertEqual(top_expensive(self.conn), [])
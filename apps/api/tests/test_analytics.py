@@ -1,13 +1,26 @@
+import json
+import random
 import unittest
-from datetime import datetime, timedelta
+from datetime import date, datetime, timedelta
+from statistics import median
+from unittest import mock
 
 from app.analytics import (
+    Anomaly,
+    CostAnomalyDetector,
+    DailyCredits,
+    QueryInsightsAggregator,
+    RollingMedian,
     calculate_daily_credits,
     calculate_p95_latency_trend,
+    daily_latency_sketches,
     detect_cost_anomalies,
     find_query_regressions,
     governance_lint,
+    latency_percentiles,
+    query_insights,
     top_expensive_queries,
+    top_expensive_queries_by,
 )
 
 
@@ -67,6 +80,11 @@ class AnalyticsTestCase(unittest.TestCase):
         ]
         top = top_expensive_queries(rows, limit=1)
         self.assertEqual(top[0].query_id, "Q2")
+        rows[0]["rows_produced"], rows[1]["rows_produced"] = 0, 10
+        by_bytes_per_row = top_expensive_queries(rows, limit=2, rank_by="bytes_per_row")
+        self.assertEqual([item.query_id for item in by_bytes_per_row], ["Q1", "Q2"])
+        with self.assertRaises(ValueError):
+            top_expensive_queries(rows, rank_by="credits")
 
     def test_anomalies(self) -> None:
         rows = [
@@ -95,3 +113,167 @@ class AnalyticsTestCase(unittest.TestCase):
         ]
         findings = governance_lint(grants, usage, access)
         self.assertEqual(len(findings), 3)
+
+
+class QueryInsightsAggregatorTestCase(unittest.TestCase):
+    def setUp(self) -> None:
+        rng = random.Random(5)
+        base = datetime(2024, 1, 1)
+        self.rows = []
+        for idx in range(4000):
+            warehouse = rng.choice(["WH_CORE", "WH_SCIENCE", "WH_ETL"])
+            start = base + timedelta(seconds=rng.randint(0, 3600 * 24 * 60))
+            elapsed = rng.randint(50, 3000)
+            if warehouse != "WH_CORE":
+                elapsed += (start - base).days * 60
+            self.rows.append(
+                {
+                    "query_id": f"Q{idx}",
+                    "warehouse_name": warehouse,
+                    "user_name": "ava",
+                    "start_time": start.isoformat(),
+                    # Few distinct values so ties in the top-N are exercised.
+                    "total_elapsed_ms": elapsed - elapsed % 100,
+                    "bytes_scanned": idx,
+                    "query_text": "select 1",
+                }
+            )
+
+    def _assert_matches_reference(self, rows: list[dict], top_n: int = 10) -> None:
+        insights = query_insights(iter(rows), top_n)
+        self.assertEqual(insights.latency_trend, calculate_p95_latency_trend(rows))
+        self.assertEqual(insights.regressions, find_query_regressions(rows))
+        self.assertEqual(insights.top_expensive, top_expensive_queries(rows, top_n))
+
+    def test_matches_reference_functions(self) -> None:
+        self.assertTrue(find_query_regressions(self.rows))
+        for top_n in (0, 1, 10, 50):
+            self._assert_matches_reference(self.rows, top_n)
+
+    def test_matches_reference_on_sorted_rows(self) -> None:
+        # In time order, days leave the regression windows and are pruned along the way.
+        rows = sorted(self.rows, key=lambda row: row["start_time"])
+        self._assert_matches_reference(rows)
+        self._assert_matches_reference(rows[::-1])
+
+    def test_empty(self) -> None:
+        insights = QueryInsightsAggregator().result()
+        self.assertEqual(
+            (insights.latency_trend, insights.regressions, insights.top_expensive), ([], [], [])
+        )
+
+    def test_regressions_accept_generators(self) -> None:
+        self.assertEqual(
+            find_query_regressions(row for row in self.rows), find_query_regressions(self.rows)
+        )
+
+    def test_sketched_percentiles_track_exact_ones(self) -> None:
+        exact = calculate_p95_latency_trend(self.rows)
+        sketched = calculate_p95_latency_trend(self.rows, relative_accuracy=0.01)
+        self.assertEqual([point.day for point in sketched], [point.day for point in exact])
+        for point, reference in zip(sketched, exact, strict=True):
+            self.assertLessEqual(abs(point.p95_ms - reference.p95_ms), 0.01 * reference.p95_ms)
+        self.assertEqual(
+            [row.warehouse_name for row in find_query_regressions(self.rows, 0.01)],
+            [row.warehouse_name for row in find_query_regressions(self.rows)],
+        )
+        percentiles = latency_percentiles(daily_latency_sketches(self.rows))
+        self.assertEqual([row.p95_ms for row in percentiles], [p.p95_ms for p in sketched])
+        self.assertTrue(all(row.p50_ms <= row.p90_ms <= row.p99_ms for row in percentiles))
+
+    def test_sketching_aggregator_matches_sketched_functions(self) -> None:
+        rows = sorted(self.rows, key=lambda row: row["start_time"])
+        # A tiny buffer so days are flushed into their sketches mid-stream.
+        with mock.patch("app.analytics.SKETCH_BUFFER", 8):
+            aggregator = QueryInsightsAggregator(relative_accuracy=0.01)
+            aggregator.update(rows)
+        insights = aggregator.result()
+        self.assertEqual(insights.latency_trend, calculate_p95_latency_trend(rows, 0.01))
+        self.assertEqual(insights.regressions, find_query_regressions(rows, 0.01))
+        self.assertEqual(insights.top_expensive, top_expensive_queries(rows, 10))
+        self.assertEqual(
+            {day: sketch.to_dict() for day, sketch in aggregator.latency_sketches().items()},
+            {day: sketch.to_dict() for day, sketch in daily_latency_sketches(rows).items()},
+        )
+
+    def test_top_expensive_matches_sort_per_group(self) -> None:
+        for rank_by in ("total_elapsed_ms", "bytes_scanned"):
+            by_warehouse = top_expensive_queries_by(self.rows, "warehouse_name", 5, rank_by)
+            self.assertEqual(set(by_warehouse), {"WH_CORE", "WH_SCIENCE", "WH_ETL"})
+            for warehouse, items in by_warehouse.items():
+                members = [row for row in self.rows if row["warehouse_name"] == warehouse]
+                ranked = sorted(members, key=lambda row: row[rank_by], reverse=True)
+                self.assertEqual(items, top_expensive_queries(ranked, 5, rank_by))
+                self.assertEqual(
+                    [item.query_id for item in items], [row["query_id"] for row in ranked[:5]]
+                )
+
+
+def _reference_anomalies(daily_credits: list[DailyCredits], window: int) -> list[Anomaly]:
+    """The window-rebuilding implementation the rolling detector replaced."""
+    anomalies = []
+    for idx in range(window, len(daily_credits)):
+        history = [point.credits_used for point in daily_credits[idx - window : idx]]
+        if not history:
+            continue
+        med = median(history)
+        mad = median([abs(value - med) for value in history]) or 1.0
+        current = daily_credits[idx]
+        z_score = 0.6745 * (current.credits_used - med) / mad
+        if z_score > 3.5:
+            anomalies.append(Anomaly(current.day, current.credits_used, z_score))
+    return anomalies
+
+
+class CostAnomalyDetectorTestCase(unittest.TestCase):
+    def setUp(self) -> None:
+        rng = random.Random(11)
+        self.series = []
+        for _ in range(200):
+            # Integer, rounded and repeated values, so medians of even windows and ties
+            # between deviations are both exercised.
+            values = rng.choice(
+                [
+                    lambda: rng.randint(0, 6),
+                    lambda: round(rng.uniform(0, 100), rng.choice([0, 1, 3])),
+                    lambda: rng.choice([0.1, 1.1, 2.2, 3.3, 7]),
+                ]
+            )
+            points = []
+            for offset in range(rng.randint(0, 50)):
+                credits = values() * (40 if rng.random() < 0.08 else 1)
+                points.append(DailyCredits(date(2024, 1, 1) + timedelta(days=offset), credits))
+            self.series.append(points)
+
+    def test_matches_window_rebuilding_reference(self) -> None:
+        found = 0
+        for points in self.series:
+            for window in (0, 1, 2, 4, 7, 8):
+                anomalies = detect_cost_anomalies(points, window)
+                self.assertEqual(anomalies, _reference_anomalies(points, window))
+                found += len(anomalies)
+        self.assertGreater(found, 50)
+
+    def test_rolling_median_and_mad_match_statistics(self) -> None:
+        for points in self.series[:50]:
+            values = [point.credits_used for point in points]
+            for size in (1, 2, 5, 6):
+                rolling = RollingMedian(size)
+                for index, value in enumerate(values):
+                    rolling.push(value)
+                    window = values[max(0, index + 1 - size) : index + 1]
+                    med = median(window)
+                    self.assertEqual(rolling.median(), med)
+                    self.assertEqual(rolling.mad(med), median([abs(v - med) for v in window]))
+
+    def test_advances_from_persisted_state(self) -> None:
+        for points in self.series:
+            detector = CostAnomalyDetector()
+            found = []
+            for start in range(0, len(points), 5):
+                state = json.loads(json.dumps(detector.to_dict()))
+                detector = CostAnomalyDetector.from_dict(state)
+                # Days already scored are skipped, so overlapping input is harmless.
+                found += detector.advance(points[max(0, start - 3) : start + 5])
+            self.assertEqual(found, detect_cost_anomalies(points))
+            self.assertEqual(detector.anomalies, found)
@@ -0,0 +1,167 @@
+import random
+import sqlite3
+import unittest
+from datetime import date, datetime, timedelta
+from unittest import mock
+
+from app import analytics, analytics_numpy
+from app.analytics import DailyCredits
+from app.timestamps import DAY_MS, to_epoch_ms
+
+
+class BackendSelectionTestCase(unittest.TestCase):
+    def test_python_is_always_available(self) -> None:
+        self.assertIs(analytics_numpy.select_backend("python"), analytics)
+
+    def test_falls_back_without_numpy(self) -> None:
+        with mock.patch.object(analytics_numpy, "AVAILABLE", False):
+            self.assertIs(analytics_numpy.select_backend("auto"), analytics)
+            self.assertIs(analytics_numpy.select_backend("numpy"), analytics)
+
+    def test_rejects_unknown_backend(self) -> None:
+        with self.assertRaises(ValueError):
+            analytics_numpy.select_backend("fortran")
+
+
+@unittest.skipUnless(analytics_numpy.AVAILABLE, "NumPy is not installed")
+class NumpyBackendEquivalenceTestCase(unittest.TestCase):
+    def setUp(self) -> None:
+        rng = random.Random(9)
+        base = datetime(2024, 1, 1)
+        warehouses = ["WH_CORE", "WH_SCIENCE", "WH_ETL", "WH_BI"]
+        self.queries = []
+        self.metering = []
+        for idx in range(5000):
+            warehouse = rng.choice(warehouses)
+            start = base + timedelta(seconds=rng.randint(0, 3600 * 24 * 60))
+            elapsed = rng.randint(50, 3000)
+            if warehouse != "WH_CORE":
+                elapsed += (start - base).days * 40
+            self.queries.append(
+                {
+                    "query_id": f"Q{idx}",
+                    "warehouse_name": warehouse,
+                    "user_name": rng.choice(["ava", "ben"]),
+                    "start_time": start.isoformat(),
+                    # Few distinct values so ties in percentiles and the top-N matter.
+                    "total_elapsed_ms": elapsed - elapsed % 100,
+                    "bytes_scanned": rng.randint(0, 50) * 1000,
+                    "rows_produced": rng.randint(0, 20),
+                    "query_text": "select 1",
+                }
+            )
+            self.metering.append(
+                {
+                    "warehouse_name": warehouse,
+                    "start_time": start.isoformat(),
+                    "credits_used": round(rng.uniform(0.1, 16.0), 2),
+                }
+            )
+
+    def test_query_functions_match(self) -> None:
+        for rows in (self.queries, sorted(self.queries, key=lambda row: row["start_time"]), []):
+            self.assertEqual(
+                analytics_numpy.calculate_p95_latency_trend(rows),
+                analytics.calculate_p95_latency_trend(rows),
+            )
+            self.assertEqual(
+                analytics_numpy.find_query_regressions(iter(rows)),
+                analytics.find_query_regressions(rows),
+            )
+        self.assertTrue(analytics.find_query_regressions(self.queries))
+
+    def test_sketched_percentiles_match(self) -> None:
+        for accuracy in (None, 0.01):
+            self.assertEqual(
+                analytics_numpy.calculate_p95_latency_trend(self.queries, accuracy),
+                analytics.calculate_p95_latency_trend(self.queries, accuracy),
+            )
+            self.assertEqual(
+                analytics_numpy.find_query_regressions(iter(self.queries), accuracy),
+                analytics.find_query_regressions(self.queries, accuracy),
+            )
+
+    def test_long_queries_use_lexsort_fallback(self) -> None:
+        # Elapsed times past 2**32 ms do not fit the packed sort key.
+        rows = [dict(row) for row in self.queries]
+        for row in rows[::50]:
+            row["total_elapsed_ms"] += 2**33
+        self.assertEqual(
+            analytics_numpy.calculate_p95_latency_trend(rows),
+            analytics.calculate_p95_latency_trend(rows),
+        )
+        self.assertEqual(
+            analytics_numpy.find_query_regressions(rows), analytics.find_query_regressions(rows)
+        )
+
+    def test_top_expensive_matches(self) -> None:
+        for rank_by in analytics.RANKING_KEYS:
+            for limit in (0, 1, 10, 100, 10_000):
+                self.assertEqual(
+                    analytics_numpy.top_expensive_queries(self.queries, limit, rank_by),
+                    analytics.top_expensive_queries(self.queries, limit, rank_by),
+                )
+
+    def test_metering_functions_match(self) -> None:
+        for rows in (self.metering, []):
+            self.assertEqual(
+                analytics_numpy.calculate_daily_credits(rows),
+                analytics.calculate_daily_credits(rows),
+            )
+            for top_n in (0, 2, 5):
+                self.assertEqual(
+                    analytics_numpy.calculate_warehouse_hotspots(rows, top_n),
+                    analytics.calculate_warehouse_hotspots(rows, top_n),
+                )
+
+    def test_anomalies_match(self) -> None:
+        rng = random.Random(2)
+        found = 0
+        for _ in range(200):
+            pick = rng.choice(
+                [lambda: rng.randint(0, 6), lambda: round(rng.uniform(0, 100), 2), lambda: 1.1]
+            )
+            start = date(2024, 1, 1)
+            points = [
+                DailyCredits(start + timedelta(days=offset), pick() * rng.choice([1, 40]))
+                for offset in range(rng.randint(0, 40))
+            ]
+            for window in (0, 1, 2, 7, 8):
+                anomalies = analytics_numpy.detect_cost_anomalies(points, window)
+                self.assertEqual(anomalies, analytics.detect_cost_anomalies(points, window))
+                found += len(anomalies)
+        self.assertGreater(found, 0)
+
+    def test_columns_from_sqlite_match_rows(self) -> None:
+        conn = sqlite3.connect(":memory:")
+        conn.execute(
+            "CREATE TABLE query_history (id INTEGER PRIMARY KEY, warehouse_name TEXT, "
+            "start_ms INTEGER, day INTEGER, total_elapsed_ms INTEGER)"
+        )
+        conn.executemany(
+            "INSERT INTO query_history (warehouse_name, start_ms, day, total_elapsed_ms) "
+            "VALUES (?, ?, ?, ?)",
+            [
+                (
+                    row["warehouse_name"],
+                    to_epoch_ms(row["start_time"]),
+                    to_epoch_ms(row["start_time"]) // DAY_MS,
+                    row["total_elapsed_ms"],
+                )
+                for row in self.queries
+            ],
+        )
+        columns = analytics_numpy.query_columns_from_sqlite(conn)
+        conn.close()
+        self.assertEqual(
+            analytics_numpy.latency_trend_columns(columns),
+            analytics.calculate_p95_latency_trend(self.queries),
+        )
+        self.assertEqual(
+            analytics_numpy.query_regressions_columns(columns),
+            analytics.find_query_regressions(self.queries),
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -51,6 +51,19 @@ class APIServerTestCase(unittest.TestCase):
         data = self._get("/api/v1/queries?limit=5")
         self.assertEqual(len(data), 5)
 
+    def test_query_insights(self) -> None:
+        for query in ("", "?start=2024-01-10&end=2024-01-20"):
+            data = self._get(f"/api/v1/queries/insights{query}")
+            self.assertEqual(set(data), {"latency_trend", "regressions", "top_expensive"})
+            self.assertTrue(data["latency_trend"])
+            self.assertEqual(set(data["latency_trend"][0]), {"day", "p95_ms"})
+            self.assertIsInstance(data["latency_trend"][0]["day"], str)
+            self.assertIsInstance(data["regressions"], list)
+            self.assertTrue(data["top_expensive"])
+            self.assertIn("query_id", data["top_expensive"][0])
+        days = [point["day"] for point in data["latency_trend"]]
+        self.assertEqual((days[0], days[-1]), ("2024-01-10", "2024-01-20"))
+
     def test_anomalies(self) -> None:
         data = self._get("/api/v1/anomalies")
         self.assertIsInstance(data, list)
@@ -58,3 +71,22 @@ class APIServerTestCase(unittest.TestCase):
     def test_governance(self) -> None:
         data = self._get("/api/v1/governance/findings")
         self.assertIsInstance(data, list)
+
+    def test_ingest_job(self) -> None:
+        request = urllib.request.Request(
+            f"http://127.0.0.1:{self.port}/api/v1/ingest/jobs", method="POST"
+        )
+        request.add_header("Authorization", "Bearer local-dev-token")
+        with urllib.request.urlopen(request) as response:
+            self.assertEqual(response.status, 202)
+            job = json.loads(response.read().decode("utf-8"))
+        for _ in range(100):
+            status = self._get(f"/api/v1/ingest/jobs/{job['id']}")
+            if status["status"] in ("succeeded", "failed"):
+                break
+            time.sleep(0.05)
+        self.assertEqual(status["status"], "succeeded")
+        self.assertEqual(len(self._get("/api/v1/queries?limit=5")), 5)
+        runs = self._get("/api/v1/ingest/runs?limit=1")
+        self.assertEqual([run["id"] for run in runs], [status["result"]["id"]])
+        self.assertEqual(runs[0]["rows"], status["result"]["rows"])
@@ -0,0 +1,25 @@
+import unittest
+
+from app.bloom import BloomFilter
+
+
+class BloomFilterTestCase(unittest.TestCase):
+    def test_has_no_false_negatives(self) -> None:
+        keys = [f"Q{index}" for index in range(5000)]
+        bloom = BloomFilter.from_keys(keys, capacity=len(keys))
+        self.assertTrue(all(key in bloom for key in keys))
+
+    def test_false_positive_rate_is_near_target(self) -> None:
+        bloom = BloomFilter.from_keys((f"Q{index}" for index in range(10_000)), capacity=10_000)
+        false_positives = sum(f"R{index}" in bloom for index in range(10_000))
+        self.assertLess(false_positives / 10_000, 0.03)
+
+    def test_add_matches_update(self) -> None:
+        bloom = BloomFilter(capacity=10)
+        bloom.add("WH_CORE\x1f2024-01-01T00:00:00")
+        self.assertIn("WH_CORE\x1f2024-01-01T00:00:00", bloom)
+        self.assertNotIn("WH_CORE\x1f2024-01-02T00:00:00", bloom)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,106 @@
+import json
+import os
+import sqlite3
+import threading
+import unittest
+import urllib.request
+from pathlib import Path
+from tempfile import TemporaryDirectory
+
+from app.cache import (
+    BodyCache,
+    ResponseCache,
+    bump_generation,
+    data_generation,
+    response_cache,
+)
+from app.ingest import ingest_demo_data
+from app.main import run_server
+
+
+class ResponseCacheTestCase(unittest.TestCase):
+    def test_hits_and_misses(self) -> None:
+        cache = ResponseCache(max_entries=4)
+        calls: list[str] = []
+        for _ in range(3):
+            value = cache.get_or_compute("overview", lambda: calls.append("x") or 42)
+        self.assertEqual(value, 42)
+        self.assertEqual(calls, ["x"])
+        self.assertEqual((cache.stats()["hits"], cache.stats()["misses"]), (2, 1))
+
+    def test_lru_eviction(self) -> None:
+        cache = ResponseCache(max_entries=2)
+        cache.get_or_compute("a", lambda: 1)
+        cache.get_or_compute("b", lambda: 2)
+        cache.get_or_compute("a", lambda: 1)
+        cache.get_or_compute("c", lambda: 3)
+        self.assertEqual(cache.get_or_compute("a", lambda: -1), 1)
+        self.assertEqual(cache.get_or_compute("b", lambda: -2), -2)
+        self.assertEqual(cache.stats()["entries"], 2)
+
+    def test_body_cache_bounded_by_bytes(self) -> None:
+        cache = BodyCache(max_bytes=10)
+        cache.get_or_compute("a", lambda: b"x" * 4)
+        cache.get_or_compute("b", lambda: b"x" * 4)
+        cache.get_or_compute("a", lambda: b"")
+        cache.get_or_compute("c", lambda: b"x" * 4)
+        self.assertEqual(cache.get_or_compute("a", lambda: b"miss"), b"x" * 4)
+        self.assertEqual(cache.get_or_compute("b", lambda: b"miss"), b"miss")
+        self.assertEqual(cache.get_or_compute("big", lambda: b"x" * 11), b"x" * 11)
+        self.assertLessEqual(cache.stats()["bytes"], 10)
+        self.assertEqual(cache.get_or_compute("big", lambda: b"miss"), b"miss")
+
+    def test_bump_generation(self) -> None:
+        connection = sqlite3.connect(":memory:")
+        self.assertEqual(data_generation(connection), 0)
+        self.assertEqual(bump_generation(connection.cursor()), 1)
+        self.assertEqual(bump_generation(connection.cursor()), 2)
+        self.assertEqual(data_generation(connection), 2)
+        connection.close()
+
+
+class CachedEndpointTestCase(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls) -> None:
+        cls.temp_dir = TemporaryDirectory()
+        os.environ["FROSTSIGHT_DB_PATH"] = str(Path(cls.temp_dir.name) / "demo.db")
+        ingest_demo_data()
+        cls.server = run_server("127.0.0.1", 0)
+        cls.port = cls.server.server_port
+        cls.thread = threading.Thread(target=cls.server.serve_forever, daemon=True)
+        cls.thread.start()
+
+    @classmethod
+    def tearDownClass(cls) -> None:
+        cls.server.shutdown()
+        cls.server.server_close()
+        cls.thread.join(timeout=2)
+        cls.temp_dir.cleanup()
+
+    def _get(self, path: str) -> object:
+        request = urllib.request.Request(f"http://127.0.0.1:{self.port}{path}")
+        request.add_header("Authorization", "Bearer local-dev-token")
+        with urllib.request.urlopen(request) as response:
+            return json.loads(response.read().decode("utf-8"))
+
+    def test_repeat_requests_hit_cache(self) -> None:
+        first = self._get("/api/v1/anomalies")
+        hits = response_cache.stats()["hits"]
+        second = self._get("/api/v1/anomalies?limit=1")
+        self.assertEqual(second, first[:1])
+        self.assertEqual(response_cache.stats()["hits"], hits + 1)
+
+    def test_ingest_invalidates(self) -> None:
+        generation = self._get("/api/v1/cache/stats")["generation"]
+        self._get("/api/v1/overview")
+        ingest_demo_data()
+        self.assertEqual(self._get("/api/v1/cache/stats")["generation"], generation + 1)
+        misses = response_cache.stats()["misses"]
+        self._get("/api/v1/overview")
+        self.assertEqual(response_cache.stats()["misses"], misses + 1)
+
+    def test_stats_endpoint(self) -> None:
+        stats = self._get("/api/v1/cache/stats")
+        self.assertEqual(
+            set(stats), {"hits", "misses", "entries", "max_entries", "bodies", "generation"}
+        )
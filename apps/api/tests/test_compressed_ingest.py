@@ -0,0 +1,94 @@
+import bz2
+import gzip
+import hashlib
+import lzma
+import os
+import shutil
+import sqlite3
+import unittest
+from pathlib import Path
+from tempfile import TemporaryDirectory
+from unittest import mock
+
+from app import ingest
+from app.ingest import FINGERPRINT_BYTES, TABLES, ingest_csvs
+
+DEMO_DIR = Path(__file__).resolve().parents[3] / "data" / "demo"
+COMPRESSORS = {".gz": gzip.compress, ".bz2": bz2.compress, ".xz": lzma.compress}
+
+
+class CompressedIngestTestCase(unittest.TestCase):
+    def setUp(self) -> None:
+        self.temp_dir = TemporaryDirectory()
+        self.data_dir = Path(self.temp_dir.name) / "data"
+        shutil.copytree(DEMO_DIR, self.data_dir, ignore=shutil.ignore_patterns("*.db*"))
+
+    def tearDown(self) -> None:
+        self.temp_dir.cleanup()
+
+    def _compress(self, suffix: str) -> None:
+        for path in self.data_dir.glob("*.csv"):
+            Path(f"{path}{suffix}").write_bytes(COMPRESSORS[suffix](path.read_bytes()))
+            path.unlink()
+
+    def _dump(self, name: str, **kwargs) -> dict[str, list[tuple]]:
+        os.environ["FROSTSIGHT_DB_PATH"] = str(Path(self.temp_dir.name) / f"{name}.db")
+        ingest_csvs(self.data_dir, **kwargs)
+        connection = sqlite3.connect(os.environ["FROSTSIGHT_DB_PATH"])
+        tables = {
+            table: connection.execute(f"SELECT * FROM {table} ORDER BY id").fetchall()
+            for table in TABLES
+        }
+        connection.close()
+        return tables
+
+    def test_compressed_exports_match_plain(self) -> None:
+        plain = self._dump("plain")
+        for suffix in COMPRESSORS:
+            with self.subTest(suffix=suffix):
+                shutil.rmtree(self.data_dir)
+                shutil.copytree(DEMO_DIR, self.data_dir, ignore=shutil.ignore_patterns("*.db*"))
+                self._compress(suffix)
+                self.assertEqual(self._dump(f"serial{suffix}"), plain)
+                self.assertEqual(
+                    self._dump(f"parallel{suffix}", workers=2, chunk_bytes=4096), plain
+                )
+
+    def test_fingerprint_needs_no_second_pass(self) -> None:
+        plain = (self.data_dir / "query_history.csv").read_bytes()
+        self._compress(".gz")
+        with ingest._Export(self.data_dir / "query_history.csv.gz") as handle:
+            while handle.read(1000):
+                pass
+            with mock.patch.object(handle, "seek") as seek:
+                fingerprint = handle.fingerprint()
+            seek.assert_not_called()
+            self.assertEqual(handle.tell(), len(plain))
+        self.assertEqual(fingerprint, hashlib.sha1(plain[-FINGERPRINT_BYTES:]).hexdigest())
+
+    def test_incremental_resumes_appended_gzip_member(self) -> None:
+        self._compress(".gz")
+        self._dump("incremental")
+        path = self.data_dir / "query_history.csv.gz"
+        row = "QZ,WH_CORE,ava,ANALYST,2030-01-01T00:00:00,2030-01-01T00:00:01,1,1,1,select 1\n"
+        # Concatenated gzip members decompress as one stream.
+        path.write_bytes(path.read_bytes() + gzip.compress(row.encode()))
+        with mock.patch.object(ingest, "_unseen_rows") as unseen_rows:
+            ingest_csvs(self.data_dir, incremental=True)
+        unseen_rows.assert_not_called()
+        connection = sqlite3.connect(os.environ["FROSTSIGHT_DB_PATH"])
+        count, last = connection.execute(
+            "SELECT COUNT(*), MAX(query_id = 'QZ') FROM query_history"
+        ).fetchone()
+        connection.close()
+        self.assertEqual(count, 1801)
+        self.assertEqual(last, 1)
+
+    def test_plain_export_is_preferred(self) -> None:
+        expected = len((self.data_dir / "warehouses.csv").read_text().splitlines()) - 1
+        (self.data_dir / "warehouses.csv.gz").write_bytes(gzip.compress(b"name\nWH_STALE\n"))
+        self.assertEqual(len(self._dump("plain")["warehouses"]), expected)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,98 @@
+import http.client
+import json
+import os
+import threading
+import unittest
+from pathlib import Path
+from tempfile import TemporaryDirectory
+from unittest import mock
+
+from app import main
+from app.compression import compress, decompress, negotiate_encoding
+from app.ingest import ingest_demo_data
+from app.main import run_server
+
+
+class NegotiationTestCase(unittest.TestCase):
+    def test_negotiate_encoding(self) -> None:
+        self.assertIsNone(negotiate_encoding(None))
+        self.assertIsNone(negotiate_encoding("br, identity"))
+        self.assertEqual(negotiate_encoding("gzip, deflate, br"), "gzip")
+        self.assertEqual(negotiate_encoding("deflate"), "deflate")
+        self.assertEqual(negotiate_encoding("gzip;q=0.5, deflate;q=0.8"), "deflate")
+        self.assertEqual(negotiate_encoding("gzip;q=0, *"), "deflate")
+        self.assertIsNone(negotiate_encoding("*;q=0"))
+
+    def test_round_trip(self) -> None:
+        data = b'{"query_text": "select 1"}' * 100
+        for encoding in ("gzip", "deflate"):
+            self.assertEqual(decompress(compress(data, encoding), encoding), data)
+
+
+class CompressedResponseTestCase(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls) -> None:
+        cls.temp_dir = TemporaryDirectory()
+        os.environ["FROSTSIGHT_DB_PATH"] = str(Path(cls.temp_dir.name) / "demo.db")
+        ingest_demo_data()
+        cls.server = run_server("127.0.0.1", 0)
+        cls.port = cls.server.server_port
+        cls.thread = threading.Thread(target=cls.server.serve_forever, daemon=True)
+        cls.thread.start()
+
+    @classmethod
+    def tearDownClass(cls) -> None:
+        cls.server.shutdown()
+        cls.server.server_close()
+        cls.thread.join(timeout=2)
+        cls.temp_dir.cleanup()
+
+    def _get(self, path: str, **headers: str) -> tuple[int, dict, bytes]:
+        connection = http.client.HTTPConnection("127.0.0.1", self.port, timeout=10)
+        headers = {"Authorization": "Bearer local-dev-token", **headers}
+        connection.request("GET", path, headers=headers)
+        response = connection.getresponse()
+        body = response.read()
+        connection.close()
+        return response.status, dict(response.getheaders()), body
+
+    def test_gzip_and_deflate(self) -> None:
+        _, plain_headers, plain = self._get("/api/v1/queries?limit=100")
+        self.assertNotIn("Content-Encoding", plain_headers)
+        for encoding in ("gzip", "deflate"):
+            _, headers, body = self._get(
+                "/api/v1/queries?limit=100", **{"Accept-Encoding": encoding}
+            )
+            self.assertEqual(headers["Content-Encoding"], encoding)
+            self.assertEqual(headers["Vary"], "Accept-Encoding")
+            self.assertLess(len(body), len(plain) // 3)
+            self.assertEqual(decompress(body, encoding), plain)
+            self.assertNotEqual(headers["ETag"], plain_headers["ETag"])
+
+    def test_small_payload_not_compressed(self) -> None:
+        _, headers, body = self._get("/api/v1/overview", **{"Accept-Encoding": "gzip"})
+        self.assertNotIn("Content-Encoding", headers)
+        self.assertIn("credits_today", json.loads(body))
+
+    def test_compressed_body_reused(self) -> None:
+        path = "/api/v1/warehouse-metering?limit=150"
+        with mock.patch("app.main.compress", wraps=main.compress) as compress_spy:
+            first = self._get(path, **{"Accept-Encoding": "gzip"})
+            second = self._get(path, **{"Accept-Encoding": "gzip"})
+        self.assertEqual(compress_spy.call_count, 1)
+        self.assertEqual(first[2], second[2])
+
+    def test_encoded_etag_revalidates(self) -> None:
+        _, headers, _ = self._get("/api/v1/queries?limit=50", **{"Accept-Encoding": "gzip"})
+        status, _, _ = self._get(
+            "/api/v1/queries?limit=50",
+            **{"Accept-Encoding": "gzip", "If-None-Match": headers["ETag"]},
+        )
+        self.assertEqual(status, 304)
+
+    def test_streamed_response_compressed(self) -> None:
+        _, _, plain = self._get("/api/v1/queries?limit=1500")
+        _, headers, body = self._get("/api/v1/queries?limit=1500", **{"Accept-Encoding": "gzip"})
+        self.assertEqual(headers["Transfer-Encoding"], "chunked")
+        self.assertEqual(headers["Content-Encoding"], "gzip")
+        self.assertEqual(decompress(body, "gzip"), plain)
@@ -0,0 +1,148 @@
+import http.client
+import json
+import os
+import threading
+import time
+import unittest
+import urllib.error
+import urllib.request
+from pathlib import Path
+from tempfile import TemporaryDirectory
+from unittest import mock
+
+from app.ingest import ingest_demo_data
+from app.main import FrostSightServer, run_server
+
+
+def _slow_status(delay: float):
+    def status() -> dict:
+        time.sleep(delay)
+        return {"configured": False, "missing": []}
+
+    return status
+
+
+class ConcurrencyTestCase(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls) -> None:
+        cls.temp_dir = TemporaryDirectory()
+        os.environ["FROSTSIGHT_DB_PATH"] = str(Path(cls.temp_dir.name) / "demo.db")
+        ingest_demo_data()
+
+    @classmethod
+    def tearDownClass(cls) -> None:
+        cls.temp_dir.cleanup()
+
+    def _start(self, workers: int, queue_size: int = 64) -> FrostSightServer:
+        server = run_server("127.0.0.1", 0, workers=workers, queue_size=queue_size)
+        thread = threading.Thread(target=server.serve_forever, daemon=True)
+        thread.start()
+        self.addCleanup(thread.join, 2)
+        self.addCleanup(server.server_close)
+        self.addCleanup(server.shutdown)
+        return server
+
+    def _get(self, server: FrostSightServer, path: str) -> tuple[int, dict]:
+        request = urllib.request.Request(f"http://127.0.0.1:{server.server_port}{path}")
+        request.add_header("Authorization", "Bearer local-dev-token")
+        try:
+            with urllib.request.urlopen(request, timeout=10) as response:
+                return response.status, json.loads(response.read().decode("utf-8"))
+        except urllib.error.HTTPError as exc:
+            return exc.code, json.loads(exc.read().decode("utf-8"))
+
+    def _burst(self, server: FrostSightServer, path: str, count: int) -> float:
+        statuses: list[int] = []
+        threads = [
+            threading.Thread(target=lambda: statuses.append(self._get(server, path)[0]))
+            for _ in range(count)
+        ]
+        started = time.perf_counter()
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        elapsed = time.perf_counter() - started
+        self.assertEqual(statuses, [200] * count)
+        return count / elapsed
+
+    def test_throughput_grows_with_workers(self) -> None:
+        with mock.patch("app.main.snowflake_status", _slow_status(0.1)):
+            single = self._burst(self._start(workers=1), "/api/v1/snowflake/status", 8)
+            pooled = self._burst(self._start(workers=4), "/api/v1/snowflake/status", 8)
+        self.assertGreater(pooled, single * 2)
+
+    def test_health_not_blocked_by_slow_request(self) -> None:
+        server = self._start(workers=2)
+        with mock.patch("app.main.snowflake_status", _slow_status(0.5)):
+            slow = threading.Thread(target=self._get, args=(server, "/api/v1/snowflake/status"))
+            slow.start()
+            time.sleep(0.05)
+            started = time.perf_counter()
+            status, payload = self._get(server, "/api/v1/health")
+            elapsed = time.perf_counter() - started
+            slow.join()
+        self.assertEqual((status, payload["status"]), (200, "ok"))
+        self.assertLess(elapsed, 0.3)
+
+    def test_rejects_when_queue_full(self) -> None:
+        entered = threading.Event()
+        release = threading.Event()
+
+        def blocking_status() -> dict:
+            entered.set()
+            release.wait(5)
+            return {"configured": False, "missing": []}
+
+        server = self._start(workers=1, queue_size=1)
+        with mock.patch("app.main.snowflake_status", blocking_status):
+            results: list[int] = []
+            first = threading.Thread(
+                target=lambda: results.append(self._get(server, "/api/v1/snowflake/status")[0])
+            )
+            first.start()
+            self.assertTrue(entered.wait(5))
+            queued = threading.Thread(
+                target=lambda: results.append(self._get(server, "/api/v1/health")[0])
+            )
+            queued.start()
+            time.sleep(0.1)
+            status, payload = self._get(server, "/api/v1/health")
+            release.set()
+            first.join()
+            queued.join()
+        self.assertEqual(status, 503)
+        self.assertEqual(payload["detail"], "server busy")
+        self.assertEqual(sorted(results), [200, 200])
+
+    def _keep_alive(self, server: FrostSightServer) -> http.client.HTTPConnection:
+        connection = http.client.HTTPConnection("127.0.0.1", server.server_port, timeout=5)
+        self.addCleanup(connection.close)
+        connection.request("GET", "/api/v1/health")
+        response = connection.getresponse()
+        response.read()
+        self.assertEqual(response.status, 200)
+        return connection
+
+    def test_idle_keep_alive_connections_do_not_hold_workers(self) -> None:
+        workers = 2
+        server = self._start(workers=workers)
+        idle = [self._keep_alive(server) for _ in range(workers + 1)]
+        started = time.perf_counter()
+        status, payload = self._get(server, "/api/v1/health")
+        elapsed = time.perf_counter() - started
+        self.assertEqual((status, payload["status"]), (200, "ok"))
+        self.assertLess(elapsed, 0.5)
+        # The parked connections still serve their next request.
+        for connection in idle:
+            connection.request("GET", "/api/v1/health")
+            response = connection.getresponse()
+            self.assertEqual((response.status, response.read()), (200, b'{"status": "ok"}'))
+
+    def test_idle_keep_alive_connections_expire(self) -> None:
+        server = self._start(workers=1)
+        server.keepalive_timeout = 0.1
+        connection = self._keep_alive(server)
+        time.sleep(0.5)
+        connection.sock.settimeout(1)
+        self.assertEqual(connection.sock.recv(1), b"")
@@ -0,0 +1,113 @@
+import http.client
+import json
+import os
+import subprocess
+import sys
+import threading
+import unittest
+from pathlib import Path
+from tempfile import TemporaryDirectory
+from unittest import mock
+
+import app
+from app.ingest import ingest_demo_data
+from app.main import run_server
+
+
+class ConditionalRequestTestCase(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls) -> None:
+        cls.temp_dir = TemporaryDirectory()
+        os.environ["FROSTSIGHT_DB_PATH"] = str(Path(cls.temp_dir.name) / "demo.db")
+        ingest_demo_data()
+        cls.server = run_server("127.0.0.1", 0)
+        cls.port = cls.server.server_port
+        cls.thread = threading.Thread(target=cls.server.serve_forever, daemon=True)
+        cls.thread.start()
+
+    @classmethod
+    def tearDownClass(cls) -> None:
+        cls.server.shutdown()
+        cls.server.server_close()
+        cls.thread.join(timeout=2)
+        cls.temp_dir.cleanup()
+
+    def _get(self, path: str, **headers: str) -> tuple[int, dict, bytes]:
+        connection = http.client.HTTPConnection("127.0.0.1", self.port, timeout=10)
+        headers = {"Authorization": "Bearer local-dev-token", **headers}
+        connection.request("GET", path, headers=headers)
+        response = connection.getresponse()
+        body = response.read()
+        connection.close()
+        return response.status, dict(response.getheaders()), body
+
+    def test_etag_and_cache_control(self) -> None:
+        status, headers, _ = self._get("/api/v1/overview")
+        self.assertEqual(status, 200)
+        self.assertRegex(headers["ETag"], r'^"g\d+-[0-9a-f]+"$')
+        self.assertEqual(headers["Cache-Control"], "private, no-cache")
+
+    def test_not_modified_skips_queries(self) -> None:
+        _, headers, _ = self._get("/api/v1/queries?limit=5")
+        route = mock.patch(
+            "app.main.FrostSightHandler._route_get", side_effect=AssertionError("queried")
+        )
+        with route:
+            status, not_modified, body = self._get(
+                "/api/v1/queries?limit=5", **{"If-None-Match": headers["ETag"]}
+            )
+        self.assertEqual(status, 304)
+        self.assertEqual(body, b"")
+        self.assertEqual(not_modified["ETag"], headers["ETag"])
+
+    def test_weak_and_listed_tags_match(self) -> None:
+        _, headers, _ = self._get("/api/v1/anomalies")
+        status, _, _ = self._get(
+            "/api/v1/anomalies", **{"If-None-Match": f'"other", W/{headers["ETag"]}'}
+        )
+        self.assertEqual(status, 304)
+
+    def test_etag_varies_with_params_and_generation(self) -> None:
+        first = self._get("/api/v1/queries?limit=5")[1]["ETag"]
+        other = self._get("/api/v1/queries?limit=6")[1]["ETag"]
+        self.assertNotEqual(first, other)
+        ingest_demo_data()
+        status, headers, _ = self._get("/api/v1/queries?limit=5", **{"If-None-Match": first})
+        self.assertEqual(status, 200)
+        self.assertNotEqual(headers["ETag"], first)
+
+    def test_ingest_in_another_process_changes_etag(self) -> None:
+        _, headers, _ = self._get("/api/v1/overview")
+        etag = headers["ETag"]
+        self.assertEqual(self._get("/api/v1/overview", **{"If-None-Match": etag})[0], 304)
+        # Like `ingest-demo` run from the CLI while the server keeps running.
+        app_root = str(Path(app.__file__).resolve().parents[1])
+        subprocess.run(
+            [sys.executable, "-c", "from app.ingest import ingest_demo_data; ingest_demo_data()"],
+            env={**os.environ, "PYTHONPATH": app_root},
+            check=True,
+        )
+        status, headers, _ = self._get("/api/v1/overview", **{"If-None-Match": etag})
+        self.assertEqual(status, 200)
+        self.assertNotEqual(headers["ETag"], etag)
+
+    def test_failed_ingest_runs_are_not_revalidated(self) -> None:
+        _, headers, body = self._get("/api/v1/ingest/runs")
+        self.assertNotIn("ETag", headers)
+        with self.assertRaises(RuntimeError):
+            with mock.patch("app.ingest._analyze", side_effect=RuntimeError("boom")):
+                ingest_demo_data()
+        status, _, refreshed = self._get("/api/v1/ingest/runs", **{"If-None-Match": "*"})
+        self.assertEqual(status, 200)
+        self.assertEqual(len(json.loads(refreshed)), len(json.loads(body)) + 1)
+        self.assertEqual(json.loads(refreshed)[0]["error"], "RuntimeError: boom")
+
+    def test_uncacheable_responses(self) -> None:
+        _, headers, _ = self._get("/api/v1/health")
+        self.assertEqual(headers["Cache-Control"], "no-store")
+        self.assertNotIn("ETag", headers)
+        _, headers, _ = self._get("/api/v1/snowflake/status")
+        self.assertNotIn("ETag", headers)
+        status, headers, _ = self._get("/api/v1/queries?cursor=bogus")
+        self.assertEqual(status, 400)
+        self.assertNotIn("ETag", headers)
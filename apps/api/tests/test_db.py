@@ -0,0 +1,77 @@
+import os
+import sqlite3
+import threading
+import unittest
+from pathlib import Path
+from tempfile import TemporaryDirectory
+
+from app.db import ConnectionPool, get_pool, read_transaction
+
+
+class ConnectionPoolTestCase(unittest.TestCase):
+    def setUp(self) -> None:
+        self.temp_dir = TemporaryDirectory()
+        self.db_path = Path(self.temp_dir.name) / "pool.db"
+        os.environ["FROSTSIGHT_DB_PATH"] = str(self.db_path)
+        setup = sqlite3.connect(self.db_path)
+        setup.execute("CREATE TABLE items (id INTEGER PRIMARY KEY, value TEXT)")
+        setup.executemany("INSERT INTO items (value) VALUES (?)", [("a",), ("b",)])
+        setup.commit()
+        setup.close()
+
+    def tearDown(self) -> None:
+        get_pool().close()
+        self.temp_dir.cleanup()
+
+    def test_connections_are_reused(self) -> None:
+        pool = ConnectionPool(self.db_path, size=2)
+        with pool.connection() as first:
+            pass
+        with pool.connection() as second:
+            pass
+        self.assertIs(first, second)
+        pool.close()
+
+    def test_pragmas_set_on_pooled_connection(self) -> None:
+        pool = ConnectionPool(self.db_path, size=1)
+        with pool.connection() as conn:
+            self.assertEqual(conn.execute("PRAGMA cache_size").fetchone()[0], -32768)
+            self.assertEqual(conn.execute("PRAGMA temp_store").fetchone()[0], 2)
+            self.assertEqual(conn.execute("PRAGMA journal_mode").fetchone()[0], "wal")
+        pool.close()
+
+    def test_pool_is_bounded(self) -> None:
+        pool = ConnectionPool(self.db_path, size=1)
+        held = pool.acquire()
+        with self.assertRaises(TimeoutError):
+            pool.acquire(timeout=0.05)
+        pool.release(held)
+        self.assertIs(pool.acquire(timeout=0.05), held)
+        pool.close()
+
+    def test_connection_usable_from_other_thread(self) -> None:
+        pool = ConnectionPool(self.db_path, size=1)
+        pool.release(pool.acquire())
+        counts: list[int] = []
+
+        def worker() -> None:
+            with pool.connection() as conn:
+                counts.append(conn.execute("SELECT COUNT(*) FROM items").fetchone()[0])
+
+        thread = threading.Thread(target=worker)
+        thread.start()
+        thread.join()
+        self.assertEqual(counts, [2])
+        pool.close()
+
+    def test_read_transaction_sees_consistent_snapshot(self) -> None:
+        with read_transaction() as conn:
+            before = conn.execute("SELECT COUNT(*) FROM items").fetchone()[0]
+            writer = sqlite3.connect(self.db_path)
+            writer.execute("INSERT INTO items (value) VALUES ('c')")
+            writer.commit()
+            writer.close()
+            during = conn.execute("SELECT COUNT(*) FROM items").fetchone()[0]
+        with read_transaction() as conn:
+            after = conn.execute("SELECT COUNT(*) FROM items").fetchone()[0]
+        self.assertEqual((before, during, after), (2, 2, 3))
@@ -1,10 +1,31 @@
+import json
 import os
 import sqlite3
+import subprocess
+import sys
 import unittest
 from pathlib import Path
 from tempfile import TemporaryDirectory
+from unittest import mock
 
-from app.ingest import ingest_csvs
+import app
+from app.aggregates import daily_credits
+from app.analytics import detect_cost_anomalies
+from app.anomaly_state import TOTAL_SERIES, cost_anomalies
+from app.bloom import BloomFilter
+from app.db import get_connection
+from app.ingest import (
+    BULK_LOAD_PRAGMAS,
+    INDEXES,
+    INGEST_LOCK_SUFFIX,
+    KEY_LOOKUP_BATCH,
+    TABLES,
+    _ingest_lock,
+    _unknown_rows,
+    bulk_load_settings,
+    ingest_csvs,
+)
+from app.ingest_runs import PHASES, recent_runs
 
 
 class IngestTestCase(unittest.TestCase):
@@ -43,3 +64,273 @@ class IngestTestCase(unittest.TestCase):
         )
         self.assertIsNotNone(cursor.fetchone())
         connection.close()
+
+    def _query_ids(self) -> list[str]:
+        connection = sqlite3.connect(os.environ["FROSTSIGHT_DB_PATH"])
+        rows = connection.execute("SELECT query_id FROM query_history ORDER BY id").fetchall()
+        connection.close()
+        return [row[0] for row in rows]
+
+    def _append_query(self, query_id: str, start_time: str) -> None:
+        with (self.data_dir / "query_history.csv").open("a") as handle:
+            handle.write(
+                f"{query_id},WH_CORE,ava,ANALYST,{start_time},{start_time},100,10,5,select 1\n"
+            )
+
+    def test_incremental_appends_only_new_rows(self) -> None:
+        ingest_csvs(self.data_dir)
+        self._append_query("Q2", "2024-01-02T00:00:00")
+        ingest_csvs(self.data_dir, incremental=True)
+        ingest_csvs(self.data_dir, incremental=True)
+        self.assertEqual(self._query_ids(), ["Q1", "Q2"])
+
+    def test_incremental_skips_stored_rows_of_rewritten_export(self) -> None:
+        ingest_csvs(self.data_dir)
+        path = self.data_dir / "query_history.csv"
+        lines = path.read_text().splitlines()
+        # Reordered, so the file no longer extends the previous export: Q1 is stored
+        # already, Q0 arrived late and Q3 is past the watermark.
+        path.write_text(
+            f"{lines[0]}\n"
+            "Q0,WH_CORE,ava,ANALYST,2023-12-31T00:00:00,2023-12-31T00:00:01,100,10,5,select 0\n"
+            f"{lines[1]}\n"
+        )
+        self._append_query("Q3", "2024-01-03T00:00:00")
+        ingest_csvs(self.data_dir, incremental=True)
+        self.assertEqual(self._query_ids(), ["Q1", "Q3", "Q0"])
+        ingest_csvs(self.data_dir)
+        self.assertEqual(self._query_ids(), ["Q0", "Q1", "Q3"])
+
+    def test_ingest_reports_and_records_runs(self) -> None:
+        path = self.data_dir / "query_history.csv"
+        first = ingest_csvs(self.data_dir).as_dict()
+        size = path.stat().st_size
+        self._append_query("Q2", "2024-01-02T00:00:00")
+        second = ingest_csvs(self.data_dir, incremental=True).as_dict()
+        tables = {table["table"]: table for table in first["tables"]}
+        self.assertEqual(tables["query_history"]["rows"], 1)
+        self.assertEqual(tables["query_history"]["bytes"], size)
+        self.assertEqual(set(tables["query_history"]["phases"]), set(PHASES))
+        self.assertGreater(tables["query_history"]["phases"]["index"], 0)
+        self.assertEqual(first["rows"], 6)
+        appended = {table["table"]: table for table in second["tables"]}
+        self.assertEqual(appended["query_history"]["rows"], 1)
+        self.assertEqual(appended["query_history"]["bytes"], path.stat().st_size - size)
+        self.assertEqual(appended["warehouse_metering"]["rows"], 0)
+        connection = get_connection()
+        runs = recent_runs(connection, 5)
+        connection.close()
+        self.assertEqual([run["id"] for run in runs], [second["id"], first["id"]])
+        self.assertEqual(runs[0], second)
+
+    def test_failed_runs_are_recorded(self) -> None:
+        first = ingest_csvs(self.data_dir)
+        with self.assertRaises(RuntimeError):
+            with mock.patch("app.ingest._analyze", side_effect=RuntimeError("boom")):
+                ingest_csvs(self.data_dir)
+        connection = get_connection()
+        runs = recent_runs(connection, 5)
+        connection.close()
+        self.assertEqual(runs[0]["error"], "RuntimeError: boom")
+        self.assertIsNotNone(runs[0]["finished_at"])
+        self.assertEqual([run["id"] for run in runs[1:]], [first.id])
+        self.assertIsNone(runs[1]["error"])
+
+    def test_duplicate_natural_keys_are_upserted(self) -> None:
+        self._append_query("Q1", "2024-01-01T00:00:00")
+        ingest_csvs(self.data_dir)
+        connection = sqlite3.connect(os.environ["FROSTSIGHT_DB_PATH"])
+        rows = connection.execute("SELECT query_id, total_elapsed_ms FROM query_history").fetchall()
+        connection.close()
+        self.assertEqual(rows, [("Q1", 100)])
+
+    def test_key_lookups_stay_under_the_old_variable_limit(self) -> None:
+        connection = sqlite3.connect(":memory:")
+        connection.setlimit(sqlite3.SQLITE_LIMIT_VARIABLE_NUMBER, 999)
+        connection.execute(TABLES["warehouse_metering"][0])
+        rows = [
+            {
+                "warehouse_name": "WH_CORE",
+                "start_time": f"2024-01-01T00:{index // 60:02d}:{index % 60:02d}",
+                "end_time": "2024-01-01T01:00:00",
+                "credits_used": "1",
+            }
+            for index in range(KEY_LOOKUP_BATCH)
+        ]
+        connection.executemany(TABLES["warehouse_metering"][1], rows[::2])
+        bloom = BloomFilter.from_keys(
+            (f"{row['warehouse_name']}\x1f{row['start_time']}" for row in rows), len(rows)
+        )
+        unknown = _unknown_rows(connection, "warehouse_metering", bloom, rows)
+        connection.close()
+        self.assertEqual(unknown, rows[1::2])
+
+    def test_bulk_load_matches_default_ingest(self) -> None:
+        ingest_csvs(self.data_dir, bulk_load=True)
+        connection = sqlite3.connect(os.environ["FROSTSIGHT_DB_PATH"])
+        rows = connection.execute("SELECT query_id, total_elapsed_ms FROM query_history").fetchall()
+        indexes = connection.execute(
+            "SELECT name FROM sqlite_master WHERE type='index' AND tbl_name='query_history'"
+        ).fetchall()
+        connection.close()
+        self.assertEqual(rows, [("Q1", 100)])
+        self.assertIn(("idx_query_history_start_ms",), indexes)
+
+    def test_bulk_load_settings_are_restored(self) -> None:
+        connection = get_connection()
+        before = {
+            name: connection.execute(f"PRAGMA {name}").fetchone()[0] for name in BULK_LOAD_PRAGMAS
+        }
+        with self.assertRaises(RuntimeError), bulk_load_settings(connection):
+            self.assertEqual(connection.execute("PRAGMA synchronous").fetchone()[0], 0)
+            raise RuntimeError("load failed")
+        after = {
+            name: connection.execute(f"PRAGMA {name}").fetchone()[0] for name in BULK_LOAD_PRAGMAS
+        }
+        connection.close()
+        self.assertEqual(after, before)
+
+    def test_failed_rebuild_leaves_live_tables_intact(self) -> None:
+        ingest_csvs(self.data_dir)
+        self._append_query("Q2", "2024-01-02T00:00:00")
+        (self.data_dir / "object_access.csv").unlink()
+        with self.assertRaises(FileNotFoundError):
+            ingest_csvs(self.data_dir)
+        self.assertEqual(self._query_ids(), ["Q1"])
+
+    def test_failed_ingest_releases_write_lock(self) -> None:
+        ingest_csvs(self.data_dir)
+        for bulk_load in (False, True):
+            swap = mock.patch("app.ingest._swap_in_shadows", side_effect=RuntimeError("boom"))
+            with self.assertRaises(RuntimeError), swap:
+                ingest_csvs(self.data_dir, bulk_load=bulk_load)
+            # Another writer gets the lock at once, without waiting for garbage collection.
+            writer = sqlite3.connect(os.environ["FROSTSIGHT_DB_PATH"], timeout=0)
+            writer.execute("BEGIN IMMEDIATE")
+            writer.rollback()
+            writer.close()
+        self.assertEqual(self._query_ids(), ["Q1"])
+
+    def test_ingests_in_separate_processes_take_turns(self) -> None:
+        times = "2024-01-02T00:00:00,2024-01-02T00:00:01"
+        with (self.data_dir / "query_history.csv").open("a") as handle:
+            for index in range(2, 20_000):
+                handle.write(f"Q{index},WH_CORE,ava,ANALYST,{times},100,10,5,select 1\n")
+        app_root = str(Path(app.__file__).resolve().parents[1])
+        code = "import sys; from pathlib import Path; from app.ingest import ingest_csvs; "
+        code += "ingest_csvs(Path(sys.argv[1]), bulk_load=True)"
+        processes = [
+            subprocess.Popen(
+                [sys.executable, "-c", code, str(self.data_dir)],
+                env={**os.environ, "PYTHONPATH": app_root},
+                stderr=subprocess.PIPE,
+            )
+            for _ in range(3)
+        ]
+        for process in processes:
+            _, stderr = process.communicate(timeout=120)
+            self.assertEqual(process.returncode, 0, stderr.decode())
+        connection = get_connection()
+        tables = [row[0] for row in connection.execute("SELECT name FROM sqlite_master")]
+        (rows,) = connection.execute("SELECT COUNT(*) FROM query_history").fetchone()
+        runs = recent_runs(connection, 5)
+        connection.close()
+        self.assertEqual(rows, 19_999)
+        self.assertFalse([name for name in tables if name.endswith("__shadow")])
+        self.assertEqual([run["error"] for run in runs], [None] * 3)
+
+    def test_ingest_lock_times_out_while_held_elsewhere(self) -> None:
+        holder = sqlite3.connect(
+            f"{os.environ['FROSTSIGHT_DB_PATH']}{INGEST_LOCK_SUFFIX}", isolation_level=None
+        )
+        holder.execute("BEGIN EXCLUSIVE")
+        try:
+            with self.assertRaises(TimeoutError):
+                with _ingest_lock(timeout=0.1):
+                    pass
+        finally:
+            holder.close()
+        with _ingest_lock(timeout=0.1):
+            pass
+
+    def test_rebuild_swaps_shadow_tables_into_place(self) -> None:
+        ingest_csvs(self.data_dir, bulk_load=True)
+        reader = sqlite3.connect(os.environ["FROSTSIGHT_DB_PATH"])
+        reader.execute("BEGIN")
+        self.assertEqual(reader.execute("SELECT COUNT(*) FROM query_history").fetchone()[0], 1)
+        self._append_query("Q2", "2024-01-02T00:00:00")
+        ingest_csvs(self.data_dir, bulk_load=True)
+        # A read transaction opened before the swap keeps seeing the complete old dataset.
+        self.assertEqual(reader.execute("SELECT COUNT(*) FROM query_history").fetchone()[0], 1)
+        reader.rollback()
+        self.assertEqual(reader.execute("SELECT COUNT(*) FROM query_history").fetchone()[0], 2)
+        tables = reader.execute(
+            "SELECT name FROM sqlite_master WHERE type='table' AND name LIKE '%shadow%'"
+        ).fetchall()
+        reader.close()
+        self.assertEqual(tables, [])
+
+    def test_declared_indexes_are_built_and_analyzed(self) -> None:
+        ingest_csvs(self.data_dir)
+        connection = sqlite3.connect(os.environ["FROSTSIGHT_DB_PATH"])
+        indexes = {
+            row[0]
+            for row in connection.execute("SELECT name FROM sqlite_master WHERE type='index'")
+        }
+        analyzed = {row[0] for row in connection.execute("SELECT idx FROM sqlite_stat1")}
+        connection.close()
+        declared = {name for specs in INDEXES.values() for name, _ in specs}
+        self.assertLessEqual(declared, indexes)
+        self.assertLessEqual(declared, analyzed)
+
+    def _append_metering(self, day: int, credits: int) -> None:
+        with (self.data_dir / "warehouse_metering.csv").open("a") as handle:
+            start = f"2024-01-{day:02d}T00:00:00"
+            handle.write(f"WH_CORE,{start},{start[:11]}01:00:00,{credits}\n")
+
+    def _assert_anomalies_match_full_scan(self) -> str:
+        connection = get_connection()
+        (state,) = connection.execute(
+            "SELECT state FROM anomaly_state WHERE series = ?", (TOTAL_SERIES,)
+        ).fetchone()
+        anomalies = cost_anomalies(connection)
+        self.assertTrue(anomalies)
+        self.assertEqual(anomalies, detect_cost_anomalies(daily_credits(connection)))
+        connection.close()
+        return json.loads(state)["last_day"]
+
+    def test_ingest_advances_stored_anomaly_state(self) -> None:
+        for day in range(2, 16):
+            self._append_metering(day, 40 if day == 12 else 8 + day % 3)
+        ingest_csvs(self.data_dir)
+        # The latest day may still be partial, so it is left out of the stored state.
+        self.assertEqual(self._assert_anomalies_match_full_scan(), "2024-01-14")
+        for day in (16, 17, 18):
+            self._append_metering(day, 60 if day == 17 else 9)
+        ingest_csvs(self.data_dir, incremental=True)
+        self.assertEqual(self._assert_anomalies_match_full_scan(), "2024-01-17")
+        # A late row for a scored day makes the state start over.
+        with (self.data_dir / "warehouse_metering.csv").open("a") as handle:
+            handle.write("WH_ETL,2024-01-10T00:00:00,2024-01-10T01:00:00,80\n")
+        ingest_csvs(self.data_dir, incremental=True)
+        last_day = self._assert_anomalies_match_full_scan()
+        connection = get_connection()
+        late = [anomaly.day.isoformat() for anomaly in cost_anomalies(connection)]
+        connection.close()
+        self.assertEqual((last_day, late[0]), ("2024-01-17", "2024-01-10"))
+
+    def test_corrected_row_resets_anomaly_state(self) -> None:
+        for day in range(2, 16):
+            self._append_metering(day, 8 + day % 3)
+        self._append_metering(12, 40)
+        ingest_csvs(self.data_dir)
+        self.assertEqual(self._assert_anomalies_match_full_scan(), "2024-01-14")
+        # The upsert rewrites the stored row of a scored day and keeps its id.
+        self._append_metering(14, 500)
+        ingest_csvs(self.data_dir, incremental=True)
+        self._assert_anomalies_match_full_scan()
+        connection = get_connection()
+        found = [anomaly.day.isoformat() for anomaly in cost_anomalies(connection)]
+        (rows,) = connection.execute("SELECT COUNT(*) FROM warehouse_metering").fetchone()
+        connection.close()
+        self.assertEqual((found, rows), (["2024-01-12", "2024-01-14"], 15))
@@ -0,0 +1,75 @@
+import csv
+import os
+import shutil
+import sqlite3
+import tracemalloc
+import unittest
+from pathlib import Path
+from tempfile import TemporaryDirectory
+
+from app.ingest import ingest_csvs
+
+DEMO_DIR = Path(__file__).resolve().parents[3] / "data" / "demo"
+FIELDS = [
+    "query_id",
+    "warehouse_name",
+    "user_name",
+    "role_name",
+    "start_time",
+    "end_time",
+    "total_elapsed_ms",
+    "bytes_scanned",
+    "rows_produced",
+    "query_text",
+]
+
+
+class StreamingIngestMemoryTestCase(unittest.TestCase):
+    def setUp(self) -> None:
+        self.temp_dir = TemporaryDirectory()
+        os.environ["FROSTSIGHT_DB_PATH"] = str(Path(self.temp_dir.name) / "demo.db")
+
+    def tearDown(self) -> None:
+        self.temp_dir.cleanup()
+
+    def _dataset(self, name: str, query_rows: int) -> Path:
+        data_dir = Path(self.temp_dir.name) / name
+        shutil.copytree(DEMO_DIR, data_dir, ignore=shutil.ignore_patterns("*.db*"))
+        with (data_dir / "query_history.csv").open("w", newline="", encoding="utf-8") as handle:
+            writer = csv.DictWriter(handle, fieldnames=FIELDS)
+            writer.writeheader()
+            for idx in range(query_rows):
+                writer.writerow(
+                    {
+                        "query_id": f"Q{idx:07d}",
+                        "warehouse_name": "WH_CORE",
+                        "user_name": "ava",
+                        "role_name": "ANALYST",
+                        "start_time": f"2024-01-{idx % 28 + 1:02d}T00:00:{idx % 60:02d}",
+                        "end_time": f"2024-01-{idx % 28 + 1:02d}T00:01:00",
+                        "total_elapsed_ms": idx % 4000,
+                        "bytes_scanned": idx * 7,
+                        "rows_produced": idx % 100,
+                        "query_text": f"select * from sessions where id = {idx} -- padding " * 3,
+                    }
+                )
+        return data_dir
+
+    def _peak(self, data_dir: Path) -> int:
+        tracemalloc.start()
+        try:
+            ingest_csvs(data_dir, batch_size=1000)
+            return tracemalloc.get_traced_memory()[1]
+        finally:
+            tracemalloc.stop()
+
+    def test_peak_memory_independent_of_file_size(self) -> None:
+        small = self._peak(self._dataset("small", 5_000))
+        large = self._peak(self._dataset("large", 40_000))
+        connection = sqlite3.connect(os.environ["FROSTSIGHT_DB_PATH"])
+        count = connection.execute("SELECT COUNT(*) FROM query_history").fetchone()[0]
+        connection.close()
+        self.assertEqual(count, 40_000)
+        self.assertLess(large, small * 1.5)
+        # Materializing 40k cast rows as dicts alone would take tens of MB.
+        self.assertLess(large, 4 * 1024 * 1024)
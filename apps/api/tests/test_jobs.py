@@ -0,0 +1,50 @@
+import threading
+import unittest
+
+from app.jobs import JobRunner
+
+
+class JobRunnerTestCase(unittest.TestCase):
+    def _wait(self, runner: JobRunner, job_id: str) -> dict:
+        for _ in range(200):
+            job = runner.get(job_id)
+            if job["status"] in ("succeeded", "failed"):
+                return job
+            threading.Event().wait(0.01)
+        self.fail(f"job {job_id} did not finish")
+
+    def test_job_reports_running_then_succeeded(self) -> None:
+        runner = JobRunner()
+        release = threading.Event()
+        job = runner.submit(lambda: release.wait(2))
+        self.assertEqual(job["status"], "queued")
+        for _ in range(200):
+            if runner.get(job["id"])["status"] == "running":
+                break
+            threading.Event().wait(0.01)
+        self.assertEqual(runner.get(job["id"])["status"], "running")
+        release.set()
+        finished = self._wait(runner, job["id"])
+        self.assertEqual(finished["status"], "succeeded")
+        self.assertIsNotNone(finished["finished_at"])
+
+    def test_failed_job_records_error(self) -> None:
+        runner = JobRunner()
+
+        def fail() -> None:
+            raise FileNotFoundError("Missing dataset: x.csv")
+
+        job = self._wait(runner, runner.submit(fail)["id"])
+        self.assertEqual(job["status"], "failed")
+        self.assertEqual(job["error"], "Missing dataset: x.csv")
+
+    def test_jobs_run_one_at_a_time_in_order(self) -> None:
+        runner = JobRunner()
+        order: list[int] = []
+        ids = [runner.submit(lambda idx=idx: order.append(idx))["id"] for idx in range(5)]
+        for job_id in ids:
+            self._wait(runner, job_id)
+        self.assertEqual(order, list(range(5)))
+
+    def test_unknown_job(self) -> None:
+        self.assertIsNone(JobRunner().get("missing"))
@@ -0,0 +1,141 @@
+import json
+import os
+import sqlite3
+import threading
+import unittest
+import urllib.error
+import urllib.request
+from pathlib import Path
+from tempfile import TemporaryDirectory
+
+from app.ingest import TABLES, ingest_demo_data
+from app.main import run_server
+from app.pagination import InvalidCursorError, decode_cursor, encode_cursor, fetch_page
+
+
+class CursorTestCase(unittest.TestCase):
+    def test_round_trip(self) -> None:
+        token = encode_cursor(["2024-01-01T00:00:00", 42])
+        self.assertNotIn("=", token)
+        self.assertEqual(decode_cursor(token, [str, int]), ("2024-01-01T00:00:00", 42))
+
+    def test_rejects_garbage(self) -> None:
+        for token in ("not-a-cursor", encode_cursor([1]), "!!!"):
+            with self.assertRaises(InvalidCursorError):
+                decode_cursor(token, [int, int])
+
+    def test_rejects_mistyped_values(self) -> None:
+        for values in ([{"a": 1}, 1], [1.5, 1], [True, 1], ["1", 1], [1, None]):
+            with self.assertRaises(InvalidCursorError):
+                decode_cursor(encode_cursor(values), [int, int])
+
+    def test_pages_past_unparseable_start_times(self) -> None:
+        connection = sqlite3.connect(":memory:")
+        connection.row_factory = sqlite3.Row
+        connection.execute(TABLES["query_history"][0])
+        for index, start in enumerate(["2024-01-02T00:00:00", "not a time", "", "2024-01-01"]):
+            connection.execute(
+                TABLES["query_history"][1],
+                {
+                    "query_id": f"Q{index}",
+                    "warehouse_name": "WH",
+                    "user_name": "ava",
+                    "role_name": "ANALYST",
+                    "start_time": start,
+                    "end_time": start,
+                    "total_elapsed_ms": 1,
+                    "bytes_scanned": 1,
+                    "rows_produced": 1,
+                    "query_text": "select 1",
+                },
+            )
+        ids: list[int] = []
+        cursor = None
+        while True:
+            rows, cursor = fetch_page(connection, "query_history", 1, cursor)
+            ids.extend(row["id"] for row in rows)
+            if cursor is None:
+                break
+        connection.close()
+        self.assertEqual(ids, [2, 3, 4, 1])
+
+
+class KeysetEndpointTestCase(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls) -> None:
+        cls.temp_dir = TemporaryDirectory()
+        cls.db_path = Path(cls.temp_dir.name) / "demo.db"
+        os.environ["FROSTSIGHT_DB_PATH"] = str(cls.db_path)
+        ingest_demo_data()
+        cls.server = run_server("127.0.0.1", 0)
+        cls.port = cls.server.server_port
+        cls.thread = threading.Thread(target=cls.server.serve_forever, daemon=True)
+        cls.thread.start()
+
+    @classmethod
+    def tearDownClass(cls) -> None:
+        cls.server.shutdown()
+        cls.server.server_close()
+        cls.thread.join(timeout=2)
+        cls.temp_dir.cleanup()
+
+    def _get(self, path: str) -> object:
+        request = urllib.request.Request(f"http://127.0.0.1:{self.port}{path}")
+        request.add_header("Authorization", "Bearer local-dev-token")
+        with urllib.request.urlopen(request) as response:
+            return json.loads(response.read().decode("utf-8"))
+
+    def _walk(self, path: str, limit: int) -> list[dict]:
+        rows: list[dict] = []
+        cursor = ""
+        while True:
+            page = self._get(f"{path}?limit={limit}&cursor={cursor}")
+            self.assertLessEqual(len(page["items"]), limit)
+            rows.extend(page["items"])
+            if page["next_cursor"] is None:
+                return rows
+            cursor = page["next_cursor"]
+
+    def test_cursor_pages_cover_table_in_order(self) -> None:
+        rows = self._walk("/api/v1/queries", limit=250)
+        connection = sqlite3.connect(self.db_path)
+        expected = [
+            row[0]
+            for row in connection.execute("SELECT id FROM query_history ORDER BY start_time, id")
+        ]
+        connection.close()
+        self.assertEqual([row["id"] for row in rows], expected)
+
+    def test_other_list_endpoints(self) -> None:
+        self.assertEqual(len(self._walk("/api/v1/warehouses", limit=2)), 5)
+        self.assertEqual(len(self._walk("/api/v1/warehouse-metering", limit=40)), 150)
+
+    def test_offset_still_supported(self) -> None:
+        rows = self._get("/api/v1/queries?limit=3&offset=3")
+        self.assertIsInstance(rows, list)
+        connection = sqlite3.connect(self.db_path)
+        expected = connection.execute(
+            "SELECT id FROM query_history ORDER BY start_ms, id LIMIT 3 OFFSET 3"
+        ).fetchall()
+        connection.close()
+        self.assertEqual([row["id"] for row in rows], [row[0] for row in expected])
+
+    def test_invalid_cursor(self) -> None:
+        for cursor in ("bogus", encode_cursor([{"a": 1}, 1])):
+            with self.assertRaises(urllib.error.HTTPError) as ctx:
+                self._get(f"/api/v1/queries?cursor={cursor}")
+            self.assertEqual(ctx.exception.code, 400)
+
+    def test_page_query_seeks_index(self) -> None:
+        connection = sqlite3.connect(self.db_path)
+        plan = " ".join(
+            row[3]
+            for row in connection.execute(
+                "EXPLAIN QUERY PLAN SELECT * FROM query_history "
+                "WHERE (start_ms, id) > (?, ?) ORDER BY start_ms, id LIMIT ?",
+                (1705276800000, 1, 100),
+            )
+        )
+        connection.close()
+        self.assertIn("USING INDEX idx_query_history_start_ms", plan)
+        self.assertNotIn("TEMP B-TREE", plan)
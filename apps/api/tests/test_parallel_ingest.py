@@ -0,0 +1,59 @@
+import csv
+import os
+import shutil
+import sqlite3
+import unittest
+from pathlib import Path
+from tempfile import TemporaryDirectory
+
+from app.ingest import TABLES, ingest_csvs
+
+DEMO_DIR = Path(__file__).resolve().parents[3] / "data" / "demo"
+
+
+class ParallelIngestTestCase(unittest.TestCase):
+    def setUp(self) -> None:
+        self.temp_dir = TemporaryDirectory()
+        self.data_dir = Path(self.temp_dir.name) / "data"
+        shutil.copytree(DEMO_DIR, self.data_dir, ignore=shutil.ignore_patterns("*.db*"))
+        path = self.data_dir / "query_history.csv"
+        with path.open("a", newline="", encoding="utf-8") as handle:
+            writer = csv.writer(handle)
+            for idx in range(50):
+                # Quoted newlines and escaped quotes must not be split across chunks.
+                text = f'select "a\nb", \'{idx}\'\nfrom "t, u"'
+                writer.writerow(
+                    [
+                        f"QX{idx}",
+                        "WH_CORE",
+                        "ava",
+                        "ANALYST",
+                        "2024-03-01T00:00:00",
+                        "2024-03-01T00:00:01",
+                        idx,
+                        10,
+                        5,
+                        text,
+                    ]
+                )
+
+    def tearDown(self) -> None:
+        self.temp_dir.cleanup()
+
+    def _dump(self, name: str, **kwargs) -> dict[str, list[tuple]]:
+        os.environ["FROSTSIGHT_DB_PATH"] = str(Path(self.temp_dir.name) / f"{name}.db")
+        ingest_csvs(self.data_dir, **kwargs)
+        connection = sqlite3.connect(os.environ["FROSTSIGHT_DB_PATH"])
+        tables = {
+            table: connection.execute(f"SELECT * FROM {table} ORDER BY id").fetchall()
+            for table in TABLES
+        }
+        connection.close()
+        return tables
+
+    def test_parallel_matches_serial(self) -> None:
+        serial = self._dump("serial")
+        parallel = self._dump("parallel", workers=2, chunk_bytes=2048)
+        self.assertEqual(parallel, serial)
+        self.assertEqual(len(serial["query_history"]), 1850)
+        self.assertIn('"a\nb"', serial["query_history"][-1][10])
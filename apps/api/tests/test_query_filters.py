@@ -0,0 +1,146 @@
+import json
+import os
+import sqlite3
+import threading
+import unittest
+import urllib.error
+import urllib.request
+from pathlib import Path
+from tempfile import TemporaryDirectory
+
+from app.ingest import ingest_demo_data
+from app.main import run_server
+from app.pagination import page_query
+from app.query_filters import InvalidFilterError, query_history_filters
+
+
+class FilterBuilderTestCase(unittest.TestCase):
+    def test_builds_parameterized_clauses(self) -> None:
+        clauses, params = query_history_filters(
+            {
+                "warehouse_name": ["WH_CORE"],
+                "role_name": ["ANALYST"],
+                "start": ["2024-01-02"],
+                "end": ["2024-01-05"],
+                "min_elapsed_ms": ["1000"],
+            }
+        )
+        self.assertEqual(
+            clauses,
+            [
+                "warehouse_name = ?",
+                "role_name = ?",
+                "start_ms >= ?",
+                "start_ms < ?",
+                "total_elapsed_ms >= ?",
+            ],
+        )
+        self.assertEqual(params, ["WH_CORE", "ANALYST", 1704153600000, 1704499200000, 1000])
+
+    def test_rejects_bad_values(self) -> None:
+        for query in ({"start": ["yesterday"]}, {"min_elapsed_ms": ["fast"]}):
+            with self.assertRaises(InvalidFilterError):
+                query_history_filters(query)
+
+
+class FilteredQueriesTestCase(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls) -> None:
+        cls.temp_dir = TemporaryDirectory()
+        cls.db_path = Path(cls.temp_dir.name) / "demo.db"
+        os.environ["FROSTSIGHT_DB_PATH"] = str(cls.db_path)
+        ingest_demo_data()
+        connection = sqlite3.connect(cls.db_path)
+        connection.row_factory = sqlite3.Row
+        cls.rows = [dict(row) for row in connection.execute("SELECT * FROM query_history")]
+        connection.close()
+        cls.server = run_server("127.0.0.1", 0)
+        cls.port = cls.server.server_port
+        cls.thread = threading.Thread(target=cls.server.serve_forever, daemon=True)
+        cls.thread.start()
+
+    @classmethod
+    def tearDownClass(cls) -> None:
+        cls.server.shutdown()
+        cls.server.server_close()
+        cls.thread.join(timeout=2)
+        cls.temp_dir.cleanup()
+
+    def _get(self, path: str) -> object:
+        request = urllib.request.Request(f"http://127.0.0.1:{self.port}{path}")
+        request.add_header("Authorization", "Bearer local-dev-token")
+        with urllib.request.urlopen(request) as response:
+            return json.loads(response.read().decode("utf-8"))
+
+    def _plan(self, sql: str, params: tuple) -> str:
+        connection = sqlite3.connect(self.db_path)
+        plan = " | ".join(row[3] for row in connection.execute(f"EXPLAIN QUERY PLAN {sql}", params))
+        connection.close()
+        return plan
+
+    def test_filters_match_python_filtering(self) -> None:
+        data = self._get(
+            "/api/v1/queries?limit=5000&warehouse_name=WH_CORE&user_name=ava"
+            "&start=2024-01-05&end=2024-01-20T12:00:00&min_elapsed_ms=1000"
+        )
+        expected = [
+            row["id"]
+            for row in self.rows
+            if row["warehouse_name"] == "WH_CORE"
+            and row["user_name"] == "ava"
+            and "2024-01-05T00:00:00" <= row["start_time"] < "2024-01-20T12:00:00"
+            and row["total_elapsed_ms"] >= 1000
+        ]
+        self.assertTrue(expected)
+        self.assertEqual(sorted(row["id"] for row in data), sorted(expected))
+
+    def test_role_filter_with_cursor(self) -> None:
+        page = self._get("/api/v1/queries?role_name=SECURITY&limit=1000&cursor=")
+        expected = sorted(
+            (row["start_time"], row["id"]) for row in self.rows if row["role_name"] == "SECURITY"
+        )
+        self.assertEqual([(row["start_time"], row["id"]) for row in page["items"]], expected)
+
+    def test_filtered_offset_pages_follow_cursor_order(self) -> None:
+        # The planner serves min_elapsed_ms from the total_elapsed_ms index.
+        filters = "min_elapsed_ms=3000"
+        cursor_rows = self._get(f"/api/v1/queries?{filters}&limit=1000&cursor=")["items"]
+        offset_rows = [
+            row
+            for offset in range(0, len(cursor_rows), 50)
+            for row in self._get(f"/api/v1/queries?{filters}&limit=50&offset={offset}")
+        ]
+        self.assertGreater(len(cursor_rows), 50)
+        self.assertEqual([row["id"] for row in offset_rows], [row["id"] for row in cursor_rows])
+        self.assertEqual(
+            [row["id"] for row in offset_rows],
+            [
+                row["id"]
+                for row in sorted(offset_rows, key=lambda row: (row["start_ms"], row["id"]))
+            ],
+        )
+
+    def test_invalid_filter(self) -> None:
+        with self.assertRaises(urllib.error.HTTPError) as ctx:
+            self._get("/api/v1/queries?min_elapsed_ms=slow")
+        self.assertEqual(ctx.exception.code, 400)
+
+    def test_filters_use_indexes(self) -> None:
+        cases = {
+            "warehouse_name": "idx_query_history_warehouse_start",
+            "user_name": "idx_query_history_user_start",
+            "role_name": "idx_query_history_role_start",
+        }
+        for column, index_name in cases.items():
+            where, params = query_history_filters({column: ["X"], "start": ["2024-01-02"]})
+            plan = self._plan(f"SELECT * FROM query_history WHERE {' AND '.join(where)}", params)
+            self.assertIn(f"USING INDEX {index_name}", plan)
+            sql, values = page_query("query_history", 100, None, where, params)
+            plan = self._plan(sql, values)
+            self.assertIn(f"USING INDEX {index_name}", plan)
+            self.assertNotIn("TEMP B-TREE", plan)
+
+    def test_time_range_uses_start_ms_index(self) -> None:
+        where, params = query_history_filters({"start": ["2024-01-02"], "end": ["2024-01-03"]})
+        plan = self._plan(f"SELECT * FROM query_history WHERE {' AND '.join(where)}", params)
+        self.assertIn("USING INDEX idx_query_history_start_ms (start_ms>? AND start_ms<?)", plan)
@@ -0,0 +1,54 @@
+import json
+import random
+import unittest
+
+from app.analytics import LATENCY_PERCENTILES, _percentile, sketch_percentile
+from app.sketches import QuantileSketch
+
+
+class QuantileSketchTestCase(unittest.TestCase):
+    def setUp(self) -> None:
+        rng = random.Random(7)
+        # Long-tailed, like query latencies, plus a few zero-millisecond queries.
+        self.values = [int(rng.lognormvariate(6, 1.5)) for _ in range(20_000)] + [0] * 50
+
+    def test_percentiles_within_relative_accuracy(self) -> None:
+        for accuracy in (0.01, 0.05):
+            sketch = QuantileSketch(accuracy)
+            sketch.update(self.values)
+            for percentile in LATENCY_PERCENTILES:
+                exact = _percentile(self.values, percentile)
+                approximate = sketch_percentile(sketch, percentile)
+                self.assertLessEqual(abs(approximate - exact), accuracy * exact + 1e-9)
+
+    def test_extremes_are_exact(self) -> None:
+        sketch = QuantileSketch()
+        sketch.update(self.values)
+        self.assertEqual(sketch_percentile(sketch, 0), min(self.values))
+        self.assertEqual(sketch_percentile(sketch, 100), max(self.values))
+        self.assertEqual(sketch_percentile(QuantileSketch(), 95), 0.0)
+
+    def test_merge_matches_single_sketch(self) -> None:
+        whole = QuantileSketch()
+        whole.update(self.values)
+        merged = QuantileSketch()
+        for start in range(0, len(self.values), 3000):
+            part = QuantileSketch()
+            part.update(self.values[start : start + 3000])
+            merged.merge(part)
+        self.assertEqual(merged.to_dict(), whole.to_dict())
+        with self.assertRaises(ValueError):
+            merged.merge(QuantileSketch(0.05))
+
+    def test_roundtrips_through_json(self) -> None:
+        sketch = QuantileSketch()
+        sketch.update(self.values)
+        restored = QuantileSketch.from_dict(json.loads(json.dumps(sketch.to_dict())))
+        self.assertEqual(restored.to_dict(), sketch.to_dict())
+        self.assertEqual(sketch_percentile(restored, 99), sketch_percentile(sketch, 99))
+        empty = QuantileSketch.from_dict(json.loads(json.dumps(QuantileSketch().to_dict())))
+        self.assertEqual(len(empty), 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
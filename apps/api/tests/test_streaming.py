@@ -0,0 +1,101 @@
+import http.client
+import json
+import os
+import sqlite3
+import threading
+import tracemalloc
+import unittest
+from pathlib import Path
+from tempfile import TemporaryDirectory
+from unittest import mock
+
+from app.ingest import ingest_demo_data
+from app.main import run_server
+
+COLUMNS = (
+    "warehouse_name, user_name, role_name, start_time, end_time, "
+    "total_elapsed_ms, bytes_scanned, rows_produced, query_text"
+)
+
+
+class StreamingResponseTestCase(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls) -> None:
+        cls.temp_dir = TemporaryDirectory()
+        db_path = Path(cls.temp_dir.name) / "demo.db"
+        os.environ["FROSTSIGHT_DB_PATH"] = str(db_path)
+        ingest_demo_data()
+        connection = sqlite3.connect(db_path)
+        for copy in range(4):
+            # query_id is unique, so each copy gets its own suffix.
+            connection.execute(
+                f"INSERT INTO query_history (query_id, {COLUMNS}) "
+                f"SELECT query_id || '-{copy}', {COLUMNS} FROM query_history"
+            )
+        connection.commit()
+        cls.total = connection.execute("SELECT COUNT(*) FROM query_history").fetchone()[0]
+        connection.close()
+        cls.server = run_server("127.0.0.1", 0)
+        cls.port = cls.server.server_port
+        cls.thread = threading.Thread(target=cls.server.serve_forever, daemon=True)
+        cls.thread.start()
+
+    @classmethod
+    def tearDownClass(cls) -> None:
+        cls.server.shutdown()
+        cls.server.server_close()
+        cls.thread.join(timeout=2)
+        cls.temp_dir.cleanup()
+
+    def _request(self, path: str) -> http.client.HTTPResponse:
+        connection = http.client.HTTPConnection("127.0.0.1", self.port, timeout=30)
+        self.addCleanup(connection.close)
+        connection.request("GET", path, headers={"Authorization": "Bearer local-dev-token"})
+        return connection.getresponse()
+
+    def _drain(self, path: str) -> int:
+        response = self._request(path)
+        size = 0
+        while chunk := response.read(64 * 1024):
+            size += len(chunk)
+        return size
+
+    def _peak_memory(self, path: str) -> int:
+        tracemalloc.start()
+        try:
+            self._drain(path)
+            return tracemalloc.get_traced_memory()[1]
+        finally:
+            tracemalloc.stop()
+
+    def test_large_limit_is_chunked(self) -> None:
+        response = self._request(f"/api/v1/queries?limit={self.total}")
+        self.assertEqual(response.getheader("Transfer-Encoding"), "chunked")
+        self.assertIsNone(response.getheader("Content-Length"))
+        rows = json.loads(response.read())
+        self.assertEqual(len(rows), self.total)
+
+    def test_streamed_body_matches_buffered(self) -> None:
+        streamed = self._request("/api/v1/queries?limit=50&offset=7&stream=1").read()
+        buffered_response = self._request("/api/v1/queries?limit=50&offset=7")
+        self.assertIsNotNone(buffered_response.getheader("Content-Length"))
+        self.assertEqual(streamed, buffered_response.read())
+
+    def test_streamed_cursor_page(self) -> None:
+        page = json.loads(self._request("/api/v1/queries?limit=10&cursor=&stream=1").read())
+        self.assertEqual(len(page["items"]), 10)
+        following = json.loads(
+            self._request(f"/api/v1/queries?limit=10&cursor={page['next_cursor']}").read()
+        )
+        self.assertGreater(
+            (following["items"][0]["start_time"], following["items"][0]["id"]),
+            (page["items"][-1]["start_time"], page["items"][-1]["id"]),
+        )
+
+    def test_streaming_memory_is_flat(self) -> None:
+        small = self._peak_memory("/api/v1/queries?limit=2000&stream=1")
+        large = self._peak_memory(f"/api/v1/queries?limit={self.total}&stream=1")
+        with mock.patch.dict(os.environ, {"FROSTSIGHT_STREAM_THRESHOLD": str(10**9)}):
+            buffered = self._peak_memory(f"/api/v1/queries?limit={self.total}")
+        self.assertLess(large, small * 2)
+        self.assertLess(large * 4, buffered)
@@ -0,0 +1,92 @@
+import sqlite3
+import unittest
+from datetime import date, datetime
+
+from app.analytics import governance_lint
+from app.ingest import TABLES
+from app.timestamps import day_to_date, epoch_day, epoch_ms_sql, to_epoch_ms
+
+
+class TimestampTestCase(unittest.TestCase):
+    def test_sql_expression_matches_python(self) -> None:
+        connection = sqlite3.connect(":memory:")
+        for value in (
+            "2024-01-01T13:30:01.122000",
+            "2024-01-01T13:30:01",
+            "2024-02-29 23:59:59.5",
+            "2024-01-01T00:00:00+02:00",
+            "2024-01-02T03:04:05.9999",
+            "2024-01-02T03:04:59.9999",
+            "2023-12-31T23:59:59.99951+01:00",
+            "2024-01-01T00:00:00.05Z",
+            "2024-01-01T12:30:45.12+0200",
+            "2024-01-01T12:30:45-0530",
+            "2024-01-01T12:30:45.5+02",
+        ):
+            sql = f"SELECT {epoch_ms_sql(':value')}"
+            stored = connection.execute(sql, {"value": value}).fetchone()[0]
+            self.assertEqual(stored, to_epoch_ms(value), value)
+        connection.close()
+
+    def test_sub_millisecond_digits_are_truncated(self) -> None:
+        connection = sqlite3.connect(":memory:")
+        value = "2024-01-02T03:04:05.9999"
+        stored = connection.execute(f"SELECT {epoch_ms_sql(':value')}", {"value": value})
+        self.assertEqual(stored.fetchone()[0], 1704164645999)
+        self.assertEqual(to_epoch_ms(value), 1704164645999)
+        connection.close()
+
+    def test_offsets_without_colon_keep_a_day(self) -> None:
+        connection = sqlite3.connect(":memory:")
+        connection.execute(TABLES["warehouse_metering"][0])
+        connection.execute(
+            TABLES["warehouse_metering"][1],
+            {
+                "warehouse_name": "WH",
+                "start_time": "2024-01-01T12:30:45.12+0200",
+                "end_time": "2024-01-01T13:30:45.12+0200",
+                "credits_used": 1,
+            },
+        )
+        row = connection.execute("SELECT start_ms, day FROM warehouse_metering").fetchone()
+        connection.close()
+        self.assertEqual(row[0], 1704105045120)
+        self.assertEqual(day_to_date(row[1]), date(2024, 1, 1))
+
+    def test_days(self) -> None:
+        self.assertEqual(to_epoch_ms(datetime(1970, 1, 2)), 86_400_000)
+        day = epoch_day(to_epoch_ms("2024-03-05T23:59:59"))
+        self.assertEqual(day_to_date(day), date(2024, 3, 5))
+
+    def test_ingested_rows_carry_integer_columns(self) -> None:
+        connection = sqlite3.connect(":memory:")
+        connection.row_factory = sqlite3.Row
+        for table in ("query_history", "role_usage"):
+            connection.execute(TABLES[table][0])
+        connection.execute(
+            TABLES["query_history"][1],
+            {
+                "query_id": "Q1",
+                "warehouse_name": "WH",
+                "user_name": "ava",
+                "role_name": "ANALYST",
+                "start_time": "2024-01-02T03:04:05.678",
+                "end_time": "2024-01-02T03:04:06",
+                "total_elapsed_ms": 322,
+                "bytes_scanned": 1,
+                "rows_produced": 1,
+                "query_text": "select 1",
+            },
+        )
+        connection.execute(
+            TABLES["role_usage"][1], {"role_name": "OLD", "last_used_at": "2020-01-01T00:00:00"}
+        )
+        row = connection.execute("SELECT start_ms, end_ms, day FROM query_history").fetchone()
+        self.assertEqual(row["start_ms"], to_epoch_ms("2024-01-02T03:04:05.678"))
+        self.assertEqual(row["end_ms"] - row["start_ms"], 322)
+        self.assertEqual(day_to_date(row["day"]), date(2024, 1, 2))
+        usage = [dict(item) for item in connection.execute("SELECT * FROM role_usage")]
+        connection.close()
+        self.assertEqual(usage[0]["last_used_ms"], to_epoch_ms("2020-01-01T00:00:00"))
+        findings = governance_lint([], usage, [])
+        self.assertEqual([item.finding_type for item in findings], ["UNUSED_ROLE"])
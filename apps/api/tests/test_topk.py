@@ -0,0 +1,49 @@
+import random
+import unittest
+
+from app.topk import GroupedTopK, TopK
+
+
+class TopKTestCase(unittest.TestCase):
+    def setUp(self) -> None:
+        rng = random.Random(3)
+        # Few distinct scores, so most of the kept items are decided by ties.
+        self.items = [(rng.randint(0, 20), index) for index in range(2000)]
+
+    def _stable_top(self, items: list, k: int) -> list:
+        return sorted(items, key=lambda item: item[0], reverse=True)[:k]
+
+    def test_matches_stable_sort(self) -> None:
+        for k in (0, 1, 5, 100, 5000):
+            top = TopK(k, key=lambda item: item[0])
+            top.update(self.items)
+            self.assertEqual(top.items(), self._stable_top(self.items, k))
+
+    def test_offer_matches_update(self) -> None:
+        updated = TopK(25, key=lambda item: item[0])
+        updated.update(self.items)
+        offered = TopK(25)
+        for item in self.items:
+            offered.offer(item[0], item)
+        self.assertEqual(offered.items(), updated.items())
+        self.assertEqual(offered.floor, updated.floor)
+        self.assertEqual(len(offered), 25)
+
+    def test_updates_in_chunks(self) -> None:
+        top = TopK(10, key=lambda item: item[0])
+        for start in range(0, len(self.items), 300):
+            top.update(self.items[start : start + 300])
+        self.assertEqual(top.items(), self._stable_top(self.items, 10))
+
+    def test_grouped(self) -> None:
+        top = GroupedTopK(3, key=lambda item: item[0], group=lambda item: item[1] % 4)
+        top.update(self.items)
+        groups = top.items()
+        self.assertEqual(list(groups), [0, 1, 2, 3])
+        for group, items in groups.items():
+            members = [item for item in self.items if item[1] % 4 == group]
+            self.assertEqual(items, self._stable_top(members, 3))
+
+
+if __name__ == "__main__":
+    unittest.main()